@@ -0,0 +1,14 @@
+"""Benchmarks of learning_machine engines and configs.
+
+Run ``python -m benchmarks run --rows 10000 1000000 --output results.json`` and compare two results
+with ``python -m benchmarks compare base.json new.json``.
+"""
+
+from .data import synthetic_frame
+from .run import compare_results, run_benchmarks
+
+__all__ = [
+    "compare_results",
+    "run_benchmarks",
+    "synthetic_frame",
+]
@@ -0,0 +1,87 @@
+"""Command line of benchmarks.
+
+python -m benchmarks run --rows 1e4 1e6 --output results.json
+python -m benchmarks compare base.json results.json --threshold 1.1
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+import pandas as pd
+
+from .run import compare_results, run_benchmarks
+
+
+def _rows(value: str) -> int:
+    return int(float(value))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="run benchmarks and write JSON results")
+    run.add_argument(
+        "--rows",
+        type=_rows,
+        nargs="+",
+        default=[10_000, 1_000_000],
+        help="e.g. 1e4 1e6",
+    )
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument(
+        "--engines", nargs="*", help="registered engine names, default all"
+    )
+    run.add_argument("--configs", nargs="*", help="config files, default bundled ones")
+    run.add_argument("--no-memory", action="store_true", help="skip tracemalloc pass")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--output", help="JSON file, default stdout")
+
+    compare = subparsers.add_parser("compare", help="compare two JSON results")
+    compare.add_argument("base")
+    compare.add_argument("new")
+    compare.add_argument(
+        "--threshold",
+        type=float,
+        default=1.1,
+        help="exit with 1 if any median time ratio exceeds this",
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        result = run_benchmarks(
+            args.rows,
+            repeat=args.repeat,
+            engines=args.engines,
+            configs=args.configs,
+            memory=not args.no_memory,
+            seed=args.seed,
+            log=lambda message: print(message, file=sys.stderr),
+        )
+        text = json.dumps(result, indent=2)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(text)
+        else:
+            print(text)
+        return 0
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    comparison = compare_results(base, new)
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(comparison.to_string(index=False))
+    regressions = comparison[comparison["ratio"] > args.threshold]
+    if len(regressions):
+        print(f"\n{len(regressions)} benchmarks slower than {args.threshold}x")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
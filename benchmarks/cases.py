@@ -0,0 +1,105 @@
+"""Benchmark case of each engine registered in DATA_ENGINE_ZOO, over columns of synthetic_frame."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from learning_machine.engine import (
+    DataEngine,
+    SequentialEngine,
+    create_engines_from_config,
+)
+from learning_machine.zoo import DATA_ENGINE_ZOO
+
+from .data import N_NUMERIC
+
+NUMERIC = [f"num_{i}" for i in range(N_NUMERIC)]
+
+ENGINE_CASES: dict[str, Any] = {
+    "SequentialEngine": [
+        {"FillNaWithValue": {"cols": ["num_0"], "fillwith": 0.0}},
+        {"StandardScaler": {"cols": NUMERIC}},
+    ],
+    "ConcatDFs": [
+        {"DatetimeDayOfWeek": {"col": "datetime"}},
+        {"Add": {"col1": "num_0", "col2": "num_1"}},
+        {"Div": {"col1": "num_2", "col2": "num_3"}},
+    ],
+    "DropColumns": {"cols": ["num_2", "cat_mid"]},
+    "Add": {"col1": "num_0", "col2": "num_1"},
+    "Sub": {"col1": "num_0", "col2": "num_1"},
+    "Mul": {"col1": "num_0", "col2": "num_1"},
+    "Div": {"col1": "num_0", "col2": "num_1"},
+    "Expr": {"expr": "(num_0 * num_1 + num_2) / num_3", "name": "expr"},
+    "SinCos": {"col": "num_0", "period": 24.0},
+    "StringToDatetime": {"col": "datetime_str"},
+    "DatetimeDayOfYear": {"col": "datetime"},
+    "DatetimeDayOfYearSinCos": {"col": "datetime"},
+    "DatetimeMonthOfYear": {"col": "datetime"},
+    "DatetimeMonthOfYearSinCos": {"col": "datetime"},
+    "DatetimeDayOfMonth": {"col": "datetime"},
+    "DatetimeDayOfMonthSinCos": {"col": "datetime"},
+    "DatetimeDayOfWeek": {"col": "datetime"},
+    "DatetimeDayOfWeekSinCos": {"col": "datetime"},
+    "DatetimeIsWeekend": {"col": "datetime"},
+    "DatetimeFeatures": {
+        "col": "datetime",
+        "features": [
+            "day_of_year",
+            "day_of_year_sin_cos",
+            "month_of_year",
+            "month_of_year_sin_cos",
+            "day_of_month",
+            "day_of_month_sin_cos",
+            "day_of_week",
+            "day_of_week_sin_cos",
+            "is_weekend",
+        ],
+    },
+    "FillSinkHole": {"col": "nan_runs", "length": 3, "fillwith": 0.0},
+    "FillGaps": {
+        "cols": ["nan_runs", "num_0", "num_1"],
+        "method": "linear",
+        "max_gap": 3,
+    },
+    "DropNARow": {"cols": ["num_0", "num_1"]},
+    "FillNaWithValue": {
+        "cols": ["num_0", "num_1"],
+        "fillwith": {"num_0": 0.0, "num_1": -1.0},
+    },
+    "FillNaFrom": {"col": "num_0", "from_col": "num_2"},
+    "OneHotEncoder": {"cols": ["cat_low", "cat_mid"]},
+    "LabelEncoder": {"col": "id_high"},
+    "StandardScaler": {"cols": NUMERIC},
+    "RobustScaler": {"cols": NUMERIC},
+    "MinMaxScaler": {"cols": NUMERIC},
+    "Downcast": {"cols": ["int_small", "count", "cat_low", "cat_mid", *NUMERIC]},
+}
+"""config of the benchmarked engine of each registered name, as written in data_engine of config file"""
+
+
+def create_case_engine(name: str) -> DataEngine | None:
+    """Create a fresh engine of the benchmark case of a registered name.
+
+    Args:
+        name (str): registered engine name
+
+    Returns:
+        DataEngine | None: engine, or None if the engine has no benchmark case
+    """
+    if name not in ENGINE_CASES:
+        return None
+    config = ENGINE_CASES[name]
+    if name == "SequentialEngine":
+        # SequentialEngine is built by create_from_config, it has no config format of its own
+        return SequentialEngine(create_engines_from_config(config))
+    return create_engines_from_config([{name: config}])[0]
+
+
+def registered_engines() -> list[str]:
+    """Names of engines registered in DATA_ENGINE_ZOO.
+
+    Returns:
+        list[str]: names
+    """
+    return list(DATA_ENGINE_ZOO.get_registry())
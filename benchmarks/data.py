@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+N_NUMERIC = 8
+"""number of num_{i} columns"""
+
+
+def _nan_runs(rng: np.random.Generator, rows: int, rate: float) -> np.ndarray:
+    """Mask of nan runs with geometric lengths, e.g. sensor outages."""
+    mask = np.zeros(rows, dtype=bool)
+    n_runs = int(rows * rate / 3)
+    starts = rng.integers(0, rows, n_runs)
+    lengths = rng.geometric(1 / 3, n_runs)
+    for start, length in zip(starts, lengths):
+        mask[start : start + length] = True
+    return mask
+
+
+def _strings(
+    rng: np.random.Generator, rows: int, cardinality: int, prefix: str
+) -> np.ndarray:
+    pool = np.array([f"{prefix}{i}" for i in range(cardinality)], dtype=object)
+    return pool[rng.integers(0, cardinality, rows)]
+
+
+def synthetic_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic dataframe with realistic dtypes, nan patterns and cardinalities.
+
+    Columns:
+        - num_0 ... num_7: float64 with different scales. num_0 has 5% random nan, num_1 has 1%.
+        - nan_runs: float64 with runs of nan
+        - int_small: int64 in [0, 100)
+        - count: int64 poisson counts
+        - cat_low: 8 categories with 2% missing
+        - cat_mid: 1,000 categories
+        - id_high: rows / 10 categories, e.g. user ids
+        - datetime: datetime64[ns]
+        - datetime_str: timestamp strings with at most 100,000 distinct values, e.g. logs
+        - epoch: int64 unix epoch seconds
+
+    Args:
+        rows (int): number of rows
+        seed (int, optional): random seed. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: data
+    """
+    rng = np.random.default_rng(seed)
+    data: dict[str, np.ndarray] = {}
+    for i in range(N_NUMERIC):
+        values = rng.normal(loc=i, scale=10.0**i, size=rows)
+        if i % 2:
+            values = np.exp(values / 10.0**i)
+        data[f"num_{i}"] = values
+    data["num_0"][rng.random(rows) < 0.05] = np.nan
+    data["num_1"][rng.random(rows) < 0.01] = np.nan
+
+    nan_runs = rng.normal(size=rows)
+    nan_runs[_nan_runs(rng, rows, 0.05)] = np.nan
+    data["nan_runs"] = nan_runs
+
+    data["int_small"] = rng.integers(0, 100, rows)
+    data["count"] = rng.poisson(3.0, rows)
+
+    cat_low = _strings(rng, rows, 8, "c")
+    cat_low[rng.random(rows) < 0.02] = None
+    data["cat_low"] = cat_low
+    data["cat_mid"] = _strings(rng, rows, 1000, "m")
+    data["id_high"] = _strings(rng, rows, max(rows // 10, 1), "u")
+
+    epoch = np.sort(rng.integers(1_500_000_000, 1_750_000_000, rows))
+    data["datetime"] = epoch.astype("datetime64[s]").astype("datetime64[ns]")
+    pool = np.datetime_as_string(
+        rng.choice(epoch, min(rows, 100_000), replace=False).astype("datetime64[s]")
+    )
+    pool = np.char.replace(pool, "T", " ").astype(object)
+    data["datetime_str"] = pool[rng.integers(0, len(pool), rows)]
+    data["epoch"] = epoch
+    return pd.DataFrame(data)
@@ -0,0 +1,373 @@
+from __future__ import annotations
+
+import datetime
+import gc
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from learning_machine import create_from_config
+
+from .cases import create_case_engine, registered_engines
+from .data import synthetic_frame
+
+CONFIG_DIR = Path(__file__).parent / "configs"
+"""directory of bundled end-to-end configs"""
+
+_IMPORT_SCRIPT = (
+    "import time; start = time.perf_counter(); import learning_machine; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def _timeit(
+    run: Callable[[Any], Any], setup: Callable[[], Any], repeat: int
+) -> list[float]:
+    """Seconds of run(setup()), setup is not timed."""
+    times = []
+    for _ in range(repeat):
+        arg = setup()
+        gc.collect()
+        start = time.perf_counter()
+        run(arg)
+        times.append(time.perf_counter() - start)
+        del arg
+    return times
+
+
+def _peak_memory(run: Callable[[Any], Any], setup: Callable[[], Any]) -> int:
+    """Peak bytes allocated by run(setup()) above the memory after setup, traced by tracemalloc."""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        arg = setup()
+        gc.collect()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        run(arg)
+        _, peak = tracemalloc.get_traced_memory()
+        return peak - baseline
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+def _record(
+    benchmark: str,
+    name: str,
+    phase: str,
+    rows: int | None,
+    run: Callable[[Any], Any],
+    setup: Callable[[], Any],
+    repeat: int,
+    memory: bool,
+) -> dict:
+    record: dict[str, Any] = {
+        "benchmark": benchmark,
+        "name": name,
+        "phase": phase,
+        "rows": rows,
+    }
+    try:
+        times = _timeit(run, setup, repeat)
+        record.update(
+            times=times,
+            min=min(times),
+            median=statistics.median(times),
+            mean=statistics.fmean(times),
+            peak_memory=_peak_memory(run, setup) if memory else None,
+        )
+    except Exception as e:  # noqa: BLE001 - record the failure, run the other cases
+        record["error"] = f"{type(e).__name__}: {e}"
+    return record
+
+
+def bench_engine(
+    name: str, frame: pd.DataFrame, repeat: int = 3, memory: bool = True
+) -> list[dict]:
+    """Benchmark fit path (first call of a fresh engine) and transform path (call of the fitted engine).
+
+    Args:
+        name (str): registered engine name
+        frame (pd.DataFrame): input data, copied for every call and the copy is not timed
+        repeat (int, optional): number of timed calls of each path. Defaults to 3.
+        memory (bool, optional): measure peak memory in an extra untimed call. Defaults to True.
+
+    Returns:
+        list[dict]: records of fit and transform, or a skipped record if the engine has no benchmark case
+    """
+    rows = len(frame)
+    if create_case_engine(name) is None:
+        return [
+            {
+                "benchmark": "engine",
+                "name": name,
+                "phase": None,
+                "rows": rows,
+                "skipped": "no benchmark case",
+            }
+        ]
+
+    def call(arg):
+        engine, data = arg
+        return engine(data)
+
+    fit = _record(
+        "engine",
+        name,
+        "fit",
+        rows,
+        call,
+        lambda: (create_case_engine(name), frame.copy()),
+        repeat,
+        memory,
+    )
+    fitted = create_case_engine(name)
+    try:
+        fitted(frame.copy())  # type: ignore
+    except Exception as e:  # noqa: BLE001 - record the failure, run the other cases
+        transform = {
+            "benchmark": "engine",
+            "name": name,
+            "phase": "transform",
+            "rows": rows,
+            "error": f"{type(e).__name__}: {e}",
+        }
+    else:
+        transform = _record(
+            "engine",
+            name,
+            "transform",
+            rows,
+            call,
+            lambda: (fitted, frame.copy()),
+            repeat,
+            memory,
+        )
+    return [fit, transform]
+
+
+def bench_config(
+    path: Path | str, frame: pd.DataFrame, repeat: int = 3, memory: bool = True
+) -> list[dict]:
+    """Benchmark config load with create_from_config, and fit and transform of its data engine.
+
+    Args:
+        path (Path | str): config file path
+        frame (pd.DataFrame): input data
+        repeat (int, optional): number of timed calls. Defaults to 3.
+        memory (bool, optional): measure peak memory. Defaults to True.
+
+    Returns:
+        list[dict]: records of load, fit and transform
+    """
+    path = str(path)
+    name = Path(path).stem
+    rows = len(frame)
+
+    def call(arg):
+        engine, data = arg
+        return engine(data)
+
+    records = [
+        _record(
+            "config",
+            name,
+            "load",
+            None,
+            lambda _: create_from_config(path),
+            lambda: None,
+            repeat,
+            memory,
+        ),
+        _record(
+            "config",
+            name,
+            "fit",
+            rows,
+            call,
+            lambda: (create_from_config(path).data_engine, frame.copy()),
+            repeat,
+            memory,
+        ),
+    ]
+    fitted = create_from_config(path).data_engine
+    try:
+        fitted(frame.copy())  # type: ignore
+    except Exception as e:  # noqa: BLE001 - record the failure, run the other cases
+        records.append(
+            {
+                "benchmark": "config",
+                "name": name,
+                "phase": "transform",
+                "rows": rows,
+                "error": f"{type(e).__name__}: {e}",
+            }
+        )
+    else:
+        records.append(
+            _record(
+                "config",
+                name,
+                "transform",
+                rows,
+                call,
+                lambda: (fitted, frame.copy()),
+                repeat,
+                memory,
+            )
+        )
+    return records
+
+
+def bench_import(repeat: int = 3) -> dict:
+    """Benchmark cold import of learning_machine, each in a new interpreter.
+
+    Args:
+        repeat (int, optional): number of imports. Defaults to 3.
+
+    Returns:
+        dict: record of import
+    """
+    env = dict(os.environ)
+    root = str(Path(__file__).resolve().parent.parent)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _IMPORT_SCRIPT],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return {
+        "benchmark": "import",
+        "name": "learning_machine",
+        "phase": "import",
+        "rows": None,
+        "times": times,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "peak_memory": None,
+    }
+
+
+def _version(package: str) -> str | None:
+    try:
+        return version(package)
+    except PackageNotFoundError:
+        return None
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def environment() -> dict:
+    """Machine, versions and commit the benchmarks run on.
+
+    Returns:
+        dict: metadata
+    """
+    return {
+        "timestamp": datetime.datetime.now(datetime.UTC).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "versions": {
+            package: _version(package)
+            for package in ["numpy", "pandas", "scikit-learn", "scipy", "pyyaml"]
+        },
+    }
+
+
+def run_benchmarks(
+    rows: list[int],
+    repeat: int = 3,
+    engines: list[str] | None = None,
+    configs: list[Path | str] | None = None,
+    memory: bool = True,
+    seed: int = 0,
+    log: Callable[[str], None] | None = None,
+) -> dict:
+    """Run import, engine and config benchmarks.
+
+    Args:
+        rows (list[int]): sizes of synthetic data
+        repeat (int, optional): number of timed calls of each benchmark. Defaults to 3.
+        engines (list[str] | None, optional): registered engine names. If None, every registered engine. Defaults to None.
+        configs (list[Path | str] | None, optional): config file paths. If None, the bundled configs. Defaults to None.
+        memory (bool, optional): measure peak memory with tracemalloc. Defaults to True.
+        seed (int, optional): random seed of synthetic data. Defaults to 0.
+        log (Callable[[str], None] | None, optional): progress callback. Defaults to None.
+
+    Returns:
+        dict: {"environment": metadata, "results": list of records}
+    """
+    if engines is None:
+        engines = registered_engines()
+    if configs is None:
+        configs = sorted(CONFIG_DIR.glob("*.yaml"))
+    log = log or (lambda message: None)
+
+    results = [bench_import(repeat)]
+    for n_rows in rows:
+        log(f"generating {n_rows} rows")
+        frame = synthetic_frame(n_rows, seed)
+        for name in engines:
+            log(f"{name} {n_rows}")
+            results.extend(bench_engine(name, frame, repeat, memory))
+        for path in configs:
+            log(f"{path} {n_rows}")
+            results.extend(bench_config(path, frame, repeat, memory))
+        del frame
+    return {"environment": environment(), "results": results}
+
+
+def compare_results(base: dict, new: dict) -> pd.DataFrame:
+    """Compare median times and peak memory of two run_benchmarks results.
+
+    Args:
+        base (dict): baseline result
+        new (dict): new result
+
+    Returns:
+        pd.DataFrame: one row per benchmark in both results, with ratio = new / base of median time and memory
+    """
+    keys = ["benchmark", "name", "phase", "rows"]
+
+    def frame(result: dict) -> pd.DataFrame:
+        records = [r for r in result["results"] if "median" in r]
+        columns = keys + ["median", "peak_memory"]
+        return pd.DataFrame(records, columns=columns)
+
+    merged = frame(base).merge(frame(new), on=keys, suffixes=("_base", "_new"))
+    merged["ratio"] = merged["median_new"] / merged["median_base"]
+    merged["memory_ratio"] = merged["peak_memory_new"] / merged["peak_memory_base"]
+    return merged
@@ -1,7 +1,11 @@
 from .config import create_from_config, get_parameter, Bundle
+from .loader import read_csv, read_parquet, read_feather
 
 __all__ = [
     "create_from_config",
     "get_parameter",
     "Bundle",
+    "read_csv",
+    "read_parquet",
+    "read_feather",
 ]
@@ -1,13 +1,26 @@
-import yaml
+from __future__ import annotations
+
+import json
+import shutil
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
+
+import yaml
+
 from learning_machine.engine import (
-    create_engines_from_config,
     DataEngine,
     SequentialEngine,
+    create_engines_from_config,
 )
-from learning_machine.projects import preload_projects
-from dataclasses import dataclass
+from learning_machine.engine.state import (
+    collect_states,
+    load_states,
+    restore_states,
+    save_states,
+)
+from learning_machine.projects import preload_projects, register_projects
+from learning_machine.zoo import DATA_ENGINE_ZOO
 
 
 @dataclass
@@ -18,12 +31,81 @@ class Bundle:
     Attributes:
         data_engines (list[DataEngine]): List of engines.
         data_engine (DataEngine | None): Apply Sequential engine with list of engines.
+        config (dict | None): Config the bundle is created from.
     """
 
     # data: pd.DataFrame
     data_engines: list[DataEngine]
     data_engine: DataEngine | None
     model: Any
+    config: dict | None = None
+
+    def required_columns(self) -> list[str] | None:
+        """Columns of the input data read by data_engine, see SequentialEngine.required_columns.
+
+        Returns:
+            list[str] | None: column names. None if an engine reads unknown columns.
+        """
+        if self.data_engine is None:
+            return []
+        return self.data_engine.required_columns()
+
+    def input_dtypes(self) -> dict[str, str]:
+        """dtypes data_engine reads its input columns as, see DataEngine.input_dtypes.
+
+        Returns:
+            dict[str, str]: {column: dtype}
+        """
+        if self.data_engine is None:
+            return {}
+        return self.data_engine.input_dtypes()
+
+    def save(self, path: Path | str) -> None:
+        """Save config and fitted parameters of engines into directory.
+        Parameters are saved as {path}/state/{engine position}/{name}.npy.
+
+        Args:
+            path (Path | str): directory path
+        """
+        if self.config is None:
+            raise ValueError("bundle is not created from config, can not be saved")
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        with open(path / "config.json", "w") as f:
+            json.dump(self.config, f)
+        if (path / "state").is_dir():
+            shutil.rmtree(path / "state")
+        save_states(collect_states(self.data_engines), path / "state")
+
+    @classmethod
+    def load(cls, path: Path | str, mmap: bool = True) -> Bundle:
+        """Load bundle saved by save. Fitted parameters are restored without refitting.
+
+        Args:
+            path (Path | str): directory path
+            mmap (bool, optional): memory-map parameter arrays, so processes loading the same bundle share memory. Defaults to True.
+
+        Returns:
+            Bundle: bundle with fitted engines
+        """
+        path = Path(path)
+        with open(path / "config.json", "r") as f:
+            config = json.load(f)
+        bundle = create_from_config(config)
+        restore_states(bundle.data_engines, load_states(path / "state", mmap=mmap))
+        return bundle
+
+
+def _engine_names(config: list[dict]) -> list[str]:
+    """Names of engines in engines config, including engines of ConcatDFs."""
+    names = []
+    for e in config:
+        engine_name = next(iter(e))
+        names.append(engine_name)
+        if engine_name == "ConcatDFs":
+            args = e[engine_name]
+            names += _engine_names(args["engines"] if isinstance(args, dict) else args)
+    return names
 
 
 def create_from_config(path_or_config: dict | str) -> Bundle:
@@ -44,21 +126,37 @@ def create_from_config(path_or_config: dict | str) -> Bundle:
 
     config: dict = path_or_config  # type: ignore
 
-    if config.get("projects"):
-        for preload_path in config["projects"]:
-            preload_projects(Path(preload_path))
+    # engines of projects are registered lazily, only projects of engines in the config are imported
+    project_dirs = [Path(path) for path in config.get("projects") or []]
+    for project_dir in project_dirs:
+        register_projects(project_dir)
 
     # data engine
     data_engine = None
     data_engines = []
     if config.get("data_engine"):
+        registered = set(DATA_ENGINE_ZOO.names())
+        if project_dirs and any(
+            name not in registered for name in _engine_names(config["data_engine"])
+        ):
+            # engines registered in a way discovery can not read, import every project
+            for project_dir in project_dirs:
+                preload_projects(project_dir)
         data_engines = create_engines_from_config(config["data_engine"])
-        data_engine = SequentialEngine(data_engines)
+        pipeline_config = config.get("pipeline") or {}
+        data_engine = SequentialEngine(
+            data_engines,
+            ownership=pipeline_config.get("ownership"),
+            dtype_policy=pipeline_config.get("dtype_policy"),
+        )
+        if pipeline_config.get("optimize"):
+            data_engine = data_engine.optimize()
 
     return Bundle(
         data_engines,
         data_engine,
         None,
+        config,
     )
 
 
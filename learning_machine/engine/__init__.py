@@ -1,68 +1,177 @@
+import importlib
+from typing import TYPE_CHECKING
+
+from learning_machine.zoo import DATA_ENGINE_ZOO
+
+from .dataframe import ConcatDFs, DropColumns
+from .dtype import DtypePolicy
 from .engine import (
     DataEngine,
+    EngineHook,
     SequentialEngine,
     create_engines_from_config,
 )
-
 from .engine_type import DataEngineType
+from .profile import Profiler, profile
+
+# engine modules are imported on first access, so importing learning_machine does not import
+# every engine module and their dependencies (e.g. scikit-learn).
+# tests check the TYPE_CHECKING imports, __all__ and _LAZY_ENGINES against this table
+_LAZY_EXPORTS = {
+    "BinaryOperator": "operator",
+    "Add": "operator",
+    "Sub": "operator",
+    "Mul": "operator",
+    "Div": "operator",
+    "Expr": "operator",
+    "StringToDatetime": "date",
+    "DatetimeDayOfYearSinCos": "date",
+    "DatetimeMonthOfYearSinCos": "date",
+    "DatetimeDayOfMonthSinCos": "date",
+    "DatetimeDayOfWeekSinCos": "date",
+    "DatetimeDayOfYear": "date",
+    "DatetimeMonthOfYear": "date",
+    "DatetimeDayOfMonth": "date",
+    "DatetimeDayOfWeek": "date",
+    "DatetimeIsWeekend": "date",
+    "NdDatetimeFeatures": "date",
+    "DatetimeFeatures": "date",
+    "NdFillSinkHole": "na",
+    "FillSinkHole": "na",
+    "NdFillGaps": "na",
+    "FillGaps": "na",
+    "fill_nan_runs": "na",
+    "DropNARow": "na",
+    "FillNaWithValue": "na",
+    "FillNaFrom": "na",
+    "OneHotEncoder": "category_encoder",
+    "LabelEncoder": "category_encoder",
+    "wrap_df2nd": "wrapper",
+    "DF2NDarr": "wrapper",
+    "StandardScaler": "norm",
+    "RobustScaler": "norm",
+    "MinMaxScaler": "norm",
+    "Downcast": "downcast",
+}
+
+# engines registered in DATA_ENGINE_ZOO by each module
+_LAZY_ENGINES = {
+    "operator": ["Add", "Sub", "Mul", "Div", "Expr"],
+    "fourier": ["SinCos"],
+    "date": [
+        "StringToDatetime",
+        "DatetimeDayOfYearSinCos",
+        "DatetimeDayOfYear",
+        "DatetimeMonthOfYear",
+        "DatetimeMonthOfYearSinCos",
+        "DatetimeDayOfMonth",
+        "DatetimeDayOfMonthSinCos",
+        "DatetimeDayOfWeek",
+        "DatetimeDayOfWeekSinCos",
+        "DatetimeIsWeekend",
+        "DatetimeFeatures",
+    ],
+    "na": ["FillSinkHole", "FillGaps", "DropNARow", "FillNaWithValue", "FillNaFrom"],
+    "category_encoder": ["OneHotEncoder", "LabelEncoder"],
+    "norm": ["StandardScaler", "RobustScaler", "MinMaxScaler"],
+    "downcast": ["Downcast"],
+}
+
+for _module, _names in _LAZY_ENGINES.items():
+    for _name in _names:
+        DATA_ENGINE_ZOO.regist_lazy(_name, f"{__name__}.{_module}")
+
+
+def __getattr__(name: str):
+    if name in _LAZY_EXPORTS:
+        module_name = _LAZY_EXPORTS[name]
+        module = importlib.import_module(f".{module_name}", __name__)
+        for export, export_module in _LAZY_EXPORTS.items():
+            if export_module == module_name:
+                globals()[export] = getattr(module, export)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
+
+
+if TYPE_CHECKING:
+    from .category_encoder import LabelEncoder, OneHotEncoder
+    from .date import (
+        DatetimeDayOfMonth,
+        DatetimeDayOfMonthSinCos,
+        DatetimeDayOfWeek,
+        DatetimeDayOfWeekSinCos,
+        DatetimeDayOfYear,
+        DatetimeDayOfYearSinCos,
+        DatetimeFeatures,
+        DatetimeIsWeekend,
+        DatetimeMonthOfYear,
+        DatetimeMonthOfYearSinCos,
+        NdDatetimeFeatures,
+        StringToDatetime,
+    )
+    from .downcast import Downcast
+    from .na import (
+        DropNARow,
+        FillGaps,
+        FillNaFrom,
+        FillNaWithValue,
+        FillSinkHole,
+        NdFillGaps,
+        NdFillSinkHole,
+        fill_nan_runs,
+    )
+    from .norm import MinMaxScaler, RobustScaler, StandardScaler
+    from .operator import Add, BinaryOperator, Div, Expr, Mul, Sub
+    from .wrapper import DF2NDarr, wrap_df2nd
 
-from .dataframe import ConcatDFs, DropColumns
-from .operator import BinaryOperator, Add, Sub, Mul, Div
-from .date import (
-    StringToDatetime,
-    DatetimeDayOfYearSinCos,
-    DatetimeMonthOfYearSinCos,
-    DatetimeDayOfMonthSinCos,
-    DatetimeDayOfWeekSinCos,
-    DatetimeDayOfYear,
-    DatetimeMonthOfYear,
-    DatetimeDayOfMonth,
-    DatetimeDayOfWeek,
-    DatetimeIsWeekend,
-)
-from .na import NdFillSinkHole, FillSinkHole, DropNARow, FillNaWithValue, FillNaFrom
-from .category_encoder import OneHotEncoder, LabelEncoder
-from .wrapper import wrap_df2nd, DF2NDarr
-from .norm import StandardScaler, RobustScaler, MinMaxScaler
 
 __all__ = [
-    "DataEngineType",
-    "DataEngine",
-    "SequentialEngine",
-    "ConcatDFs",
-    "DropColumns",
-    "create_engines_from_config",
-    #
-    "BinaryOperator",
     "Add",
-    "Sub",
-    "Mul",
-    "Div",
-    #
-    "StringToDatetime",
-    "DatetimeDayOfYearSinCos",
-    "DatetimeMonthOfYearSinCos",
+    "BinaryOperator",
+    "ConcatDFs",
+    "DF2NDarr",
+    "DataEngine",
+    "DataEngineType",
+    "DatetimeDayOfMonth",
     "DatetimeDayOfMonthSinCos",
+    "DatetimeDayOfWeek",
     "DatetimeDayOfWeekSinCos",
     "DatetimeDayOfYear",
-    "DatetimeMonthOfYear",
-    "DatetimeDayOfMonth",
-    "DatetimeDayOfWeek",
+    "DatetimeDayOfYearSinCos",
+    "DatetimeFeatures",
     "DatetimeIsWeekend",
-    #
-    "NdFillSinkHole",
-    "FillSinkHole",
+    "DatetimeMonthOfYear",
+    "DatetimeMonthOfYearSinCos",
+    "Div",
+    "Downcast",
+    "DropColumns",
     "DropNARow",
-    "FillNaWithValue",
+    "DtypePolicy",
+    "EngineHook",
+    "Expr",
+    "FillGaps",
     "FillNaFrom",
-    #
-    "OneHotEncoder",
+    "FillNaWithValue",
+    "FillSinkHole",
     "LabelEncoder",
-    #
-    "wrap_df2nd",
-    "DF2NDarr",
-    #
-    "StandardScaler",
-    "RobustScaler",
     "MinMaxScaler",
+    "Mul",
+    "NdDatetimeFeatures",
+    "NdFillGaps",
+    "NdFillSinkHole",
+    "OneHotEncoder",
+    "Profiler",
+    "RobustScaler",
+    "SequentialEngine",
+    "StandardScaler",
+    "StringToDatetime",
+    "Sub",
+    "create_engines_from_config",
+    "fill_nan_runs",
+    "profile",
+    "wrap_df2nd",
 ]
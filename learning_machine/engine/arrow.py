@@ -0,0 +1,103 @@
+"""Arrow-backed columns (pd.ArrowDtype), e.g. from ``pd.read_parquet(path, dtype_backend="pyarrow")``.
+
+Engines read arrow columns as NumPy views where the type allows it, and write in-place results back
+as arrow columns. pyarrow is imported only when arrow columns are met, so it stays optional.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+_NAT = np.iinfo(np.int64).min
+
+
+def is_arrow(values: Any) -> bool:
+    """Whether values (series or array) are arrow-backed."""
+    return isinstance(getattr(values, "dtype", None), pd.ArrowDtype)
+
+
+def _chunked(series: pd.Series):
+    """pyarrow ChunkedArray of arrow-backed series, without copy."""
+    return series.array.__arrow_array__()
+
+
+def _to_numpy(chunked) -> np.ndarray:
+    # a single chunk of fixed width values without nulls is viewed without copy
+    if chunked.num_chunks == 1:
+        return chunked.chunk(0).to_numpy(zero_copy_only=False)
+    return chunked.to_numpy()
+
+
+def numeric_values(series: pd.Series) -> np.ndarray:
+    """NumPy values of numeric column. Nulls of arrow columns become nan.
+
+    Args:
+        series (pd.Series): numeric column
+
+    Returns:
+        np.ndarray: values, a view of arrow buffer if the column has no nulls
+    """
+    if not is_arrow(series):
+        return series.to_numpy()
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    chunked = _chunked(series)
+    if chunked.null_count:
+        chunked = pc.fill_null(chunked.cast(pa.float64()), np.nan)
+    return _to_numpy(chunked)
+
+
+def datetime_values(series: pd.Series) -> np.ndarray:
+    """datetime64 values of arrow timestamp or date column, in local time if timezone aware. Nulls become NaT.
+
+    Args:
+        series (pd.Series): arrow-backed datetime column
+
+    Returns:
+        np.ndarray: datetime64 values
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    chunked = _chunked(series)
+    if pa.types.is_date(chunked.type):
+        chunked = chunked.cast(pa.timestamp("s"))
+    if not pa.types.is_timestamp(chunked.type):
+        return numeric_values(series)
+    unit = chunked.type.unit
+    if chunked.type.tz is not None:
+        chunked = pc.local_timestamp(chunked)
+    ints = chunked.cast(pa.int64())
+    if ints.null_count:
+        ints = pc.fill_null(ints, _NAT)
+    return _to_numpy(ints).view(f"M8[{unit}]")
+
+
+def operand(series: pd.Series) -> Any:
+    """Values of column for arithmetic. Arrow columns stay arrow arrays and are computed with pyarrow.compute."""
+    if is_arrow(series):
+        return series.array
+    return series.to_numpy()
+
+
+def like(values: np.ndarray, series: pd.Series) -> Any:
+    """Values with the backend of series, to replace the column in place.
+    nan of float results become nulls of arrow columns, like the nulls they are computed from.
+
+    Args:
+        values (np.ndarray): new values
+        series (pd.Series): column replaced by the values
+
+    Returns:
+        Any: values, or arrow-backed array if the column is arrow-backed
+    """
+    if not is_arrow(series):
+        return values
+    import pyarrow as pa
+
+    array = pa.array(values, from_pandas=values.dtype.kind == "f")
+    return pd.arrays.ArrowExtensionArray(array)
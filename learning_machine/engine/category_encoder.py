@@ -1,64 +1,328 @@
-import sklearn.preprocessing as skp
-from scipy.sparse import csr_matrix
+from typing import ClassVar
+
 import numpy as np
 import pandas as pd
-from .engine import DataEngine
+
 from learning_machine.zoo import DATA_ENGINE_ZOO
 
+from .compiled import lookup_key
+from .engine import DataEngine, Kernel
+from .engine_type import DataEngineType
+from .state import pack_values, unpack_values
+
 
 @DATA_ENGINE_ZOO.regist()
 class OneHotEncoder(DataEngine):
     """Onehot encoder from scikit-learn. return columns {prefix}_{col}."""
 
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.RETURN_NEW_PD]
+
     def __init__(self, cols: list[str], prefix: str = "onehot", sparse_output=False):
         """
         Args:
             cols (list[str]): list of columns need encoding
             prefix (str, optional): return column prefix. Defaults to "onehot".
-            sparse_output (bool, optional): return sparse matrix. Ref scikit-learn. Defaults to False.
+            sparse_output (bool, optional): return pandas sparse dataframe. One hot values are never densified, use `data.sparse.to_coo()` to get a scipy sparse matrix. Defaults to False.
         """
         self.cols = cols
         self.prefix = prefix
+        self.sparse_output = sparse_output
+        # scikit-learn is imported only when OneHotEncoder is used
+        import sklearn.preprocessing as skp
+
         self.enc = skp.OneHotEncoder(sparse_output=sparse_output)
         self.is_fit = False
+        # distinct values of each column seen by partial_fit
+        self._seen: list[pd.Series] = []
+
+    def is_fitted(self) -> bool:
+        return self.is_fit
+
+    def get_state(self) -> dict[str, np.ndarray]:
+        if not self.is_fit:
+            return {}
+        state = {}
+        for i, categories in enumerate(self.enc.categories_):
+            state.update(pack_values(f"categories_{i}", categories))
+        return state
+
+    def set_state(self, state: dict[str, np.ndarray]) -> None:
+        categories = [
+            unpack_values(state, f"categories_{i}") for i in range(len(self.cols))
+        ]
+        import sklearn.preprocessing as skp
+
+        self.enc = skp.OneHotEncoder(
+            categories=categories,  # type: ignore
+            sparse_output=self.sparse_output,
+        )
+        # with explicit categories, fitting one row of known categories only validates them
+        self.enc.fit(np.array([[c[0] for c in categories]], dtype=object))
+        self.is_fit = True
+
+    def output_columns(self) -> list[str] | None:
+        if not self.is_fit:
+            return None
+        return [f"{self.prefix}_{col}" for col in np.concatenate(self.enc.categories_)]
+
+    def partial_fit(self, data: pd.DataFrame) -> None:
+        """Update categories with a batch of data.
+        Distinct values of all batches are kept, so categories match fitting all batches at once.
+
+        Args:
+            data (pd.DataFrame): batch of data
+        """
+        if len(data) == 0:
+            return
+        batch = [data[col].drop_duplicates() for col in self.cols]
+        if self._seen:
+            batch = [
+                pd.concat([seen, values]).drop_duplicates()
+                for seen, values in zip(self._seen, batch)
+            ]
+        self._seen = batch
+
+        # pad columns with their last value, so distinct values of all columns fit in one frame
+        n_rows = max(len(values) for values in self._seen)
+        pad = np.arange(n_rows)
+        distinct = pd.DataFrame(
+            {
+                i: values.iloc[np.minimum(pad, len(values) - 1)].to_numpy()
+                for i, values in enumerate(self._seen)
+            }
+        )
+        self.enc.fit(distinct.to_numpy())
+        self.is_fit = True
 
     def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
+        from scipy.sparse import issparse
+
         arr = data[self.cols].to_numpy()
+        # dense one hot values are allocated with the float dtype of the dtype policy
+        self.enc.set_params(dtype=self.dtype_policy.float_dtype())
         if not self.is_fit:
             one_hot = self.enc.fit_transform(arr)
             self.is_fit = True
         else:
             one_hot = self.enc.transform(arr)  # type: ignore
-            if isinstance(one_hot, csr_matrix):
-                one_hot = one_hot.toarray()
 
         col_names = np.concatenate(self.enc.categories_)
         col_names = [f"{self.prefix}_{col}" for col in col_names]
 
+        if issparse(one_hot):
+            # keep one hot columns sparse, ConcatDFs and SequentialEngine pass them through as is.
+            # sparse dtype of integers has 0 as fill value
+            return pd.DataFrame.sparse.from_spmatrix(
+                one_hot.astype(np.uint8), index=data.index, columns=col_names
+            )
         return pd.DataFrame(one_hot, columns=col_names, index=data.index)  # type: ignore
 
+    def compile_step(self) -> Kernel:
+        # position of each category among the output columns
+        lookups = []
+        start = 0
+        for categories in self.enc.categories_:
+            lookups.append(
+                {lookup_key(c): start + i for i, c in enumerate(categories.tolist())}
+            )
+            start += len(categories)
+        col_names = self.output_columns()
+        dtype = self.dtype_policy.float_dtype()
+
+        def kernel(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+            n_rows = len(columns[self.cols[0]])
+            one_hot = np.zeros((n_rows, len(col_names)), dtype=dtype)
+            rows = np.arange(n_rows)
+            for col, lookup in zip(self.cols, lookups):
+                try:
+                    pos = [lookup[lookup_key(v)] for v in columns[col].tolist()]
+                except KeyError as e:
+                    raise ValueError(
+                        f"Found unknown categories {e.args[0]} in column {col}"
+                    ) from None
+                one_hot[rows, pos] = 1
+            return dict(zip(col_names, one_hot.T))  # type: ignore
+
+        return kernel
+
 
 @DATA_ENGINE_ZOO.regist()
 class LabelEncoder(DataEngine):
-    """Label encoder from scikit-learn. return column {prefix}_{col}."""
+    """Encode labels with hash table lookup. return int32 column {prefix}_{col}, or the int dtype of the dtype policy.
+
+    Classes are sorted, so codes are the same as scikit-learn LabelEncoder. With min_frequency,
+    infrequent classes share the code len(classes).
+    """
+
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.RETURN_NEW_PD]
 
-    def __init__(self, col: str, prefix: str = "label"):
+    def __init__(
+        self,
+        col: str,
+        prefix: str = "label",
+        unknown_value: int = -1,
+        min_frequency: float | None = None,
+    ):
         """
         Args:
             col (str): column name
             prefix (str, optional): return column prefix. Defaults to "label".
+            unknown_value (int, optional): code of values not seen in fit. Defaults to -1.
+            min_frequency (float | None, optional): classes appearing less than min_frequency times (int), or in less than min_frequency fraction of rows (float), are encoded as one "other" class. If None, every class has its own code. Defaults to None.
         """
         self.col = col
         self.prefix = prefix
-        self.enc = skp.LabelEncoder()
+        self.unknown_value = unknown_value
+        self.min_frequency = min_frequency
+        self.classes = np.empty(0, dtype=object)
+        self.infrequent = np.empty(0, dtype=object)
         self.is_fit = False
+        self._lookup: pd.Index | None = None
+        self._codes = np.empty(0, dtype=np.int32)
+        # sorted distinct values seen in fit, their counts and the number of rows
+        self._seen = np.empty(0, dtype=object)
+        self._seen_counts = np.empty(0, dtype=np.int64)
+        self._seen_rows = 0
+
+    def is_fitted(self) -> bool:
+        return self.is_fit
+
+    def get_state(self) -> dict[str, np.ndarray]:
+        if not self.is_fit:
+            return {}
+        state = pack_values("classes", self.classes)
+        if len(self.infrequent):
+            state.update(pack_values("infrequent", self.infrequent))
+        return state
+
+    def set_state(self, state: dict[str, np.ndarray]) -> None:
+        self.classes = unpack_values(state, "classes")
+        self.infrequent = np.empty(0, dtype=object)
+        if "infrequent" in state:
+            self.infrequent = unpack_values(state, "infrequent")
+        self._build_lookup()
+        self.is_fit = True
+
+    def output_columns(self) -> list[str]:
+        return [f"{self.prefix}_{self.col}"]
+
+    def _build_lookup(self) -> None:
+        """Hash index of every class seen in fit, and the code of each entry."""
+        n_classes = len(self.classes)
+        self._lookup = pd.Index(
+            np.concatenate([self.classes, self.infrequent]), dtype=object
+        )
+        self._codes = np.concatenate(
+            [
+                np.arange(n_classes, dtype=np.int32),
+                np.full(len(self.infrequent), n_classes, dtype=np.int32),
+            ]
+        )
+
+    def _label_dtype(self) -> np.dtype:
+        n_classes = len(self.classes)
+        low = min(self.unknown_value, 0)
+        return self.dtype_policy.int_dtype(
+            low, max(self.unknown_value, n_classes), "int32"
+        )
+
+    def _set_classes(
+        self, uniques: np.ndarray, counts: np.ndarray, n_rows: int
+    ) -> np.ndarray:
+        """Set classes from sorted distinct values and their counts.
+
+        Returns:
+            np.ndarray: mask of frequent values
+        """
+        self._seen, self._seen_counts, self._seen_rows = uniques, counts, n_rows
+        frequent = np.ones(len(uniques), dtype=bool)
+        if self.min_frequency is not None:
+            threshold = self.min_frequency
+            if isinstance(threshold, float):
+                threshold = threshold * n_rows
+            frequent = counts >= threshold
+
+        self.classes = uniques[frequent]
+        self.infrequent = uniques[~frequent]
+        self._build_lookup()
+        return frequent
+
+    def partial_fit(self, data: pd.DataFrame) -> None:
+        """Update classes with a batch of data.
+        Counts of classes are accumulated, so classes and min_frequency match fitting all batches at once.
+
+        Args:
+            data (pd.DataFrame): batch of data
+        """
+        arr = data[self.col].to_numpy()
+        codes, uniques = pd.factorize(arr, use_na_sentinel=False)
+        counts = np.bincount(codes, minlength=len(uniques))
+
+        # merge with distinct values of previous batches, and sort them again
+        values = np.concatenate([self._seen, np.asarray(uniques, dtype=object)])
+        codes, uniques = pd.factorize(values, sort=True, use_na_sentinel=False)
+        counts = np.bincount(
+            codes,
+            weights=np.concatenate([self._seen_counts, counts]),
+            minlength=len(uniques),
+        ).astype(np.int64)
+        self._set_classes(
+            np.asarray(uniques, dtype=object), counts, self._seen_rows + len(arr)
+        )
+        self.is_fit = True
+
+    def _fit_transform(self, arr: np.ndarray) -> np.ndarray:
+        codes, uniques = pd.factorize(arr, sort=True, use_na_sentinel=False)
+        frequent = self._set_classes(
+            np.asarray(uniques, dtype=object),
+            np.bincount(codes, minlength=len(uniques)),
+            len(arr),
+        )
+
+        # codes of sorted uniques to codes of frequent classes, infrequent to other
+        remap = np.full(len(uniques), len(self.classes), dtype=self._label_dtype())
+        remap[frequent] = np.arange(len(self.classes))
+        return remap[codes]
+
+    def _transform(self, arr: np.ndarray) -> np.ndarray:
+        if self._lookup is None:
+            self._build_lookup()
+        if len(self._codes) == 0:
+            # fitted on empty data, every value is unknown
+            return np.full(len(arr), self.unknown_value, dtype=self._label_dtype())
+        pos = self._lookup.get_indexer(arr)  # type: ignore
+        label = self._codes.astype(self._label_dtype(), copy=False).take(pos)
+        label[pos < 0] = self.unknown_value
+        return label
 
     def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
         arr = data[self.col].to_numpy()
         if not self.is_fit:
-            label = self.enc.fit_transform(arr)
+            label = self._fit_transform(arr)
             self.is_fit = True
         else:
-            label = self.enc.transform(arr)
+            label = self._transform(arr)
+
+        return pd.DataFrame({f"{self.prefix}_{self.col}": label}, index=data.index)
+
+    def compile_step(self) -> Kernel:
+        if self._lookup is None:
+            self._build_lookup()
+        lookup = {
+            lookup_key(c): code
+            for c, code in zip(self._lookup.tolist(), self._codes.tolist())  # type: ignore
+        }
+        unknown_value = self.unknown_value
+        name = f"{self.prefix}_{self.col}"
+        dtype = self._label_dtype()
+
+        def kernel(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+            values = columns[self.col].tolist()
+            label = np.fromiter(
+                (lookup.get(lookup_key(v), unknown_value) for v in values),
+                dtype=dtype,
+                count=len(values),
+            )
+            return {name: label}
 
-        return pd.DataFrame({f"{self.prefix}_{self.col}": label})
+        return kernel
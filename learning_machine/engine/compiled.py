@@ -0,0 +1,148 @@
+"""Transform of fitted engines over dict records, compiled by SequentialEngine.compile."""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Any
+
+import numpy as np
+
+from .engine import Kernel
+
+
+class _NA:
+    """Lookup key of missing values, since nan is not equal to itself."""
+
+
+NA_KEY = _NA()
+
+
+def _is_na(value: Any) -> bool:
+    """Whether value is None, nan or NaT, the only values not equal to themselves."""
+    return value is None or value != value  # noqa: PLR0124
+
+
+def lookup_key(value: Any) -> Any:
+    """Hashable key of a value for dict lookups. None and nan share NA_KEY."""
+    if _is_na(value):
+        return NA_KEY
+    return value
+
+
+def isna(arr: np.ndarray) -> np.ndarray:
+    """Missing value mask of 1D array of any dtype.
+
+    Args:
+        arr (np.ndarray): values
+
+    Returns:
+        np.ndarray: bool mask
+    """
+    if arr.dtype.kind in "fc":
+        return np.isnan(arr)
+    if arr.dtype.kind in "mM":
+        return np.isnat(arr)
+    if arr.dtype == object:
+        return np.fromiter((_is_na(v) for v in arr), dtype=bool, count=len(arr))
+    return np.zeros(len(arr), dtype=bool)
+
+
+def _to_datetime64(value: Any) -> np.datetime64:
+    if _is_na(value):
+        return np.datetime64("NaT", "ns")
+    if getattr(value, "tzinfo", None) is not None:
+        raise ValueError("compile does not support timezone aware datetime")
+    if hasattr(value, "to_datetime64"):
+        # pd.Timestamp, keeps nanoseconds
+        return value.to_datetime64()
+    return np.datetime64(value, "ns")
+
+
+def _to_array(values: list) -> np.ndarray:
+    arr = np.array(values)
+    if arr.dtype.kind not in "OU" or all(isinstance(v, str) for v in values):
+        return arr
+    if any(isinstance(v, (date, np.datetime64)) for v in values):
+        # datetime.datetime, datetime.date or pd.Timestamp, with None or NaT of missing values
+        return np.array([_to_datetime64(v) for v in values], dtype="M8[ns]")
+    # strings with missing values, or None of missing numbers
+    arr = np.array(values, dtype=object)
+    try:
+        return arr.astype(np.float64)
+    except (TypeError, ValueError):
+        return arr
+
+
+def records_to_columns(records: dict | list[dict]) -> dict[str, np.ndarray]:
+    """Convert a record or list of records into columns {name: 1D array}.
+
+    Args:
+        records (dict | list[dict]): record {column: value}, or records with the same keys
+
+    Returns:
+        dict[str, np.ndarray]: columns
+    """
+    if isinstance(records, dict):
+        return {name: _to_array([value]) for name, value in records.items()}
+    if not records:
+        raise ValueError("records are empty")
+    return {
+        name: _to_array([record[name] for record in records]) for name in records[0]
+    }
+
+
+class CompiledEngine:
+    """Fitted engines compiled into a transform over dict records. pandas is not used on the transform path.
+
+    The output column order is fixed by the first call and kept for later calls.
+    """
+
+    def __init__(self, kernels: list[Kernel]):
+        """
+        Args:
+            kernels (list[Kernel]): kernels of engines applied sequentially
+        """
+        self.kernels = kernels
+        self.columns: list[str] | None = None
+        """output column order, set by the first call"""
+
+    def transform_columns(
+        self, columns: dict[str, np.ndarray]
+    ) -> dict[str, np.ndarray]:
+        """Apply the kernels to columns.
+
+        Args:
+            columns (dict[str, np.ndarray]): columns {name: 1D array}
+
+        Returns:
+            dict[str, np.ndarray]: output columns
+        """
+        for kernel in self.kernels:
+            columns = kernel(columns)
+        return columns
+
+    def __call__(
+        self, records: dict | list[dict], dtype: str = "float64"
+    ) -> np.ndarray:
+        """Transform records into features.
+
+        Args:
+            records (dict | list[dict]): record {column: value}, or list of records
+            dtype (str, optional): dtype of features. Defaults to "float64".
+
+        Returns:
+            np.ndarray: feature vector of a record, or matrix with one row per record
+        """
+        columns = self.transform_columns(records_to_columns(records))
+        if self.columns is None:
+            self.columns = list(columns)
+
+        n_rows = len(next(iter(columns.values()))) if columns else 0
+        features = np.empty((n_rows, len(self.columns)), dtype=dtype)
+        for i, name in enumerate(self.columns):
+            features[:, i] = columns[name]
+        if isinstance(records, dict):
+            if n_rows == 0:
+                raise ValueError("the record is dropped by the engines")
+            return features[0]
+        return features
@@ -1,29 +1,126 @@
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-from learning_machine.engine import DataEngine, create_engines_from_config
+from typing import TYPE_CHECKING
+from .engine import DataEngine, HookedEngines, Kernel, create_engines_from_config
 from learning_machine.zoo.zoo import DATA_ENGINE_ZOO
 
+if TYPE_CHECKING:
+    import numpy as np
+
+    from .dtype import DtypePolicy
+
 
 @DATA_ENGINE_ZOO.regist()
-class ConcatDFs(DataEngine):
+class ConcatDFs(HookedEngines, DataEngine):
     """Concat the outputs of the engines into pd.Dataframe"""
 
-    def __init__(self, engines: list[DataEngine]):
+    def __init__(self, engines: list[DataEngine], workers: int | None = None):
         """
         Args:
             engines (list[DataEngine]): engines
+            workers (int | None, optional): run engines on a thread pool with this many threads. Engines share the input dataframe, so they must not modify it. If None, run engines one at a time. Defaults to None.
         """
         super().__init__()
         self.engines = engines
+        self.workers = workers
+
+    def _run(self, i: int, data: pd.DataFrame) -> pd.DataFrame:
+        engine = self.engines[i]
+        if self.hooks:
+            return self._call_hooked(i, engine, data)
+        return engine(data)
 
     def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
-        datas = []
-        for engine in self.engines:
-            datas.append(engine(data))
+        if self.workers and self.workers > 1 and len(self.engines) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                # map keeps the order of engines
+                datas = list(
+                    executor.map(lambda i: self._run(i, data), range(len(self.engines)))
+                )
+        else:
+            datas = []
+            for i in range(len(self.engines)):
+                datas.append(self._run(i, data))
         return pd.concat([data] + datas, axis=1)
 
+    def is_fitted(self) -> bool:
+        return all(engine.is_fitted() for engine in self.engines)
+
+    def set_dtype_policy(self, policy: DtypePolicy) -> None:
+        self.dtype_policy = policy
+        for engine in self.engines:
+            engine.set_dtype_policy(policy)
+
+    def row_context(self) -> int | None:
+        contexts = [engine.row_context() for engine in self.engines]
+        if any(context is None for context in contexts):
+            return None
+        return max(contexts, default=0)  # type: ignore
+
+    def compile_step(self) -> Kernel | None:
+        kernels = [engine.compile_step() for engine in self.engines]
+        if any(kernel is None for kernel in kernels):
+            return None
+
+        def kernel(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+            concat = dict(columns)
+            for step in kernels:
+                concat.update(step(columns))  # type: ignore
+            return concat
+
+        return kernel
+
+    def input_columns(self) -> list[str] | None:
+        columns = []
+        for engine in self.engines:
+            cols = engine.input_columns()
+            if cols is None:
+                return None
+            columns.extend(cols)
+        return list(dict.fromkeys(columns))
+
+    def required_columns(self) -> list[str] | None:
+        columns = []
+        for engine in self.engines:
+            cols = engine.required_columns()
+            if cols is None:
+                return None
+            columns.extend(cols)
+        return list(dict.fromkeys(columns))
+
+    def input_dtypes(self) -> dict[str, str]:
+        # engines share the input, a dtype holds only if every engine reading the column declares it
+        dtypes: dict[str, str] = {}
+        conflicts = set()
+        for engine in self.engines:
+            declared = engine.input_dtypes()
+            for col in engine.required_columns() or []:
+                if (
+                    col not in declared
+                    or dtypes.get(col, declared[col]) != declared[col]
+                ):
+                    conflicts.add(col)
+                else:
+                    dtypes[col] = declared[col]
+        return {col: dtype for col, dtype in dtypes.items() if col not in conflicts}
+
+    def output_columns(self) -> list[str] | None:
+        columns = []
+        for engine in self.engines:
+            cols = engine.output_columns()
+            if cols is None:
+                return None
+            columns.extend(cols)
+        return columns
+
     @classmethod
-    def from_config(cls, config: list) -> ConcatDFs:
+    def from_config(cls, config: list | dict) -> ConcatDFs:
+        """Create engine from list of engines config, or {engines: [...], workers: int}."""
+        if isinstance(config, dict):
+            config = dict(config)
+            engines = create_engines_from_config(config.pop("engines"))
+            return cls(engines, **config)
         engines = create_engines_from_config(config)
         return cls(engines)
 
@@ -41,11 +138,31 @@ class DropColumns(DataEngine):
         self.drop_cols = cols
         self.copy = copy
 
+    def input_columns(self) -> list[str]:
+        return []
+
+    def required_columns(self) -> list[str]:
+        return list(self.drop_cols)
+
+    def output_columns(self) -> list[str]:
+        return list(self.drop_cols)
+
     def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
         if self.copy:
             data = data.copy()
+        return self.call_owned(data)
 
+    def call_owned(self, data: pd.DataFrame) -> pd.DataFrame:
         for col in self.drop_cols:
             data.pop(col)
 
         return data
+
+    def compile_step(self) -> Kernel:
+        def kernel(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+            columns = dict(columns)
+            for col in self.drop_cols:
+                columns.pop(col)
+            return columns
+
+        return kernel
@@ -1,37 +1,366 @@
-import pandas as pd
+from __future__ import annotations
+
+from abc import abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable
+from datetime import date, datetime
+from functools import cached_property
+from typing import Any, ClassVar
+
 import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from learning_machine.zoo import DATA_ENGINE_ZOO
 
-from .engine import DataEngine
+from .arrow import datetime_values, is_arrow
+from .compiled import isna
+from .engine import DataEngine, Kernel
 from .engine_type import DataEngineType
 from .fourier import sin_cos_transform
-from learning_machine.zoo import DATA_ENGINE_ZOO
+
+_UNITS_PER_DAY = {
+    "D": 1,
+    "h": 24,
+    "m": 24 * 60,
+    "s": 24 * 60 * 60,
+    "ms": 24 * 60 * 60 * 10**3,
+    "us": 24 * 60 * 60 * 10**6,
+    "ns": 24 * 60 * 60 * 10**9,
+}
+_NAT = np.iinfo(np.int64).min
+# parsed strings kept by compiled StringToDatetime without cache_size
+_COMPILED_CACHE_SIZE = 100_000
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# arrays up to this size are decomposed with python dates, e.g. records of compiled engines
+_SMALL_SIZE = 16
+# days before each month in a non-leap year
+_DAYS_BEFORE_MONTH = np.array([0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334])
+_DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+class CalendarFields:
+    """Calendar fields of datetime64 or unix epoch values, computed with integer arithmetic.
+
+    Fields are computed on first access from the number of days since 1970-01-01
+    (civil_from_days of H. Hinnant), without pandas .dt accessor.
+    """
+
+    def __init__(self, values: np.ndarray, unit: str = "s"):
+        """
+        Args:
+            values (np.ndarray): datetime64 values, or int unix epoch values
+            unit (str, optional): unit of int values, one of D, h, m, s, ms, us, ns. datetime64 values use their own unit. Defaults to "s".
+        """
+        values = np.asarray(values)
+        if values.dtype.kind == "M":
+            unit = np.datetime_data(values.dtype)[0]
+            values = values.view(np.int64)
+            self.nat = values == _NAT
+        elif values.dtype.kind in "iu":
+            self.nat = np.zeros(len(values), dtype=bool)
+        else:
+            raise ValueError(
+                f"expect datetime64 or int epoch values, but {values.dtype}"
+            )
+        if unit not in _UNITS_PER_DAY:
+            raise ValueError(
+                f"unsupported unit {unit}. expect one of {list(_UNITS_PER_DAY)}"
+            )
+
+        days = np.floor_divide(values, _UNITS_PER_DAY[unit]).astype(np.int64)
+        days[self.nat] = 0
+        self.days = days
+
+    @cached_property
+    def _civil(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if len(self.days) <= _SMALL_SIZE:
+            # python dates are faster than array arithmetic for a few records
+            try:
+                dates = [
+                    date.fromordinal(d + _EPOCH_ORDINAL) for d in self.days.tolist()
+                ]
+            except (ValueError, OverflowError):
+                pass
+            else:
+                return (
+                    np.array([d.year for d in dates], dtype=np.int64),
+                    np.array([d.month for d in dates], dtype=np.int64),
+                    np.array([d.day for d in dates], dtype=np.int64),
+                )
+
+        z = self.days + 719468
+        era = np.floor_divide(z, 146097)
+        doe = z - era * 146097
+        yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+        day_of_march_year = doe - (365 * yoe + yoe // 4 - yoe // 100)
+        mp = (5 * day_of_march_year + 2) // 153
+        day = day_of_march_year - (153 * mp + 2) // 5 + 1
+        month = np.where(mp < 10, mp + 3, mp - 9)
+        year = yoe + era * 400 + (month <= 2)
+        return year, month, day
+
+    @property
+    def year(self) -> np.ndarray:
+        return self._civil[0]
+
+    @property
+    def month(self) -> np.ndarray:
+        return self._civil[1]
+
+    @property
+    def day(self) -> np.ndarray:
+        return self._civil[2]
+
+    @cached_property
+    def is_leap_year(self) -> np.ndarray:
+        year = self.year
+        return (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+
+    @cached_property
+    def day_of_year(self) -> np.ndarray:
+        month = self.month
+        leap_day = self.is_leap_year & (month > 2)
+        return _DAYS_BEFORE_MONTH[month - 1] + self.day + leap_day
+
+    @cached_property
+    def days_in_year(self) -> np.ndarray:
+        return np.where(self.is_leap_year, 366, 365)
+
+    @cached_property
+    def days_in_month(self) -> np.ndarray:
+        month = self.month
+        return _DAYS_IN_MONTH[month - 1] + (self.is_leap_year & (month == 2))
+
+    @cached_property
+    def day_of_week(self) -> np.ndarray:
+        # 1970-01-01 is thursday, monday is 0
+        return (self.days + 3) % 7
+
+    def raw(
+        self,
+        field: np.ndarray,
+        int_dtype: Any = np.int32,
+        float_dtype: Any = np.float64,
+    ) -> np.ndarray:
+        """Field values as int_dtype, or float_dtype with nan when there is NaT."""
+        if self.nat.any():
+            values = field.astype(float_dtype)
+            values[self.nat] = np.nan
+            return values
+        return field.astype(int_dtype)
+
+    def phase(self, x: np.ndarray) -> np.ndarray:
+        """Float values with nan when there is NaT."""
+        values = x.astype(np.float64)
+        values[self.nat] = np.nan
+        return values
+
+
+def calendar_fields(series: pd.Series, unit: str = "s") -> CalendarFields:
+    """Calendar fields of datetime column. Timezone aware datetimes use their local time.
+
+    Args:
+        series (pd.Series): datetime column, or int unix epoch column. Arrow timestamp columns are read without copy if they have no nulls.
+        unit (str, optional): unit of int epoch column. Defaults to "s".
+
+    Returns:
+        CalendarFields: fields
+    """
+    if is_arrow(series):
+        return CalendarFields(datetime_values(series), unit)
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        series = series.dt.tz_localize(None)
+    return CalendarFields(series.to_numpy(), unit)
+
+
+def _datetime_unit(dtype) -> str:
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        return dtype.unit
+    return np.datetime_data(dtype)[0]
 
 
 @DATA_ENGINE_ZOO.regist()
 class StringToDatetime(DataEngine):
-    """String to pd.datetime object. Replace original string column to datetime object column"""
+    """String to pd.datetime object. Replace original string column to datetime object column.
+
+    Only unique strings are parsed, and the results are broadcast back to the rows, so parsing
+    time grows with the number of distinct strings rather than rows. When format is None, the
+    format is inferred from the first string once and reused for later calls.
+    """
 
-    engine_type = [DataEngineType.SIDE_EFFECT]
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.SIDE_EFFECT]
 
-    def __init__(self, col: str, format: str | None = None):
+    def __init__(
+        self, col: str, format: str | None = None, cache_size: int | None = None
+    ):
         """
         Args:
             col (str): column name
             format (str | None, optional): datetime format. Defaults to None.
+            cache_size (int | None, optional): number of parsed strings kept across calls and chunks, least recently used strings are evicted. If None, parsed strings are not kept. Defaults to None.
         """
         self.col = col
         self.format = format
+        self.cache_size = cache_size
+        self.inferred_format: str | None = None
+        self._cache: OrderedDict[str, int] | None = (
+            OrderedDict() if cache_size else None
+        )
+        self._dtype = None
+
+    def input_dtypes(self) -> dict[str, str]:
+        # e.g. 20240101 is read as int without dtype
+        return {self.col: "str"}
+
+    def _parse(self, strings: np.ndarray) -> np.ndarray:
+        """Parse strings into int64 values of the datetime dtype of the first call."""
+        format = self.format
+        if format is None:
+            if self.inferred_format is None and isinstance(strings[0], str):
+                self.inferred_format = guess_datetime_format(strings[0])
+            format = self.inferred_format
+
+        try:
+            parsed = pd.DatetimeIndex(pd.to_datetime(strings, format=format))
+        except ValueError:
+            if self.format is not None or format is None:
+                raise
+            # strings do not share the inferred format
+            parsed = pd.DatetimeIndex(pd.to_datetime(strings))
+
+        if self._dtype is None:
+            self._dtype = parsed.dtype
+        elif parsed.dtype != self._dtype:
+            parsed = parsed.as_unit(_datetime_unit(self._dtype))
+            if parsed.tz is not None:
+                parsed = parsed.tz_convert(self._dtype.tz)
+        return parsed.asi8
+
+    def _parse_records(self, strings: np.ndarray) -> np.ndarray:
+        """Parse a few strings with datetime.strptime instead of pandas, e.g. records of compiled engines."""
+        format = self.format or self.inferred_format
+        dtype = self._dtype
+        if format is None or (dtype is not None and getattr(dtype, "tz", None)):
+            return self._parse(strings)
+        unit = "ns" if dtype is None else _datetime_unit(dtype)
+        try:
+            return np.array(
+                [np.datetime64(datetime.strptime(s, format), unit) for s in strings]
+            ).view(np.int64)
+        except (TypeError, ValueError):
+            # strings do not share the format, or the format has a timezone
+            return self._parse(strings)
+
+    def _parse_cached(
+        self,
+        strings: np.ndarray,
+        cache: OrderedDict[str, int],
+        cache_size: int,
+        parse: Callable[[np.ndarray], np.ndarray] | None = None,
+    ) -> np.ndarray:
+        values = np.empty(len(strings), dtype=np.int64)
+        missing = []
+        for i, string in enumerate(strings):
+            value = cache.get(string)
+            if value is None:
+                missing.append(i)
+            else:
+                values[i] = value
+                cache.move_to_end(string)
+
+        if missing:
+            parsed = (parse or self._parse)(strings[missing])
+            values[missing] = parsed
+            cache.update(zip(strings[missing], parsed.tolist()))
+            while len(cache) > cache_size:
+                cache.popitem(last=False)
+        return values
 
     def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
-        data[self.col] = pd.to_datetime(data[self.col], format=self.format)
+        series = data[self.col]
+        if series.dtype.kind == "M" or isinstance(series.dtype, pd.DatetimeTZDtype):
+            return data
+
+        codes, uniques = pd.factorize(series)
+        uniques = np.asarray(uniques, dtype=object)
+        if len(uniques) == 0:
+            data[self.col] = pd.to_datetime(series, format=self.format)
+            return data
+
+        if self._cache is not None:
+            values = self._parse_cached(uniques, self._cache, self.cache_size)  # type: ignore
+        else:
+            values = self._parse(uniques)
+        # code -1 of missing values picks NaT at the end
+        values = np.append(values, _NAT)[codes]
+
+        dtype = self._dtype
+        parsed = pd.Series(
+            values.view(f"M8[{_datetime_unit(dtype)}]"), index=data.index, copy=False
+        )
+        if getattr(dtype, "tz", None) is not None:
+            parsed = parsed.dt.tz_localize("UTC").dt.tz_convert(dtype.tz)
+        data[self.col] = parsed
         return data
 
+    def compile_step(self) -> Kernel:
+        # strings are looked up in the cache, unseen strings are parsed with the format of fit
+        cache = self._cache if self._cache is not None else OrderedDict()
+        cache_size = self.cache_size or _COMPILED_CACHE_SIZE
+
+        def kernel(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+            arr = columns[self.col]
+            if arr.dtype.kind == "M":
+                return columns
+            present = ~isna(arr)
+            values = np.full(len(arr), _NAT, dtype=np.int64)
+            if present.any():
+                values[present] = self._parse_cached(
+                    arr[present], cache, cache_size, self._parse_records
+                )
+            dtype = self._dtype
+            if dtype is None:
+                columns[self.col] = values.view("M8[ns]")
+                return columns
+            if getattr(dtype, "tz", None) is not None:
+                raise ValueError("compile does not support timezone aware datetime")
+            columns[self.col] = values.view(f"M8[{_datetime_unit(dtype)}]")
+            return columns
+
+        return kernel
+
+
+class _DatetimeEngine(DataEngine):
+    """Engine computing features of datetime column col from its calendar fields."""
+
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.RETURN_NEW_PD]
+    col: str
+
+    @abstractmethod
+    def _features(self, fields: CalendarFields) -> dict[str, np.ndarray]:
+        """Feature columns of the calendar fields of col."""
+
+    def _raw(self, fields: CalendarFields, field: np.ndarray, high: int) -> np.ndarray:
+        """Values of field in [0, high] with the dtypes of the dtype policy."""
+        policy = self.dtype_policy
+        return fields.raw(
+            field, policy.int_dtype(0, high, "int32"), policy.float_dtype()
+        )
+
+    def compile_step(self) -> Kernel:
+        return lambda columns: self._features(CalendarFields(columns[self.col]))
+
+    def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
+        fields = calendar_fields(data[self.col])
+        return pd.DataFrame(self._features(fields), index=data.index)
+
 
 @DATA_ENGINE_ZOO.regist()
-class DatetimeDayOfYearSinCos(DataEngine):
+class DatetimeDayOfYearSinCos(_DatetimeEngine):
     """Periodically transforms the day of year. Return 2 column {prefix}_{col}_sin/cos."""
 
-    engine_type = [DataEngineType.RETURN_NEW_PD]
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.RETURN_NEW_PD]
 
     def __init__(self, col: str, prefix="day_of_year"):
         """
@@ -42,24 +371,23 @@ class DatetimeDayOfYearSinCos(DataEngine):
         self.col = col
         self.prefix = prefix
 
-    def __call__(self, data: pd.DataFrame):
-        day_of_year = data[self.col].dt.dayofyear.to_numpy().astype(np.float64)
-        day_of_year /= data[self.col].dt.is_leap_year.map({True: 366, False: 365})
-        sinx, cosx = sin_cos_transform(day_of_year, 1)
-        return pd.DataFrame(
-            {
-                f"{self.prefix}_{self.col}_sin": sinx,
-                f"{self.prefix}_{self.col}_cos": cosx,
-            },
-            index=data.index,
-        )
+    def output_columns(self) -> list[str]:
+        return [f"{self.prefix}_{self.col}_sin", f"{self.prefix}_{self.col}_cos"]
+
+    def _features(self, fields: CalendarFields) -> dict[str, np.ndarray]:
+        day_of_year = fields.phase(fields.day_of_year) / fields.days_in_year
+        sinx, cosx = sin_cos_transform(day_of_year, 1, self.dtype_policy.float_dtype())
+        return {
+            f"{self.prefix}_{self.col}_sin": sinx,
+            f"{self.prefix}_{self.col}_cos": cosx,
+        }
 
 
 @DATA_ENGINE_ZOO.regist()
-class DatetimeDayOfYear(DataEngine):
+class DatetimeDayOfYear(_DatetimeEngine):
     """Get day of year from datetime column. Return {prefix}_{col}."""
 
-    engine_type = [DataEngineType.RETURN_NEW_PD]
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.RETURN_NEW_PD]
 
     def __init__(self, col: str, prefix="day_of_year"):
         """
@@ -70,21 +398,21 @@ class DatetimeDayOfYear(DataEngine):
         self.col = col
         self.prefix = prefix
 
-    def __call__(self, data: pd.DataFrame):
-        day_of_year = data[self.col].dt.dayofyear.to_numpy()
-        return pd.DataFrame(
-            {
-                f"{self.prefix}_{self.col}": day_of_year,
-            },
-            index=data.index,
-        )
+    def output_columns(self) -> list[str]:
+        return [f"{self.prefix}_{self.col}"]
+
+    def _features(self, fields: CalendarFields) -> dict[str, np.ndarray]:
+        day_of_year = self._raw(fields, fields.day_of_year, 366)
+        return {
+            f"{self.prefix}_{self.col}": day_of_year,
+        }
 
 
 @DATA_ENGINE_ZOO.regist()
-class DatetimeMonthOfYear(DataEngine):
+class DatetimeMonthOfYear(_DatetimeEngine):
     """Get month of year from datetime column. Return {prefix}_{col}."""
 
-    engine_type = [DataEngineType.RETURN_NEW_PD]
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.RETURN_NEW_PD]
 
     def __init__(self, col: str, prefix="month_of_year"):
         """
@@ -95,21 +423,21 @@ class DatetimeMonthOfYear(DataEngine):
         self.col = col
         self.prefix = prefix
 
-    def __call__(self, data: pd.DataFrame):
-        month_of_year = data[self.col].dt.month.to_numpy()
-        return pd.DataFrame(
-            {
-                f"{self.prefix}_{self.col}": month_of_year,
-            },
-            index=data.index,
-        )
+    def output_columns(self) -> list[str]:
+        return [f"{self.prefix}_{self.col}"]
+
+    def _features(self, fields: CalendarFields) -> dict[str, np.ndarray]:
+        month_of_year = self._raw(fields, fields.month, 12)
+        return {
+            f"{self.prefix}_{self.col}": month_of_year,
+        }
 
 
 @DATA_ENGINE_ZOO.regist()
-class DatetimeMonthOfYearSinCos(DataEngine):
+class DatetimeMonthOfYearSinCos(_DatetimeEngine):
     """Periodically transform the month of year. Return 2 column {prefix}_{col}_sin/cos"""
 
-    engine_type = [DataEngineType.RETURN_NEW_PD]
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.RETURN_NEW_PD]
 
     def __init__(self, col: str, prefix="month_of_year"):
         """
@@ -120,23 +448,25 @@ class DatetimeMonthOfYearSinCos(DataEngine):
         self.col = col
         self.prefix = prefix
 
-    def __call__(self, data: pd.DataFrame):
-        month_of_year = data[self.col].dt.month.to_numpy().astype(np.float64)
-        sinx, cosx = sin_cos_transform(month_of_year, 12)
-        return pd.DataFrame(
-            {
-                f"{self.prefix}_{self.col}_sin": sinx,
-                f"{self.prefix}_{self.col}_cos": cosx,
-            },
-            index=data.index,
+    def output_columns(self) -> list[str]:
+        return [f"{self.prefix}_{self.col}_sin", f"{self.prefix}_{self.col}_cos"]
+
+    def _features(self, fields: CalendarFields) -> dict[str, np.ndarray]:
+        month_of_year = fields.phase(fields.month)
+        sinx, cosx = sin_cos_transform(
+            month_of_year, 12, self.dtype_policy.float_dtype()
         )
+        return {
+            f"{self.prefix}_{self.col}_sin": sinx,
+            f"{self.prefix}_{self.col}_cos": cosx,
+        }
 
 
 @DATA_ENGINE_ZOO.regist()
-class DatetimeDayOfMonth(DataEngine):
+class DatetimeDayOfMonth(_DatetimeEngine):
     """Get day of month from datetime column. Return {prefix}_{col}."""
 
-    engine_type = [DataEngineType.RETURN_NEW_PD]
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.RETURN_NEW_PD]
 
     def __init__(self, col: str, prefix="day_of_month"):
         """
@@ -147,21 +477,21 @@ class DatetimeDayOfMonth(DataEngine):
         self.col = col
         self.prefix = prefix
 
-    def __call__(self, data: pd.DataFrame):
-        day_of_month = data[self.col].dt.day.to_numpy()
-        return pd.DataFrame(
-            {
-                f"{self.prefix}_{self.col}": day_of_month,
-            },
-            index=data.index,
-        )
+    def output_columns(self) -> list[str]:
+        return [f"{self.prefix}_{self.col}"]
+
+    def _features(self, fields: CalendarFields) -> dict[str, np.ndarray]:
+        day_of_month = self._raw(fields, fields.day, 31)
+        return {
+            f"{self.prefix}_{self.col}": day_of_month,
+        }
 
 
 @DATA_ENGINE_ZOO.regist()
-class DatetimeDayOfMonthSinCos(DataEngine):
+class DatetimeDayOfMonthSinCos(_DatetimeEngine):
     """Periodically transform the day of month. Return 2 column {prefix}_{col}_sin/cos."""
 
-    engine_type = [DataEngineType.RETURN_NEW_PD]
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.RETURN_NEW_PD]
 
     def __init__(self, col: str, prefix="day_of_month", norm=True):
         """
@@ -174,28 +504,28 @@ class DatetimeDayOfMonthSinCos(DataEngine):
         self.prefix = prefix
         self.norm = norm
 
-    def __call__(self, data: pd.DataFrame):
-        day_of_month = data[self.col].dt.day.to_numpy().astype(np.float64)
+    def output_columns(self) -> list[str]:
+        return [f"{self.prefix}_{self.col}_sin", f"{self.prefix}_{self.col}_cos"]
+
+    def _features(self, fields: CalendarFields) -> dict[str, np.ndarray]:
+        day_of_month = fields.phase(fields.day)
         if self.norm:
-            day_of_month /= data[self.col].dt.days_in_month
+            day_of_month /= fields.days_in_month
         else:
             day_of_month /= 31
 
-        sinx, cosx = sin_cos_transform(day_of_month, 1)
-        return pd.DataFrame(
-            {
-                f"{self.prefix}_{self.col}_sin": sinx,
-                f"{self.prefix}_{self.col}_cos": cosx,
-            },
-            index=data.index,
-        )
+        sinx, cosx = sin_cos_transform(day_of_month, 1, self.dtype_policy.float_dtype())
+        return {
+            f"{self.prefix}_{self.col}_sin": sinx,
+            f"{self.prefix}_{self.col}_cos": cosx,
+        }
 
 
 @DATA_ENGINE_ZOO.regist()
-class DatetimeDayOfWeek(DataEngine):
+class DatetimeDayOfWeek(_DatetimeEngine):
     """Get day of week from datetime column. Return {prefix}_{col}."""
 
-    engine_type = [DataEngineType.RETURN_NEW_PD]
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.RETURN_NEW_PD]
 
     def __init__(self, col: str, prefix="day_of_week"):
         """
@@ -206,21 +536,21 @@ class DatetimeDayOfWeek(DataEngine):
         self.col = col
         self.prefix = prefix
 
-    def __call__(self, data: pd.DataFrame):
-        day_of_week = data[self.col].dt.day_of_week.to_numpy()
-        return pd.DataFrame(
-            {
-                f"{self.prefix}_{self.col}": day_of_week,
-            },
-            index=data.index,
-        )
+    def output_columns(self) -> list[str]:
+        return [f"{self.prefix}_{self.col}"]
+
+    def _features(self, fields: CalendarFields) -> dict[str, np.ndarray]:
+        day_of_week = self._raw(fields, fields.day_of_week, 6)
+        return {
+            f"{self.prefix}_{self.col}": day_of_week,
+        }
 
 
 @DATA_ENGINE_ZOO.regist()
-class DatetimeDayOfWeekSinCos(DataEngine):
+class DatetimeDayOfWeekSinCos(_DatetimeEngine):
     """Periodically transforms the day of week. Return 2 column {prefix}_{col}_sin/cos"""
 
-    engine_type = [DataEngineType.RETURN_NEW_PD]
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.RETURN_NEW_PD]
 
     def __init__(self, col: str, prefix="day_of_week"):
         """
@@ -231,23 +561,23 @@ class DatetimeDayOfWeekSinCos(DataEngine):
         self.col = col
         self.prefix = prefix
 
-    def __call__(self, data: pd.DataFrame):
-        day_of_week = data[self.col].dt.day.to_numpy().astype(np.float64)
-        sinx, cosx = sin_cos_transform(day_of_week, 7)
-        return pd.DataFrame(
-            {
-                f"{self.prefix}_{self.col}_sin": sinx,
-                f"{self.prefix}_{self.col}_cos": cosx,
-            },
-            index=data.index,
-        )
+    def output_columns(self) -> list[str]:
+        return [f"{self.prefix}_{self.col}_sin", f"{self.prefix}_{self.col}_cos"]
+
+    def _features(self, fields: CalendarFields) -> dict[str, np.ndarray]:
+        day_of_week = fields.phase(fields.day_of_week)
+        sinx, cosx = sin_cos_transform(day_of_week, 7, self.dtype_policy.float_dtype())
+        return {
+            f"{self.prefix}_{self.col}_sin": sinx,
+            f"{self.prefix}_{self.col}_cos": cosx,
+        }
 
 
 @DATA_ENGINE_ZOO.regist()
-class DatetimeIsWeekend(DataEngine):
+class DatetimeIsWeekend(_DatetimeEngine):
     """Get datetime is weekend. Return {prefix}_{col}"""
 
-    engine_type = [DataEngineType.RETURN_NEW_PD]
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.RETURN_NEW_PD]
 
     def __init__(self, col: str, prefix="is_weekend", include_sat=True):
         """
@@ -260,12 +590,221 @@ class DatetimeIsWeekend(DataEngine):
         self.prefix = prefix
         self.include_sat = include_sat
 
-    def __call__(self, data: pd.DataFrame):
+    def output_columns(self) -> list[str]:
+        return [f"{self.prefix}_{self.col}"]
+
+    def _features(self, fields: CalendarFields) -> dict[str, np.ndarray]:
         threshold = 5 if self.include_sat else 6
-        is_weekend = data[self.col].dt.day_of_week.to_numpy() > threshold
-        return pd.DataFrame(
-            {
-                f"{self.prefix}_{self.col}": is_weekend,
-            },
-            index=data.index,
-        )
+        is_weekend = (fields.day_of_week > threshold) & ~fields.nat
+        return {
+            f"{self.prefix}_{self.col}": is_weekend,
+        }
+
+
+def _day_of_year(fields: CalendarFields, out: np.ndarray, **_) -> None:
+    out[:, 0] = fields.day_of_year
+
+
+def _day_of_year_sin_cos(fields: CalendarFields, out: np.ndarray, **_) -> None:
+    _sin_cos_into(fields.day_of_year / fields.days_in_year, 1, out)
+
+
+def _month_of_year(fields: CalendarFields, out: np.ndarray, **_) -> None:
+    out[:, 0] = fields.month
+
+
+def _month_of_year_sin_cos(fields: CalendarFields, out: np.ndarray, **_) -> None:
+    _sin_cos_into(fields.month, 12, out)
+
+
+def _day_of_month(fields: CalendarFields, out: np.ndarray, **_) -> None:
+    out[:, 0] = fields.day
+
+
+def _day_of_month_sin_cos(
+    fields: CalendarFields, out: np.ndarray, norm: bool = True, **_
+) -> None:
+    period = fields.days_in_month if norm else 31
+    _sin_cos_into(fields.day / period, 1, out)
+
+
+def _day_of_week(fields: CalendarFields, out: np.ndarray, **_) -> None:
+    out[:, 0] = fields.day_of_week
+
+
+def _day_of_week_sin_cos(fields: CalendarFields, out: np.ndarray, **_) -> None:
+    _sin_cos_into(fields.day_of_week, 7, out)
+
+
+def _is_weekend(
+    fields: CalendarFields, out: np.ndarray, include_sat: bool = True, **_
+) -> None:
+    threshold = 5 if include_sat else 6
+    out[:, 0] = fields.day_of_week > threshold
+
+
+def _sin_cos_into(x: np.ndarray, period: float, out: np.ndarray) -> None:
+    phase = 2 * np.pi * x / period
+    np.sin(phase, out=out[:, 0])
+    np.cos(phase, out=out[:, 1])
+
+
+# feature name: (default prefix, sin/cos pair, kernel)
+_DATETIME_FEATURES = {
+    "day_of_year": ("day_of_year", False, _day_of_year),
+    "day_of_year_sin_cos": ("day_of_year", True, _day_of_year_sin_cos),
+    "month_of_year": ("month_of_year", False, _month_of_year),
+    "month_of_year_sin_cos": ("month_of_year", True, _month_of_year_sin_cos),
+    "day_of_month": ("day_of_month", False, _day_of_month),
+    "day_of_month_sin_cos": ("day_of_month", True, _day_of_month_sin_cos),
+    "day_of_week": ("day_of_week", False, _day_of_week),
+    "day_of_week_sin_cos": ("day_of_week", True, _day_of_week_sin_cos),
+    "is_weekend": ("is_weekend", False, _is_weekend),
+}
+
+
+# largest value of features that are not sin/cos pairs
+_RAW_FEATURE_HIGH = {
+    "day_of_year": 366,
+    "month_of_year": 12,
+    "day_of_month": 31,
+    "day_of_week": 6,
+    "is_weekend": 1,
+}
+
+
+class NdDatetimeFeatures(DataEngine):
+    """Compute several calendar features of datetime64 or int unix epoch array at once. Return 2D array with one column per output."""
+
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.NDArr]
+
+    def __init__(
+        self, features: list[str | dict], unit: str = "s", dtype: str | None = None
+    ):
+        """
+        Args:
+            features (list[str | dict]): feature names, or {feature name: options}
+            unit (str, optional): unit of int epoch values, one of D, h, m, s, ms, us, ns. Defaults to "s".
+            dtype (str | None, optional): dtype of returned values. If None, float dtype of the dtype policy (float64 without policy). Defaults to None.
+        """
+        self.unit = unit
+        self.dtype = dtype
+        self.features: list[tuple[str, dict]] = []
+        for feature in features:
+            if isinstance(feature, dict):
+                for name, options in feature.items():
+                    self.features.append((name, dict(options or {})))
+            else:
+                self.features.append((feature, {}))
+
+        for name, _ in self.features:
+            if name not in _DATETIME_FEATURES:
+                raise ValueError(
+                    f"unknown datetime feature {name}. "
+                    f"available features: {list(_DATETIME_FEATURES)}"
+                )
+
+    def _width(self, name: str) -> int:
+        return 2 if _DATETIME_FEATURES[name][1] else 1
+
+    def _compute(self, fields: CalendarFields) -> np.ndarray:
+        width = sum(self._width(name) for name, _ in self.features)
+        dtype = self.dtype_policy.float_dtype(self.dtype)
+        out = np.empty((len(fields.days), width), dtype=dtype, order="F")
+
+        start = 0
+        for name, options in self.features:
+            width = self._width(name)
+            kernel = _DATETIME_FEATURES[name][2]
+            kernel(fields, out[:, start : start + width], **options)
+            start += width
+
+        if fields.nat.any():
+            out[fields.nat] = np.nan
+        return out
+
+    def __call__(self, data: np.ndarray) -> np.ndarray:
+        return self._compute(CalendarFields(data, self.unit))
+
+
+@DATA_ENGINE_ZOO.regist()
+class DatetimeFeatures(NdDatetimeFeatures):
+    """Compute several calendar features of a datetime column at once.
+    Return columns with the same names as the single feature engines, e.g. {prefix}_{col} of DatetimeDayOfYear and {prefix}_{col}_sin/cos of DatetimeDayOfYearSinCos.
+
+    Features:
+        - day_of_year, day_of_year_sin_cos
+        - month_of_year, month_of_year_sin_cos
+        - day_of_month, day_of_month_sin_cos (option: norm)
+        - day_of_week, day_of_week_sin_cos
+        - is_weekend (option: include_sat)
+
+    Every feature also accepts prefix option. The column can also hold int unix epoch values.
+
+    Example:
+        ```yaml
+        - DatetimeFeatures:
+            col: datetime
+            features:
+              - day_of_year
+              - day_of_week_sin_cos
+              - day_of_month_sin_cos:
+                  norm: false
+              - is_weekend:
+                  include_sat: false
+        ```
+    """
+
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.RETURN_NEW_PD]
+
+    def __init__(
+        self,
+        col: str,
+        features: list[str | dict],
+        unit: str = "s",
+        dtype: str | None = None,
+    ):
+        """
+        Args:
+            col (str): column name
+            features (list[str | dict]): feature names, or {feature name: options}
+            unit (str, optional): unit of int epoch column, one of D, h, m, s, ms, us, ns. Defaults to "s".
+            dtype (str | None, optional): dtype of returned columns. Raw features and is_weekend are also stored with this dtype. If None, float dtype of the dtype policy (float64 without policy), and raw features and is_weekend use the int dtype of the policy if it sets one and the column has no NaT. Defaults to None.
+        """
+        super().__init__(features, unit, dtype)
+        self.col = col
+
+    def _feature_columns(self, name: str, options: dict) -> list[str]:
+        default_prefix, sin_cos, _ = _DATETIME_FEATURES[name]
+        prefix = options.get("prefix", default_prefix)
+        if sin_cos:
+            return [f"{prefix}_{self.col}_sin", f"{prefix}_{self.col}_cos"]
+        return [f"{prefix}_{self.col}"]
+
+    def output_columns(self) -> list[str]:
+        columns = []
+        for name, options in self.features:
+            columns.extend(self._feature_columns(name, options))
+        return columns
+
+    def _columns(self, fields: CalendarFields) -> dict[str, np.ndarray]:
+        """Output columns by name. Raw features and is_weekend follow the int dtype policy when dtype is None and no value is NaT."""
+        columns = dict(zip(self.output_columns(), self._compute(fields).T))
+        if self.dtype is not None or self.dtype_policy.int is None or fields.nat.any():
+            return columns
+        for name, options in self.features:
+            if name in _RAW_FEATURE_HIGH:
+                (col,) = self._feature_columns(name, options)
+                dtype = self.dtype_policy.int_dtype(0, _RAW_FEATURE_HIGH[name])
+                columns[col] = columns[col].astype(dtype)
+        return columns
+
+    def compile_step(self) -> Kernel:
+        def kernel(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+            return self._columns(CalendarFields(columns[self.col], self.unit))
+
+        return kernel
+
+    def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
+        columns = self._columns(calendar_fields(data[self.col], self.unit))
+        return pd.DataFrame(columns, index=data.index, copy=False)
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from typing import ClassVar
+
+import numpy as np
+import pandas as pd
+
+from learning_machine.zoo import DATA_ENGINE_ZOO
+
+from .dtype import smallest_int
+from .engine import DataEngine
+from .engine_type import DataEngineType
+from .state import pack_values, unpack_values
+
+_CATEGORY = "category"
+
+
+@DATA_ENGINE_ZOO.regist()
+class Downcast(DataEngine):
+    """Cast source columns to the smallest dtypes holding their values, chosen by a scan of the data in fit.
+
+    - int columns: smallest int dtype holding the value range, e.g. uint8 for [0, 200].
+    - float columns: float_dtype, or float32 if no value changes in float32.
+    - string columns: category, if they have at most max_categories distinct values.
+
+    Other columns (bool, datetime, extension dtypes) are kept. At transform, int values outside the
+    fitted range widen the dtype instead of overflowing, and unseen strings are added to the categories.
+
+    Example:
+        ```yaml
+        - Downcast:
+            float_dtype: float32
+            max_categories: 1000
+        ```
+    """
+
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.SIDE_EFFECT]
+
+    def __init__(
+        self,
+        cols: list[str] | None = None,
+        float_dtype: str | None = None,
+        max_categories: float | None = 0.5,
+    ):
+        """
+        Args:
+            cols (list[str] | None, optional): columns to downcast. If None, every column of the data in fit. Defaults to None.
+            float_dtype (str | None, optional): dtype of float columns, e.g. float32 even if values change. If None, float32 only when no value changes. Defaults to None.
+            max_categories (int | float | None, optional): string columns with at most max_categories distinct values (or max_categories fraction of rows, if float) become category. If None, strings are kept. Defaults to 0.5.
+        """
+        self.cols = cols
+        self.float_dtype = float_dtype
+        self.max_categories = max_categories
+        self.dtypes: dict[str, str] = {}
+        self.categories: dict[str, pd.Index] = {}
+        self.fit = False
+
+    def is_fitted(self) -> bool:
+        return self.fit
+
+    def input_columns(self) -> list[str] | None:
+        if self.cols is None:
+            return None
+        return list(self.cols)
+
+    def output_columns(self) -> list[str] | None:
+        return self.input_columns()
+
+    def get_state(self) -> dict[str, np.ndarray]:
+        if not self.fit:
+            return {}
+        state = {
+            "columns": np.array(list(self.dtypes), dtype=str),
+            "dtypes": np.array(list(self.dtypes.values()), dtype=str),
+        }
+        for i, col in enumerate(self.dtypes):
+            if col in self.categories:
+                state.update(
+                    pack_values(f"categories{i}", self.categories[col].to_numpy())
+                )
+        return state
+
+    def set_state(self, state: dict[str, np.ndarray]) -> None:
+        columns = np.asarray(state["columns"]).tolist()
+        self.dtypes = dict(zip(columns, np.asarray(state["dtypes"]).tolist()))
+        self.categories = {
+            col: pd.Index(unpack_values(state, f"categories{i}"), dtype=object)
+            for i, col in enumerate(columns)
+            if self.dtypes[col] == _CATEGORY
+        }
+        self.fit = True
+
+    def _fit_column(self, series: pd.Series) -> pd.Series | None:
+        """Choose the dtype of column, and return the cast column. None to keep the column."""
+        dtype = series.dtype
+        if isinstance(dtype, np.dtype) and dtype.kind in "iu" and len(series):
+            values = series.to_numpy()
+            target = smallest_int(values.min(), values.max())
+            if target.itemsize >= dtype.itemsize:
+                return None
+            self.dtypes[series.name] = target.name
+            return series.astype(target)
+
+        if isinstance(dtype, np.dtype) and dtype.kind == "f":
+            values = series.to_numpy()
+            if self.float_dtype is not None:
+                target = np.dtype(self.float_dtype)
+                cast = values.astype(target)
+            else:
+                if dtype.itemsize <= 4:
+                    return None
+                target = np.dtype(np.float32)
+                cast = values.astype(target)
+                if not np.array_equal(cast, values, equal_nan=True):
+                    return None
+            self.dtypes[series.name] = target.name
+            return pd.Series(cast, index=series.index, name=series.name, copy=False)
+
+        if self.max_categories is not None and (
+            dtype == object or isinstance(dtype, pd.StringDtype)
+        ):
+            codes, uniques = pd.factorize(series)
+            threshold = self.max_categories
+            if isinstance(threshold, float):
+                threshold = threshold * len(series)
+            if len(uniques) > threshold:
+                return None
+            categories = pd.Index(np.asarray(uniques, dtype=object), dtype=object)
+            self.dtypes[series.name] = _CATEGORY
+            self.categories[series.name] = categories
+            # codes of the scan are reused, the strings are not hashed again
+            return pd.Series(
+                pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(categories)),
+                index=series.index,
+                name=series.name,
+            )
+        return None
+
+    def _transform_column(self, series: pd.Series, dtype: str) -> pd.Series:
+        if dtype == _CATEGORY:
+            categories = self.categories[series.name]
+            values = series.to_numpy(dtype=object)
+            codes = categories.get_indexer(values)
+            unseen = (codes < 0) & ~pd.isna(values)
+            if unseen.any():
+                # unseen strings get new codes after the fitted categories
+                categories = categories.append(pd.Index(pd.unique(values[unseen])))
+                codes[unseen] = categories.get_indexer(values[unseen])
+            return pd.Series(
+                pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(categories)),
+                index=series.index,
+                name=series.name,
+            )
+
+        target = np.dtype(dtype)
+        source = series.dtype
+        if not isinstance(source, np.dtype) or source.kind not in "iuf":
+            return series
+        if target.kind in "iu":
+            if source.kind not in "iu":
+                # e.g. float with nan, int can not hold it
+                return series
+            if len(series):
+                info = np.iinfo(target)
+                values = series.to_numpy()
+                low, high = values.min(), values.max()
+                if low < info.min or high > info.max:
+                    target = np.promote_types(
+                        target, smallest_int(min(low, 0), max(high, 0))
+                    )
+                    if target.kind not in "iu":
+                        return series
+        return series.astype(target)
+
+    def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
+        if not self.fit:
+            cols = list(data.columns) if self.cols is None else self.cols
+            for col in cols:
+                cast = self._fit_column(data[col])
+                if cast is not None:
+                    data[col] = cast
+            self.fit = True
+            return data
+
+        for col, dtype in self.dtypes.items():
+            if col in data.columns:
+                data[col] = self._transform_column(data[col], dtype)
+        return data
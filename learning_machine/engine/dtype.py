@@ -0,0 +1,92 @@
+"""Output dtype policy of engines, e.g. ``pipeline: {dtype_policy: {float: float32, int: smallest}}``.
+
+Engines allocate their outputs with the dtypes of the policy, so feature columns are not
+computed in float64/int64 and cast afterwards.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+_SIGNED = (np.int8, np.int16, np.int32, np.int64)
+_UNSIGNED = (np.uint8, np.uint16, np.uint32, np.uint64)
+
+
+def smallest_int(low: int, high: int) -> np.dtype:
+    """Smallest int dtype holding values in [low, high], e.g. uint8 for [0, 255] and int8 for [-1, 100].
+
+    Args:
+        low (int): minimum value
+        high (int): maximum value
+
+    Returns:
+        np.dtype: dtype, unsigned if low is not negative
+    """
+    dtypes = _SIGNED if low < 0 else _UNSIGNED
+    for dtype in dtypes:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+    raise ValueError(f"no int dtype holds values in [{low}, {high}]")
+
+
+@dataclass(frozen=True)
+class DtypePolicy:
+    """dtypes engines allocate their outputs with.
+
+    Attributes:
+        float (str | None): dtype of float outputs, e.g. float32. None keeps float64.
+        int (str | None): dtype of int outputs, or "smallest" for the smallest int dtype holding the value range of the output (e.g. int16 for day of year). None keeps the dtype of each engine.
+    """
+
+    float: str | None = None
+    int: str | None = None
+
+    def __post_init__(self):
+        if self.float is not None and np.dtype(self.float).kind != "f":
+            raise ValueError(f"float dtype must be a float dtype, but {self.float}")
+        if (
+            self.int is not None
+            and self.int != "smallest"
+            and np.dtype(self.int).kind not in "iu"
+        ):
+            raise ValueError(
+                f"int dtype must be an int dtype or smallest, but {self.int}"
+            )
+
+    @classmethod
+    def from_config(cls, config: DtypePolicy | dict | None) -> DtypePolicy:
+        """Create policy from {float: ..., int: ...} config."""
+        if isinstance(config, DtypePolicy):
+            return config
+        return cls(**(config or {}))
+
+    def float_dtype(self, dtype: str | None = None) -> np.dtype:
+        """dtype of float output.
+
+        Args:
+            dtype (str | None, optional): dtype set on the engine, which takes precedence. Defaults to None.
+
+        Returns:
+            np.dtype: dtype
+        """
+        return np.dtype(dtype or self.float or np.float64)
+
+    def int_dtype(self, low: int, high: int, default: str = "int64") -> np.dtype:
+        """dtype of int output with values in [low, high].
+
+        Args:
+            low (int): minimum value of the output
+            high (int): maximum value of the output
+            default (str, optional): dtype of the engine without policy. Defaults to "int64".
+
+        Returns:
+            np.dtype: dtype
+        """
+        if self.int is None:
+            return np.dtype(default)
+        if self.int == "smallest":
+            return smallest_int(low, high)
+        return np.dtype(self.int)
@@ -1,9 +1,19 @@
 from __future__ import annotations
-from typing import Generic, TypeVar
+
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Iterator
+from typing import TYPE_CHECKING, Any, Generic, Literal, TypeVar
 
 from learning_machine.zoo import DATA_ENGINE_ZOO
 
+from .dtype import DtypePolicy
+from .engine_type import DataEngineType
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from .compiled import CompiledEngine
+
 
 def create_engines_from_config(config: list[dict]) -> list[DataEngine]:
     """Create engines from engine config list.
@@ -24,14 +34,50 @@ def create_engines_from_config(config: list[dict]) -> list[DataEngine]:
     return engines
 
 
+def flatten_engines(engines: list[DataEngine]) -> list[DataEngine]:
+    """Expand nested SequentialEngine into a flat list of engines.
+
+    Args:
+        engines (list[DataEngine]): engines applied sequentially
+
+    Returns:
+        list[DataEngine]: engines
+    """
+    flat = []
+    for engine in engines:
+        if type(engine) is SequentialEngine:
+            flat.extend(flatten_engines(engine.engines))
+        else:
+            flat.append(engine)
+    return flat
+
+
 T = TypeVar("T")
 U = TypeVar("U")
 
+Kernel = Callable[[dict[str, "np.ndarray"]], dict[str, "np.ndarray"]]
+"""Function over columns {name: 1D array}, the compiled form of an engine."""
+
+_READ_ATTRS = ("col", "cols", "col1", "col2", "from_col", "columns", "by")
+_WRITE_ATTRS = ("col", "cols", "columns")
+
+
+def _attr_columns(engine: DataEngine, attrs: tuple[str, ...]) -> list[str]:
+    columns = []
+    for attr in attrs:
+        value = getattr(engine, attr, None)
+        if isinstance(value, str):
+            columns.append(value)
+        elif isinstance(value, (list, tuple)):
+            columns.extend(value)
+    return list(dict.fromkeys(columns))
+
 
 class DataEngine(ABC, Generic[T, U]):
     """Data engine interface."""
 
     engine_type = []
+    dtype_policy = DtypePolicy()
 
     @abstractmethod
     def __call__(self, data: T) -> U:
@@ -57,22 +103,425 @@ class DataEngine(ABC, Generic[T, U]):
         """
         return cls(**config)
 
+    def input_columns(self) -> list[str] | None:
+        """Columns read by the engine, collected from col/cols style attributes.
+
+        Returns:
+            list[str] | None: column names. None if the engine is untagged and its reads are unknown.
+        """
+        if not self.engine_type:
+            return None
+        return _attr_columns(self, _READ_ATTRS)
+
+    def output_columns(self) -> list[str] | None:
+        """Columns written by the engine.
+        SIDE_EFFECT engines modify these columns in place, RETURN_NEW_PD engines return them as a new dataframe.
+
+        Returns:
+            list[str] | None: column names. None if unknown before the engine runs.
+        """
+        if DataEngineType.SIDE_EFFECT in self.engine_type:
+            return _attr_columns(self, _WRITE_ATTRS)
+        return None
+
+    def required_columns(self) -> list[str] | None:
+        """Columns the input data must have for the engine, e.g. to read only these columns from a file.
+        Same as input_columns, except for engines using columns without reading them (e.g. DropColumns) and pipelines.
+
+        Returns:
+            list[str] | None: column names. None if unknown.
+        """
+        return self.input_columns()
+
+    def input_dtypes(self) -> dict[str, str]:
+        """dtypes the engine reads its input columns as, e.g. float64 of scalers replacing the columns.
+        Pushed down into file reads (see learning_machine.read_csv), so the reader does not infer other dtypes first.
+
+        Returns:
+            dict[str, str]: {column: dtype}. Empty if the engine uses the columns with any dtype.
+        """
+        return {}
+
+    def set_dtype_policy(self, policy: DtypePolicy) -> None:
+        """Set dtypes the engine allocates its outputs with. SequentialEngine sets the policy of its engines.
+
+        Args:
+            policy (DtypePolicy): dtype policy
+        """
+        self.dtype_policy = policy
+
+    def is_fitted(self) -> bool:
+        """Whether the engine holds fitted state. Stateless engines are always fitted."""
+        return True
+
+    def supports_partial_fit(self) -> bool:
+        """Whether the engine can be fitted incrementally with partial_fit, e.g. over the chunks of SequentialEngine.stream."""
+        return hasattr(self, "partial_fit")
+
+    def get_state(self) -> dict[str, np.ndarray]:
+        """Fitted parameters as arrays, e.g. to save them with Bundle.save.
+
+        Returns:
+            dict[str, np.ndarray]: fitted parameters. Empty if the engine is stateless or not fitted.
+        """
+        return {}
+
+    def set_state(self, state: dict[str, np.ndarray]) -> None:
+        """Restore fitted parameters from get_state without fitting.
+
+        Args:
+            state (dict[str, np.ndarray]): fitted parameters
+        """
+
+    def stream_step(self, data: T) -> U:
+        """Process a chunk of the stream.
+        Engines depending on row order can hold back rows and return them with later chunks.
+
+        Args:
+            data (T): chunk
+
+        Returns:
+            U: processed rows ready to pass to the next engine
+        """
+        return self(data)
+
+    def stream_end(self) -> U | None:
+        """End of the stream. Return rows still held back by stream_step and reset the stream state.
+
+        Returns:
+            U | None: remaining processed rows. None if nothing is held.
+        """
+        return None
+
+    def call_owned(self, data: T) -> U:
+        """Process data owned by the pipeline, see SequentialEngine ownership.
+        Engines copying their input to protect the caller skip the copy.
+
+        Args:
+            data (T): data that no one else refers to
+
+        Returns:
+            U: processed data
+        """
+        return self(data)
+
+    def row_context(self) -> int | None:
+        """Rows before and after a row the engine reads to transform it, used by SequentialEngine.transform_parallel.
+        Engines carrying state across chunks in stream_step depend on row order, so their context is unknown by default.
+
+        Returns:
+            int | None: number of rows. 0 if rows are transformed independently, None if the whole data is needed in order.
+        """
+        if type(self).stream_step is not DataEngine.stream_step:
+            return None
+        return 0
+
+    def compile_step(self) -> Kernel | None:
+        """Kernel of the fitted engine over columns as 1D arrays, used by SequentialEngine.compile.
+        Like the dataframe engines, SIDE_EFFECT kernels update and return the columns, and RETURN_NEW_PD kernels return new columns.
+
+        Returns:
+            Kernel | None: kernel. None if the engine can not run without pandas.
+        """
+        return None
+
+
+class EngineHook:
+    """Hook called around each engine of SequentialEngine and ConcatDFs, e.g. to profile the engines.
+    Hooks of ConcatDFs with workers are called from worker threads.
+    """
+
+    def before(self, engine: DataEngine, data, path: str):
+        """Called before the engine runs.
+
+        Args:
+            engine (DataEngine): engine
+            data: input data
+            path (str): position of the engine, e.g. "2.0" for the first engine of ConcatDFs at position 2
+
+        Returns:
+            Any: token passed to after
+        """
+
+    def after(self, engine: DataEngine, data, out, path: str, token) -> None:
+        """Called after the engine runs.
+
+        Args:
+            engine (DataEngine): engine
+            data: input data
+            out: output data
+            path (str): position of the engine
+            token: return value of before
+        """
+
+
+class HookedEngines:
+    """Engines container calling hooks around its engines. Without hooks, nothing is called."""
+
+    engines: list[DataEngine]
+    hooks: tuple[EngineHook, ...] = ()
+    _hook_prefix = ""
+
+    def add_hook(self, hook: EngineHook, prefix: str = "") -> None:
+        """Add hook to this container and nested containers.
+
+        Args:
+            hook (EngineHook): hook
+            prefix (str, optional): path prefix of the engines. Defaults to "".
+        """
+        self.hooks = (*self.hooks, hook)
+        self._hook_prefix = prefix
+        for i, engine in enumerate(self.engines):
+            if isinstance(engine, HookedEngines):
+                engine.add_hook(hook, f"{prefix}{i}.")
+
+    def remove_hook(self, hook: EngineHook) -> None:
+        """Remove hook from this container and nested containers.
+
+        Args:
+            hook (EngineHook): hook
+        """
+        self.hooks = tuple(h for h in self.hooks if h is not hook)
+        for engine in self.engines:
+            if isinstance(engine, HookedEngines):
+                engine.remove_hook(hook)
+
+    def _call_hooked(self, i: int, call: Callable, data):
+        engine = self.engines[i]
+        path = f"{self._hook_prefix}{i}"
+        hooks = self.hooks
+        tokens = [hook.before(engine, data, path) for hook in hooks]
+        out = call(data)
+        for hook, token in zip(hooks, tokens):
+            hook.after(engine, data, out, path, token)
+        return out
+
 
 @DATA_ENGINE_ZOO.regist()
-class SequentialEngine(DataEngine, Generic[T, U]):
+class SequentialEngine(HookedEngines, DataEngine, Generic[T, U]):
     """Apply engines sequentially.
     data -> engine1 -> data1 -> engine2 -> data2
     """
 
-    def __init__(self, engines: list[DataEngine]):
+    def __init__(
+        self,
+        engines: list[DataEngine],
+        ownership: Literal["copy", "transfer"] | None = None,
+        dtype_policy: DtypePolicy | dict | None = None,
+    ):
         """
         Args:
             engines (list[DataEngine]): engines
+            ownership (Literal["copy", "transfer"] | None, optional): who owns the data passing through the engines. "copy" copies the input once on entry, "transfer" takes the input as is, so the caller must not use it afterwards. In both modes, engines work in place without defensive copies (e.g. copy option of DropColumns). If None, each engine copies by its own options. Defaults to None.
+            dtype_policy (DtypePolicy | dict | None, optional): dtypes engines allocate their outputs with, e.g. {"float": "float32", "int": "smallest"}. Set on every engine, including nested engines. If None, engines keep their own dtypes. Defaults to None.
         """
         super().__init__()
+        if ownership not in (None, "copy", "transfer"):
+            raise ValueError(
+                f"ownership must be copy, transfer or None, but {ownership}"
+            )
         self.engines = engines
+        self.ownership = ownership
+        if dtype_policy is not None:
+            self.set_dtype_policy(DtypePolicy.from_config(dtype_policy))
+
+    def set_dtype_policy(self, policy: DtypePolicy) -> None:
+        self.dtype_policy = policy
+        for engine in self.engines:
+            engine.set_dtype_policy(policy)
 
     def __call__(self, data: T) -> U:
+        if self.ownership is None:
+            for i, engine in enumerate(self.engines):
+                if self.hooks:
+                    data = self._call_hooked(i, engine, data)
+                else:
+                    data = engine(data)
+            return data  # type: ignore
+
+        if self.ownership == "copy":
+            data = data.copy()  # type: ignore
+        return self.call_owned(data)
+
+    def call_owned(self, data: T) -> U:
+        for i, engine in enumerate(self.engines):
+            if self.hooks:
+                data = self._call_hooked(i, engine.call_owned, data)
+            else:
+                data = engine.call_owned(data)
+        return data  # type: ignore
+
+    def is_fitted(self) -> bool:
+        return all(engine.is_fitted() for engine in self.engines)
+
+    def row_context(self) -> int | None:
+        context = 0
+        drops_rows = False
         for engine in self.engines:
-            data = engine(data)
+            engine_context = engine.row_context()
+            if engine_context is None:
+                return None
+            if engine_context and drops_rows:
+                # rows dropped before the engine shift the context rows it reads
+                return None
+            # contexts of sequential engines add up
+            context += engine_context
+            drops_rows = drops_rows or DataEngineType.DROP_ROWS in engine.engine_type
+        return context
+
+    def stream_step(self, data: T) -> U:
+        for engine in self.engines:
+            if len(data) == 0:  # type: ignore
+                break
+            data = engine.stream_step(data)
         return data  # type: ignore
+
+    def stream_end(self) -> U | None:
+        import pandas as pd
+
+        tails = []
+        for i, engine in enumerate(self.engines):
+            tail = engine.stream_end()
+            if tail is None:
+                continue
+            for next_engine in self.engines[i + 1 :]:
+                if len(tail) == 0:
+                    break
+                tail = next_engine.stream_step(tail)
+            if len(tail):
+                tails.append(tail)
+        if not tails:
+            return None
+        return pd.concat(tails)  # type: ignore
+
+    def stream(
+        self, chunks: Iterable[T] | Callable[[], Iterable[T]], fit: bool = True
+    ) -> Iterator[U]:
+        """Process the data chunk by chunk, e.g. ``pd.read_csv(path, chunksize=...)``.
+
+        Engines supporting ``partial_fit`` that are not fitted yet are fitted over all chunks before
+        transforming, so chunks are read at least twice. In this case, pass a list or a function
+        returning a new iterator of chunks. Other engines with fitted state must be fitted already,
+        otherwise ValueError is raised before reading any chunk. Engines depending on row order (e.g. FillSinkHole) carry
+        their state across chunk boundaries, so the output is same as processing the whole data at once.
+
+        Args:
+            chunks (Iterable[T] | Callable[[], Iterable[T]]): chunks, or function returning chunks
+            fit (bool, optional): fit engines with partial_fit before transforming. Defaults to True.
+
+        Yields:
+            Iterator[U]: processed chunks
+        """
+        if fit:
+            from .stream import fit_stream
+
+            chunks = fit_stream(self.engines, chunks)
+        elif callable(chunks):
+            chunks = chunks()
+
+        for chunk in chunks:  # type: ignore
+            data = self.stream_step(chunk)
+            if len(data):  # type: ignore
+                yield data
+        tail = self.stream_end()
+        if tail is not None:
+            yield tail
+
+    def compile_step(self) -> Kernel | None:
+        kernels = [engine.compile_step() for engine in self.engines]
+        if any(kernel is None for kernel in kernels):
+            return None
+
+        def kernel(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+            for step in kernels:
+                columns = step(columns)  # type: ignore
+            return columns
+
+        return kernel
+
+    def compile(self) -> CompiledEngine:
+        """Compile the fitted engines into a transform over dict records without pandas.
+
+        Returns:
+            CompiledEngine: function from a record dict (or list of records) to a feature vector (or matrix)
+        """
+        from .compiled import CompiledEngine
+
+        engines = flatten_engines(self.engines)
+        kernels = []
+        for engine in engines:
+            if not engine.is_fitted():
+                raise ValueError(
+                    f"{type(engine).__name__} is not fitted. fit the engines before compile"
+                )
+            kernel = engine.compile_step()
+            if kernel is None:
+                raise ValueError(f"{type(engine).__name__} does not support compile")
+            kernels.append(kernel)
+        return CompiledEngine(kernels)
+
+    def transform_parallel(
+        self,
+        data: T,
+        workers: int | None = None,
+        partitions: int | None = None,
+        mp_context: Any = None,
+    ) -> U:
+        """Transform dataframe with the fitted engines on a process pool, split into row partitions.
+
+        Numeric columns are passed to the processes through shared memory instead of pickling, and
+        the outputs are concatenated in row order. Engines depending on row order (e.g. FillSinkHole)
+        read row_context() rows beyond their partition, so the result is same as calling the engine.
+        If an engine needs the whole data in order, the data is transformed in this process.
+        Engines must keep the index of their input, and hooks are not called in the processes.
+
+        Args:
+            data (T): dataframe
+            workers (int | None, optional): number of processes. If None, number of CPUs. Defaults to None.
+            partitions (int | None, optional): number of row partitions. If None, same as workers. Defaults to None.
+            mp_context (Any, optional): multiprocessing context, e.g. multiprocessing.get_context("spawn"). Defaults to None.
+
+        Returns:
+            U: transformed dataframe
+        """
+        import os
+
+        from .parallel import transform_parallel
+
+        return transform_parallel(
+            self,
+            data,
+            workers or os.cpu_count() or 1,
+            partitions,
+            mp_context,  # type: ignore
+        )
+
+    def optimize(self) -> SequentialEngine:
+        """Plan the engines with their read/write columns.
+        Drop stages whose outputs are never used, move column drops forward and merge adjacent ConcatDFs.
+        Engines are shared with the original, so fitted state is shared as well.
+
+        Returns:
+            SequentialEngine: planned engine
+        """
+        from .planner import plan_engines
+
+        planned = SequentialEngine(plan_engines(self.engines), self.ownership)
+        planned.dtype_policy = self.dtype_policy
+        return planned
+
+    def required_columns(self) -> list[str] | None:
+        """Columns of the input data read by the engines. Columns added by earlier engines are not included.
+        Columns the engines write in place or drop are included, since they must exist in the input.
+
+        Returns:
+            list[str] | None: column names in the order they are first read. None if an engine reads unknown columns.
+        """
+        from .planner import required_columns
+
+        return required_columns(self.engines)
+
+    def input_dtypes(self) -> dict[str, str]:
+        from .planner import input_dtypes
+
+        return input_dtypes(self.engines)
@@ -4,6 +4,7 @@ from enum import Enum, auto
 class DataEngineType(Enum):
     RETURN_NEW_PD = auto()
     SIDE_EFFECT = auto()
+    DROP_ROWS = auto()
 
     NDArr = auto()
     Dataframe = auto()
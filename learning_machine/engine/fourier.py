@@ -1,13 +1,30 @@
 import numpy as np
 import pandas as pd
 from learning_machine.zoo import DATA_ENGINE_ZOO
-from .engine import DataEngine
+from .engine import DataEngine, Kernel
 from .engine_type import DataEngineType
+from .arrow import numeric_values
 
 
-def sin_cos_transform(x: np.ndarray, period: float) -> tuple[np.ndarray, np.ndarray]:
+def sin_cos_transform(
+    x: np.ndarray, period: float, dtype: np.dtype | str | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """sin and cos of x with the given period.
+
+    Args:
+        x (np.ndarray): values
+        period (float): period of the values
+        dtype (np.dtype | str | None, optional): dtype of the outputs, e.g. float32. The phase is computed in float64 and written into outputs of this dtype. If None, dtype of the phase. Defaults to None.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: sin, cos
+    """
     phase = 2 * np.pi * x / period
-    return np.sin(phase), np.cos(phase)
+    if dtype is None:
+        return np.sin(phase), np.cos(phase)
+    sinx = np.sin(phase, out=np.empty(phase.shape, dtype=dtype))
+    cosx = np.cos(phase, out=np.empty(phase.shape, dtype=dtype))
+    return sinx, cosx
 
 
 @DATA_ENGINE_ZOO.regist()
@@ -29,9 +46,22 @@ class SinCos(DataEngine):
         if not prefix:
             self.prefix = col
 
+    def output_columns(self) -> list[str]:
+        return [f"{self.prefix}_sin", f"{self.prefix}_cos"]
+
+    def compile_step(self) -> Kernel:
+        def kernel(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+            x = columns[self.col].astype(np.float64)
+            sinx, cosx = sin_cos_transform(
+                x, self.period, self.dtype_policy.float_dtype()
+            )
+            return {f"{self.prefix}_sin": sinx, f"{self.prefix}_cos": cosx}
+
+        return kernel
+
     def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
-        x = data[self.col].to_numpy().astype(np.float64)
-        sinx, cosx = sin_cos_transform(x, self.period)
+        x = numeric_values(data[self.col]).astype(np.float64)
+        sinx, cosx = sin_cos_transform(x, self.period, self.dtype_policy.float_dtype())
         return pd.DataFrame(
             {
                 f"{self.prefix}_sin": sinx,
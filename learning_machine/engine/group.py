@@ -0,0 +1,193 @@
+"""Groups of rows for engines with ``by`` columns, e.g. a scaler fitted per store.
+
+Rows are factorized into group codes and sorted into contiguous blocks, so statistics of all
+groups are computed with segmented NumPy reductions (``ufunc.reduceat``) instead of a Python
+loop over groups.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from .compiled import lookup_key
+from .dtype import smallest_int
+from .state import pack_values, unpack_values
+
+
+def factorize_groups(
+    keys: Sequence[np.ndarray | pd.Series],
+) -> tuple[np.ndarray, pd.Index]:
+    """Group codes of rows by one or more key columns. Missing keys form their own group.
+
+    Args:
+        keys (Sequence[np.ndarray | pd.Series]): key columns
+
+    Returns:
+        tuple[np.ndarray, pd.Index]: code of each row in [0, number of groups), and keys of the groups in order of appearance. MultiIndex if there are several key columns.
+    """
+    if len(keys) == 1:
+        codes, uniques = pd.factorize(keys[0], use_na_sentinel=False)
+        return codes.astype(np.intp, copy=False), pd.Index(uniques)
+
+    codes = np.zeros(len(keys[0]), dtype=np.int64)
+    for key in keys:
+        level_codes, uniques = pd.factorize(key, use_na_sentinel=False)
+        # combined codes are factorized again, so they stay below the number of rows
+        codes, _ = pd.factorize(codes * len(uniques) + level_codes)
+    codes = codes.astype(np.intp, copy=False)
+    first_rows = np.empty(codes.max() + 1 if len(codes) else 0, dtype=np.intp)
+    first_rows[codes[::-1]] = np.arange(len(codes))[::-1]
+    levels = [np.asarray(key)[first_rows] for key in keys]
+    return codes, pd.MultiIndex.from_arrays(levels)
+
+
+def lookup_groups(
+    keys: Sequence[np.ndarray | pd.Series], groups: pd.Index
+) -> np.ndarray:
+    """Codes of rows in fitted groups.
+
+    Args:
+        keys (Sequence[np.ndarray | pd.Series]): key columns
+        groups (pd.Index): fitted groups, see factorize_groups
+
+    Returns:
+        np.ndarray: code of each row, -1 for groups not in groups
+    """
+    if isinstance(groups, pd.MultiIndex):
+        target = pd.MultiIndex.from_arrays([np.asarray(key) for key in keys])
+    else:
+        # from an array, so None keys of object Series match the nan group of factorize_groups
+        target = pd.Index(np.asarray(keys[0]))
+    return groups.get_indexer(target)
+
+
+def group_positions(groups: pd.Index) -> dict[Any, int]:
+    """Position of each fitted group by its key, for lookups of a few rows without pandas.
+
+    Args:
+        groups (pd.Index): fitted groups, see factorize_groups
+
+    Returns:
+        dict[Any, int]: position by key, a tuple of lookup_key values if there are several key columns
+    """
+    levels = [
+        groups.get_level_values(level).to_numpy().tolist()
+        for level in range(groups.nlevels)
+    ]
+    if len(levels) == 1:
+        return {lookup_key(key): i for i, key in enumerate(levels[0])}
+    return {tuple(map(lookup_key, key)): i for i, key in enumerate(zip(*levels))}
+
+
+def lookup_positions(
+    keys: Sequence[np.ndarray], positions: dict[Any, int]
+) -> np.ndarray:
+    """Codes of rows in fitted groups, same as lookup_groups with a dict built by group_positions.
+
+    Args:
+        keys (Sequence[np.ndarray]): key columns
+        positions (dict[Any, int]): see group_positions
+
+    Returns:
+        np.ndarray: code of each row, -1 for groups not in positions
+    """
+    rows = [np.asarray(key).tolist() for key in keys]
+    if len(rows) == 1:
+        codes = (positions.get(lookup_key(key), -1) for key in rows[0])
+    else:
+        codes = (positions.get(tuple(map(lookup_key, key)), -1) for key in zip(*rows))
+    return np.fromiter(codes, dtype=np.intp, count=len(rows[0]))
+
+
+def _sort_keys(codes: np.ndarray, n_groups: int) -> np.ndarray:
+    """Codes in the smallest unsigned dtype, so stable sorts of up to 65536 groups are radix sorts."""
+    return codes.astype(smallest_int(0, max(n_groups - 1, 0)), copy=False)
+
+
+def sort_segments(
+    codes: np.ndarray, n_groups: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Order of rows sorted into contiguous blocks of groups, keeping the row order within groups.
+
+    Args:
+        codes (np.ndarray): group code of each row, every group in [0, n_groups) has rows
+        n_groups (int): number of groups
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: order of rows, and start and size of the block of each group
+    """
+    order = np.argsort(_sort_keys(codes, n_groups), kind="stable")
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    return order, starts, counts
+
+
+def segment_quantiles(
+    values: np.ndarray, codes: np.ndarray, n_groups: int, q: Sequence[float]
+) -> np.ndarray:
+    """Quantiles of each column within each group, same as np.nanpercentile with linear interpolation.
+
+    Args:
+        values (np.ndarray): 2D array of shape (rows, columns)
+        codes (np.ndarray): group code of each row, every group in [0, n_groups) has rows
+        n_groups (int): number of groups
+        q (Sequence[float]): quantiles in [0, 1]
+
+    Returns:
+        np.ndarray: quantiles of shape (len(q), n_groups, columns). nan for groups without values.
+    """
+    q = np.asarray(q, dtype=np.float64)
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    keys = _sort_keys(codes, n_groups)
+    out = np.full((len(q), n_groups, values.shape[1]), np.nan)
+    for i in range(values.shape[1]):
+        # sorted by value with nan last, then stably by group
+        by_value = np.argsort(values[:, i])
+        order = by_value[np.argsort(keys[by_value], kind="stable")]
+        column = values[order, i]
+        n_valid = np.add.reduceat(~np.isnan(column), starts)
+        has_values = n_valid > 0
+        position = q[:, None] * (n_valid[has_values] - 1)
+        low = np.floor(position).astype(np.intp)
+        high = np.minimum(low + 1, n_valid[has_values] - 1)
+        start = starts[has_values]
+        below, above = column[start + low], column[start + high]
+        out[:, has_values, i] = below + (above - below) * (position - low)
+    return out
+
+
+def pack_groups(groups: pd.Index) -> dict[str, np.ndarray]:
+    """Convert keys of groups to arrays of the state, see pack_values.
+
+    Args:
+        groups (pd.Index): groups
+
+    Returns:
+        dict[str, np.ndarray]: arrays groups{level}
+    """
+    state = {}
+    for level in range(groups.nlevels):
+        values = groups.get_level_values(level).to_numpy()
+        state.update(pack_values(f"groups{level}", values))
+    return state
+
+
+def unpack_groups(state: dict[str, np.ndarray], n_levels: int) -> pd.Index:
+    """Restore groups packed by pack_groups.
+
+    Args:
+        state (dict[str, np.ndarray]): arrays
+        n_levels (int): number of key columns
+
+    Returns:
+        pd.Index: groups
+    """
+    levels = [unpack_values(state, f"groups{level}") for level in range(n_levels)]
+    if n_levels == 1:
+        return pd.Index(levels[0])
+    return pd.MultiIndex.from_arrays(levels)
@@ -1,99 +1,481 @@
-from typing import Any
+from typing import Any, ClassVar
+
 import numpy as np
 import pandas as pd
 
 from learning_machine.zoo import DATA_ENGINE_ZOO
-from .engine import DataEngine
+
+from .arrow import like, numeric_values
+from .compiled import isna
+from .engine import DataEngine, Kernel
+from .engine_type import DataEngineType
+from .group import factorize_groups, sort_segments
+
+GAP_METHODS = ("constant", "ffill", "bfill", "linear", "skip")
+
+
+def find_nan_runs(block: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Runs of continuous nan in each column of 2D block, found in one pass over all columns.
+
+    Args:
+        block (np.ndarray): 2D array of shape (rows, columns)
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: column, start row and stop row (exclusive) of each run
+    """
+    n_rows, n_cols = block.shape
+    # columns are laid out one after another with a False row on both sides, so runs never cross columns
+    padded = np.zeros((n_cols, n_rows + 2), dtype=np.int8)
+    padded[:, 1:-1] = np.isnan(block).T
+    change = np.diff(padded.ravel())
+    starts = np.flatnonzero(change == 1) + 1
+    stops = np.flatnonzero(change == -1) + 1
+    width = n_rows + 2
+    return starts // width, starts % width - 1, stops % width - 1
+
+
+def run_indices(
+    starts: np.ndarray, lengths: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Indices of all elements of runs, built with repeat and cumsum instead of an arange per run.
+
+    Args:
+        starts (np.ndarray): first index of each run
+        lengths (np.ndarray): length of each run
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: indices, and position of each index in its run
+    """
+    total = int(lengths.sum())
+    run_offsets = np.cumsum(lengths) - lengths
+    positions = np.arange(total) - np.repeat(run_offsets, lengths)
+    return np.repeat(starts, lengths) + positions, positions
+
+
+def fill_nan_runs(
+    block: np.ndarray,
+    method: str | list[str] = "constant",
+    max_gap: int | None = None,
+    fillwith: Any = np.nan,
+) -> np.ndarray:
+    """Fill runs of continuous nan of a 1D array or of every column of a 2D block at once.
+
+    Methods:
+        - constant: fill with fillwith.
+        - ffill: fill with the last value before the run.
+        - bfill: fill with the first value after the run.
+        - linear: interpolate linearly between the values around the run.
+        - skip: keep the run.
+
+    Runs longer than max_gap are kept, and so are runs at the start (ffill, linear) or end (bfill, linear)
+    of a column, which have no value to fill from.
+
+    Args:
+        block (np.ndarray): 1D array, or 2D array of shape (rows, columns)
+        method (str | list[str], optional): fill method, or fill method of each column. Defaults to "constant".
+        max_gap (int | None, optional): longest run to fill. If None, every run is filled. Defaults to None.
+        fillwith (Any, optional): fill value of constant, or fill value of each column. Defaults to np.nan.
+
+    Returns:
+        np.ndarray: filled copy of block
+    """
+    squeeze = block.ndim == 1
+    out = np.array(block.reshape(-1, 1) if squeeze else block, order="F", copy=True)
+    n_rows, n_cols = out.shape
+    if out.dtype.kind not in "fc" or out.size == 0:
+        return out.ravel() if squeeze else out
+
+    cols, starts, stops = find_nan_runs(out)
+    lengths = stops - starts
+    keep = np.ones(len(starts), dtype=bool) if max_gap is None else lengths <= max_gap
+    methods = [method] * n_cols if isinstance(method, str) else list(method)
+    for name in set(methods):
+        if name not in GAP_METHODS:
+            raise ValueError(f"method must be one of {GAP_METHODS}, but {name}")
+
+    flat = out.ravel(order="F")  # view of F-ordered out
+    col_offsets = np.arange(n_cols) * n_rows
+    for name in set(methods) - {"skip"}:
+        in_method = np.array([m == name for m in methods])[cols]
+        if name in ("ffill", "linear"):
+            in_method &= starts > 0
+        if name in ("bfill", "linear"):
+            in_method &= stops < n_rows
+        selected = keep & in_method
+        c, start, length = cols[selected], starts[selected], lengths[selected]
+        if len(c) == 0:
+            continue
+        idx, positions = run_indices(col_offsets[c] + start, length)
+        if name == "constant":
+            values = np.broadcast_to(np.asarray(fillwith, dtype=out.dtype), (n_cols,))
+            flat[idx] = np.repeat(values[c], length)
+            continue
+        before = flat[col_offsets[c] + start - 1] if name != "bfill" else None
+        after = flat[col_offsets[c] + start + length] if name != "ffill" else None
+        if name == "ffill":
+            flat[idx] = np.repeat(before, length)
+        elif name == "bfill":
+            flat[idx] = np.repeat(after, length)
+        else:
+            step = (after - before) / (length + 1)
+            flat[idx] = np.repeat(before, length) + np.repeat(step, length) * (
+                positions + 1
+            )
+    return flat if squeeze else out
 
 
 class NdFillSinkHole(DataEngine):
     """Fill continuous nan value."""
 
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.NDArr]
+
     def __init__(self, length: int, fillwith: Any):
         self.length = length
         self.fillwith = fillwith
 
     def __call__(self, data: np.ndarray) -> np.ndarray:
-        arr = data.copy()
-
-        not_nan_mask = ~np.isnan(arr)
-        not_nan_mask = np.concatenate(([True], not_nan_mask, [True]))
-        range_arr = np.flatnonzero(not_nan_mask[1:] != not_nan_mask[:-1]).reshape(-1, 2)
+        # intervals shorter than length are filled
+        return fill_nan_runs(data, "constant", self.length - 1, self.fillwith)
 
-        fill_range = range_arr[range_arr[:, 1] - range_arr[:, 0] < self.length]
-        concat_arr = [np.arange(x[0], x[1]) for x in fill_range]
-        if len(concat_arr) == 0:
-            return arr
-        idxs = np.concatenate(concat_arr)
-        arr[idxs] = self.fillwith
-        return arr
+    def row_context(self) -> int:
+        # a nan interval is filled if shorter than length, so length rows beyond a row decide it
+        return self.length
 
 
 @DATA_ENGINE_ZOO.regist()
 class FillSinkHole(NdFillSinkHole):
-    """Fill in the interval where nan value appear continuously with specific value."""
+    """Fill in the interval where nan value appear continuously with specific value.
+    With by, intervals are measured within the rows of each group, e.g. each sensor of a long-format table.
+    """
+
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.SIDE_EFFECT]
 
-    def __init__(self, col: str, length: int, fillwith: Any):
+    def __init__(
+        self,
+        col: str,
+        length: int,
+        fillwith: Any,
+        by: str | list[str] | None = None,
+    ):
         """
         Args:
             col (str): target column
             length (int): interval length
             fillwith (Any): fill value
-            name (str, optional): . Defaults to "".
+            by (str | list[str] | None, optional): group columns. If set, intervals do not continue across rows of different groups. Defaults to None.
         """
         super().__init__(length, fillwith)
         self.col = col
+        self.by = [by] if isinstance(by, str) else list(by or [])
+        self._carry: pd.DataFrame | None = None
+        self._n_context = 0
+
+    def _fill(self, arr: np.ndarray, keys: list) -> np.ndarray:
+        """Fill intervals of arr, within the groups of keys if by is set."""
+        if not self.by:
+            return NdFillSinkHole.__call__(self, arr)
+        codes, groups = factorize_groups(keys)
+        order, starts, _ = sort_segments(codes, len(groups))
+        # a value inserted between the blocks of groups ends intervals at the group boundaries
+        boundaries = starts[1:]
+        blocks = np.insert(arr[order], boundaries, 0.0)
+        fill = NdFillSinkHole.__call__(self, blocks)
+        fill = np.delete(fill, boundaries + np.arange(len(boundaries)))
+        out = np.empty_like(fill)
+        out[order] = fill
+        return out
 
     def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
-        arr = data[self.col].to_numpy()
-        fill = super().__call__(arr)
-        data[self.col] = fill
+        arr = numeric_values(data[self.col])
+        fill = self._fill(arr, [data[col] for col in self.by])
+        data[self.col] = like(fill, data[self.col])
         return data
 
+    def compile_step(self) -> Kernel:
+        def kernel(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+            arr = columns[self.col].astype(np.float64, copy=False)
+            columns[self.col] = self._fill(arr, [columns[col] for col in self.by])
+            return columns
+
+        return kernel
+
+    def row_context(self) -> int | None:
+        if self.by:
+            # rows of a group can be anywhere in the data
+            return None
+        return super().row_context()
+
+    def stream_step(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Hold back the trailing nan interval until it ends or becomes longer than length.
+        The last length rows already returned are kept as context, so an interval spanning chunks is measured in full.
+        With by, all rows are held until stream_end.
+        """
+        if self._carry is not None:
+            data = pd.concat([self._carry, data])
+        n_context = self._n_context
+        if self.by:
+            self._carry = data
+            return data.iloc[:0]
+
+        nan_mask = np.isnan(numeric_values(data[self.col]))
+        hold = len(data)
+        if nan_mask[-1]:
+            not_nan = np.flatnonzero(~nan_mask)
+            start = not_nan[-1] + 1 if len(not_nan) else 0
+            if hold - start < self.length:
+                hold = max(start, n_context)
+
+        context_start = max(hold - self.length, 0)
+        self._carry = data.iloc[context_start:]
+        self._n_context = hold - context_start
+        return self._fill_rows(data, n_context, hold)
+
+    def stream_end(self) -> pd.DataFrame | None:
+        carry, n_context = self._carry, self._n_context
+        self._carry = None
+        self._n_context = 0
+        if carry is None or len(carry) == n_context:
+            return None
+        return self._fill_rows(carry, n_context, len(carry))
+
+    def _fill_rows(self, data: pd.DataFrame, start: int, stop: int) -> pd.DataFrame:
+        keys = [data[col].iloc[:stop] for col in self.by]
+        fill = self._fill(numeric_values(data[self.col])[:stop], keys)
+        rows = data.iloc[start:stop].copy()
+        rows[self.col] = like(fill[start:], rows[self.col])
+        return rows
+
+
+class NdFillGaps(DataEngine):
+    """Fill runs of continuous nan of every column of a 2D array at once, see fill_nan_runs."""
+
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.NDArr]
+
+    def __init__(
+        self,
+        method: str | list[str] = "linear",
+        max_gap: int | None = None,
+        fillwith: Any = np.nan,
+    ):
+        self.method = method
+        self.max_gap = max_gap
+        self.fillwith = fillwith
+
+    def __call__(self, data: np.ndarray) -> np.ndarray:
+        return fill_nan_runs(data, self.method, self.max_gap, self.fillwith)
+
+    def _methods(self) -> list[str]:
+        return [self.method] if isinstance(self.method, str) else list(self.method)
+
+    def row_context(self) -> int | None:
+        # a run is filled if at most max_gap long, so max_gap + 1 rows beyond a row decide it
+        if set(self._methods()) <= {"skip"}:
+            return 0
+        if self.max_gap is None:
+            return 0 if set(self._methods()) <= {"constant", "skip"} else None
+        return self.max_gap + 1
+
+
+@DATA_ENGINE_ZOO.regist()
+class FillGaps(NdFillGaps):
+    """Fill runs of continuous nan of many columns in one pass.
+
+    Each run of at most max_gap rows is filled with a constant, the value before (ffill) or after (bfill) it,
+    or interpolated linearly between them. Longer runs are kept.
+
+    Example:
+        ```yaml
+        - FillGaps:
+            cols: [temperature, humidity, pressure]
+            method: {temperature: linear, humidity: ffill, pressure: constant}
+            max_gap: 5
+            fillwith: {pressure: 1013.0}
+        ```
+    """
+
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.SIDE_EFFECT]
+
+    def __init__(
+        self,
+        cols: list[str],
+        method: str | dict[str, str] = "linear",
+        max_gap: int | None = None,
+        fillwith: Any | dict[str, Any] = np.nan,
+    ):
+        """
+        Args:
+            cols (list[str]): target columns
+            method (str | dict[str, str], optional): constant, ffill, bfill, linear or skip, or {column: method}. Columns not in the dict are skipped. Defaults to "linear".
+            max_gap (int | None, optional): longest run to fill. If None, every run is filled. Defaults to None.
+            fillwith (Any | dict[str, Any], optional): fill value of constant, or {column: fill value}. Defaults to np.nan.
+        """
+        if isinstance(method, dict):
+            method = [method.get(col, "skip") for col in cols]
+        if isinstance(fillwith, dict):
+            fillwith = [fillwith.get(col, np.nan) for col in cols]
+        super().__init__(method, max_gap, fillwith)
+        self.cols = cols
+        self._carry: pd.DataFrame | None = None
+        self._n_context = 0
+
+    def input_columns(self) -> list[str]:
+        return list(self.cols)
+
+    def output_columns(self) -> list[str]:
+        return list(self.cols)
+
+    def input_dtypes(self) -> dict[str, str]:
+        return {col: "float64" for col in self.cols}
+
+    def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
+        return self._fill_rows(data, 0, len(data), copy=False)
+
+    def compile_step(self) -> Kernel:
+        def kernel(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+            block = np.column_stack(
+                [columns[col].astype(np.float64, copy=False) for col in self.cols]
+            )
+            fill = NdFillGaps.__call__(self, block)
+            for i, col in enumerate(self.cols):
+                columns[col] = fill[:, i]
+            return columns
+
+        return kernel
+
+    def stream_step(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Hold back the last row_context rows, whose runs may continue in the next chunk.
+        row_context rows already returned are kept as context, so a run spanning chunks is filled in full.
+        """
+        context = self.row_context()
+        if context == 0:
+            return self(data)
+        if self._carry is not None:
+            data = pd.concat([self._carry, data])
+        n_context = self._n_context
+        if context is None:
+            # unlimited runs filled from values around them, the whole stream is needed
+            self._carry, self._n_context = data, n_context
+            return data.iloc[:0]
+
+        hold = max(len(data) - context, n_context)
+        context_start = max(hold - context, 0)
+        self._carry = data.iloc[context_start:]
+        self._n_context = hold - context_start
+        return self._fill_rows(data, n_context, hold)
+
+    def stream_end(self) -> pd.DataFrame | None:
+        carry, n_context = self._carry, self._n_context
+        self._carry = None
+        self._n_context = 0
+        if carry is None or len(carry) == n_context:
+            return None
+        return self._fill_rows(carry, n_context, len(carry))
+
+    def _fill_rows(
+        self, data: pd.DataFrame, start: int, stop: int, copy: bool = True
+    ) -> pd.DataFrame:
+        """Fill runs over all rows of data, and return rows [start, stop)."""
+        values = [numeric_values(data[col]) for col in self.cols]
+        block = np.empty(
+            (len(data), len(self.cols)), dtype=np.result_type(*values), order="F"
+        )
+        for i, arr in enumerate(values):
+            block[:, i] = arr
+        fill = NdFillGaps.__call__(self, block)
+        rows = data.iloc[start:stop].copy() if copy else data
+        for i, col in enumerate(self.cols):
+            rows[col] = like(fill[start:stop, i].astype(values[i].dtype), rows[col])
+        return rows
+
 
 @DATA_ENGINE_ZOO.regist()
 class DropNARow(DataEngine):
     """Drop rows contain missing value in specific columns."""
 
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.DROP_ROWS]
+
     def __init__(self, cols: list[str], copy=True):
         """
         Args:
             cols (list[str]): columns to drop nan values
-            copy (bool, optional): copy new dataframe and process. Defaults to True.
+            copy (bool, optional): kept for compatibility. dropna always returns a new dataframe, so the input is never modified. Defaults to True.
         """
         self.columns = cols
         self.copy = copy
 
     def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
-        if self.copy:
-            data = data.copy()
-
         return data.dropna(subset=self.columns)
 
+    def compile_step(self) -> Kernel:
+        def kernel(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+            keep = ~np.logical_or.reduce([isna(columns[col]) for col in self.columns])
+            return {name: arr[keep] for name, arr in columns.items()}
+
+        return kernel
+
 
 @DATA_ENGINE_ZOO.regist()
 class FillNaWithValue(DataEngine):
     """Fill nan rows with specific value."""
 
-    def __init__(self, cols: list[str], fillwith):
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.SIDE_EFFECT]
+
+    def __init__(self, cols: list[str], fillwith: Any | dict[str, Any]):
         """
         Args:
             cols (list[str]): columns to fill
-            fillwith (_type_): fill value
+            fillwith (Any | dict[str, Any]): fill value, or {column: fill value}
         """
         self.cols = cols
         self.fillwith = fillwith
 
+    def _fillers(self) -> dict[str, Any]:
+        if isinstance(self.fillwith, dict):
+            return {col: self.fillwith[col] for col in self.cols}
+        return {col: self.fillwith for col in self.cols}
+
     def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
-        filler = {col: self.fillwith for col in self.cols}
-        data.fillna(value=filler, inplace=True)
+        filler = self._fillers()
+        # numpy float columns of a dtype are filled as one 2D block with a row of fill values
+        blocks: dict[np.dtype, list[str]] = {}
+        for col, value in filler.items():
+            dtype = data[col].dtype
+            if (
+                isinstance(dtype, np.dtype)
+                and dtype.kind == "f"
+                and isinstance(value, (int, float, np.number))
+                and not isinstance(value, bool)
+            ):
+                blocks.setdefault(dtype, []).append(col)
+        for dtype, cols in blocks.items():
+            if len(cols) < 2:
+                continue
+            block = data[cols].to_numpy(dtype=dtype, copy=True)
+            values = np.array([filler.pop(col) for col in cols], dtype=dtype)
+            np.copyto(
+                block, np.broadcast_to(values, block.shape), where=np.isnan(block)
+            )
+            data[cols] = block
+        if filler:
+            data.fillna(value=filler, inplace=True)
         return data
 
+    def compile_step(self) -> Kernel:
+        def kernel(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+            for col, value in self._fillers().items():
+                arr = columns[col]
+                columns[col] = np.where(isna(arr), value, arr)
+            return columns
+
+        return kernel
+
 
 @DATA_ENGINE_ZOO.regist()
 class FillNaFrom(DataEngine):
     """Fill nan value from another column."""
 
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.SIDE_EFFECT]
+
     def __init__(self, col: str, from_col: str):
         """
         Args:
@@ -106,3 +488,11 @@ class FillNaFrom(DataEngine):
     def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
         data[self.col] = data[self.col].fillna(data[self.from_col], inplace=False)
         return data
+
+    def compile_step(self) -> Kernel:
+        def kernel(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+            arr = columns[self.col]
+            columns[self.col] = np.where(isna(arr), columns[self.from_col], arr)
+            return columns
+
+        return kernel
@@ -1,119 +1,589 @@
-import sklearn.preprocessing as sk_processing
-from learning_machine.engine import DataEngine
-from learning_machine.zoo import DATA_ENGINE_ZOO
+from __future__ import annotations
+
+from abc import abstractmethod
+
+import numpy as np
 import pandas as pd
 
+from learning_machine.engine import DataEngine, DataEngineType
+from learning_machine.zoo import DATA_ENGINE_ZOO
+
+from .arrow import is_arrow, like, numeric_values
+from .engine import Kernel
+from .group import (
+    factorize_groups,
+    group_positions,
+    lookup_groups,
+    lookup_positions,
+    pack_groups,
+    segment_quantiles,
+    sort_segments,
+    unpack_groups,
+)
+from .sketch import KLLSketch
+
+
+def _handle_zeros(scale: np.ndarray) -> np.ndarray:
+    """Constant columns are not scaled, same as scikit-learn."""
+    scale = scale.copy()
+    scale[(scale == 0) | np.isnan(scale)] = 1.0
+    return scale
+
+
+def _grow(stats: np.ndarray, n_groups: int, fill: float) -> np.ndarray:
+    """Append rows of new groups to statistics of shape (groups, columns)."""
+    if len(stats) == n_groups:
+        return stats
+    grown = np.full((n_groups, stats.shape[1]), fill)
+    grown[: len(stats)] = stats
+    return grown
+
+
+def _moments(values: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Count, mean and sum of squared deviations of each column, ignoring nan."""
+    nan_mask = np.isnan(values)
+    if nan_mask.any():
+        n = (~nan_mask).sum(axis=0).astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.nansum(values, axis=0) / n
+        m2 = np.nansum((values - mean) ** 2, axis=0)
+    else:
+        n = np.full(values.shape[1], len(values), dtype=np.float64)
+        mean = values.mean(axis=0)
+        m2 = ((values - mean) ** 2).sum(axis=0)
+    return n, np.nan_to_num(mean), m2
+
+
+def _segment_moments(
+    values: np.ndarray, codes: np.ndarray, n_groups: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Same as _moments within each group, with weighted bincount over the group codes."""
+    n = np.empty((n_groups, values.shape[1]))
+    mean = np.empty((n_groups, values.shape[1]))
+    m2 = np.empty((n_groups, values.shape[1]))
+    for i in range(values.shape[1]):
+        column = values[:, i]
+        valid = ~np.isnan(column)
+        n[:, i] = np.bincount(codes, weights=valid, minlength=n_groups)
+        column = np.where(valid, column, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean[:, i] = np.nan_to_num(
+                np.bincount(codes, weights=column, minlength=n_groups) / n[:, i]
+            )
+        deviation = np.where(valid, column - mean[codes, i], 0.0)
+        m2[:, i] = np.bincount(codes, weights=deviation**2, minlength=n_groups)
+    return n, mean, m2
+
+
+def _merge_moments(
+    n_a: np.ndarray,
+    mean_a: np.ndarray,
+    m2_a: np.ndarray,
+    n_b: np.ndarray,
+    mean_b: np.ndarray,
+    m2_b: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Merge moments of two batches with Chan's parallel algorithm."""
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = np.where(n > 0, n_b / n, 0.0)
+    return n, mean_a + delta * ratio, m2_a + m2_b + delta**2 * n_a * ratio
+
+
+class _Scaler(DataEngine):
+    """Scale the target columns as one 2D block: out = (x - offset) / scale.
+
+    Statistics are computed for all columns at once in float64, and the transform is applied
+    in a single vectorized pass into one output buffer.
+
+    With by columns, statistics are fitted per group with segmented reductions over rows sorted
+    by group code, and kept as arrays of shape (groups + 1, columns). The last row holds the
+    statistics of all data, used for groups unseen in fit.
+    """
+
+    def __init__(
+        self,
+        cols: list[str],
+        return_new: bool,
+        prefix: str,
+        dtype: str | None = None,
+        by: str | list[str] | None = None,
+    ):
+        self.cols = cols
+        self.fit = False
+        self.return_new = return_new
+        self.prefix = prefix
+        self.dtype = dtype
+        self.by = [by] if isinstance(by, str) else list(by or [])
+        self.groups: pd.Index | None = None
+        self.engine_type = [
+            DataEngineType.RETURN_NEW_PD if return_new else DataEngineType.SIDE_EFFECT
+        ]
+
+        self.offset = np.zeros(len(cols))
+        self.scale = np.ones(len(cols))
+
+    def is_fitted(self) -> bool:
+        return self.fit
+
+    def output_columns(self) -> list[str]:
+        if self.return_new:
+            return [f"{self.prefix}_{col}" for col in self.cols]
+        return list(self.cols)
+
+    def _fit_groups(self, data: pd.DataFrame) -> tuple[np.ndarray, np.ndarray] | None:
+        """Factorize groups of data, and add groups not seen yet to self.groups.
+
+        Args:
+            data (pd.DataFrame): data
+
+        Returns:
+            tuple[np.ndarray, np.ndarray] | None: code of each row in the groups of data, and position of these groups in self.groups. None without by.
+        """
+        if not self.by:
+            return None
+        codes, groups = factorize_groups([data[col] for col in self.by])
+        if self.groups is None:
+            self.groups = groups
+            return codes, np.arange(len(groups))
+        positions = self.groups.get_indexer(groups)
+        new = positions < 0
+        if new.any():
+            positions[new] = len(self.groups) + np.arange(new.sum())
+            self.groups = self.groups.append(groups[new])
+        return codes, positions
+
+    def _group_codes(self, columns: pd.DataFrame | dict) -> np.ndarray | None:
+        """Codes of rows in fitted groups, -1 for unseen groups. None without by."""
+        if not self.by:
+            return None
+        return lookup_groups([columns[col] for col in self.by], self.groups)
+
+    def _stack_groups(self, stats: np.ndarray, group_stats: np.ndarray) -> np.ndarray:
+        """Statistics of groups followed by statistics of all data. Same as stats without by."""
+        if not self.by:
+            return stats
+        return np.vstack([group_stats, stats])
+
+    def _groups_state(self) -> dict[str, np.ndarray]:
+        if not self.by:
+            return {}
+        return pack_groups(self.groups)
+
+    def _set_groups_state(self, state: dict[str, np.ndarray]) -> None:
+        if self.by:
+            self.groups = unpack_groups(state, len(self.by))
+
+    def input_dtypes(self) -> dict[str, str]:
+        if self.return_new:
+            return {}
+        # the columns are read as float64 and replaced by the scaled values
+        return {col: "float64" for col in self.cols}
+
+    def _values(self, data: pd.DataFrame) -> np.ndarray:
+        columns = [data[col] for col in self.cols]
+        if not any(is_arrow(column) for column in columns):
+            # no copy when the columns are already a float64 block
+            return data[self.cols].to_numpy(dtype=np.float64)
+        values = np.empty((len(data), len(self.cols)), dtype=np.float64, order="F")
+        for i, column in enumerate(columns):
+            values[:, i] = numeric_values(column)
+        return values
+
+    @abstractmethod
+    def _fit_values(
+        self, values: np.ndarray, groups: tuple[np.ndarray, np.ndarray] | None
+    ) -> None:
+        """Fit statistics with the whole data, and with each group if groups (see _fit_groups) is given."""
+
+    def transform_values(
+        self,
+        values: np.ndarray,
+        out: np.ndarray | None = None,
+        codes: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """Scale 2D block of the target columns.
+
+        Args:
+            values (np.ndarray): values with shape (rows, len(cols))
+            out (np.ndarray | None, optional): output buffer, e.g. float32 block. If None, allocate with dtype. Defaults to None.
+            codes (np.ndarray | None, optional): group code of each row with by, -1 for unseen groups. Defaults to None.
+
+        Returns:
+            np.ndarray: scaled values
+        """
+        if out is None:
+            dtype = self.dtype_policy.float_dtype(self.dtype)
+            out = np.empty(values.shape, dtype=dtype, order="F")
+        offset, scale = self.offset, self.scale
+        if codes is not None:
+            # code -1 of unseen groups takes the last row, the statistics of all data
+            offset, scale = offset[codes], scale[codes]
+        np.subtract(values, offset, out=out, casting="same_kind")
+        np.divide(out, scale.astype(out.dtype), out=out)
+        return out
+
+    def compile_step(self) -> Kernel:
+        # groups are looked up in a dict, pandas indexing costs more than a few records
+        positions = group_positions(self.groups) if self.by else None
+
+        def kernel(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+            values = np.column_stack([columns[col] for col in self.cols])
+            codes = None
+            if positions is not None:
+                codes = lookup_positions([columns[col] for col in self.by], positions)
+            scaled = self.transform_values(
+                values.astype(np.float64, copy=False), codes=codes
+            )
+            if self.return_new:
+                return dict(zip(self.output_columns(), scaled.T))
+            for i, col in enumerate(self.cols):
+                columns[col] = scaled[:, i]
+            return columns
+
+        return kernel
+
+    def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
+        values = self._values(data)
+        groups = None
+        if not self.fit:
+            self.groups = None
+            groups = self._fit_groups(data)
+            self._fit_values(values, groups)
+            self.fit = True
+        codes = self._group_codes(data) if groups is None else groups[1][groups[0]]
+        scaled = self.transform_values(values, codes=codes)
+
+        if self.return_new:
+            return pd.DataFrame(
+                scaled, columns=self.output_columns(), index=data.index, copy=False
+            )
+
+        for i, col in enumerate(self.cols):
+            data[col] = like(scaled[:, i], data[col])
+        return data
+
 
 @DATA_ENGINE_ZOO.regist()
-class StandardScaler(DataEngine):
-    """Standard scaler from scikit-learn."""
+class StandardScaler(_Scaler):
+    """Standardize columns with mean and standard deviation, same as scikit-learn StandardScaler. nan values are ignored in fit."""
 
-    def __init__(self, cols: list[str], return_new=False, prefix="standard_scale"):
+    def __init__(
+        self,
+        cols: list[str],
+        return_new=False,
+        prefix="standard_scale",
+        dtype: str | None = None,
+        by: str | list[str] | None = None,
+    ):
         """
         Args:
             cols (list[str]): target columns
             return_new (bool, optional): return new scaled dataframe. If False, modify original dataframe. Defaults to False.
             prefix (str, optional): prefix of new dataframe. Valid when return_new is True. Defaults to "standard_scale".
+            dtype (str | None, optional): dtype of scaled values, "float32" or "float64". If None, float dtype of the dtype policy (float64 without policy). Defaults to None.
+            by (str | list[str] | None, optional): group columns. If set, fit and transform each group with its own statistics, and groups unseen in fit with the statistics of all data. Defaults to None.
         """
-        self.cols = cols
-        self.fit = False
-        self.return_new = return_new
-        self.prefix = prefix
+        super().__init__(cols, return_new, prefix, dtype, by)
+        self.n = np.zeros(len(cols))
+        self.mean = np.zeros(len(cols))
+        self.m2 = np.zeros(len(cols))
+        self.group_n = np.zeros((0, len(cols)))
+        self.group_mean = np.zeros((0, len(cols)))
+        self.group_m2 = np.zeros((0, len(cols)))
 
-        self.norm_engines = {}
-        for col in cols:
-            self.norm_engines[col] = sk_processing.StandardScaler()
+    def _update_scale(self) -> None:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(
+                self._stack_groups(self.m2, self.group_m2)
+                / self._stack_groups(self.n, self.group_n)
+            )
+        self.offset = self._stack_groups(self.mean, self.group_mean)
+        self.scale = _handle_zeros(std)
 
-    def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
-        scaled = {}
-        if self.fit:
-            for col, engine in self.norm_engines.items():
-                scaled[col] = engine.transform(data[col].to_numpy().reshape(-1, 1))
-            return data
-        for col, engine in self.norm_engines.items():
-            scaled[col] = engine.fit_transform(data[col].to_numpy().reshape(-1, 1))
+    def _fit_values(
+        self, values: np.ndarray, groups: tuple[np.ndarray, np.ndarray] | None
+    ) -> None:
+        self.n = np.zeros(len(self.cols))
+        self.mean = np.zeros(len(self.cols))
+        self.m2 = np.zeros(len(self.cols))
+        self.group_n = np.zeros((0, len(self.cols)))
+        self.group_mean = np.zeros((0, len(self.cols)))
+        self.group_m2 = np.zeros((0, len(self.cols)))
+        self._merge_values(values, groups)
+
+    def _merge_values(
+        self, values: np.ndarray, groups: tuple[np.ndarray, np.ndarray] | None
+    ) -> None:
+        self.n, self.mean, self.m2 = _merge_moments(
+            self.n, self.mean, self.m2, *_moments(values)
+        )
+        if groups is not None and len(values):
+            codes, positions = groups
+            n_groups = len(self.groups)
+            self.group_n = _grow(self.group_n, n_groups, 0.0)
+            self.group_mean = _grow(self.group_mean, n_groups, 0.0)
+            self.group_m2 = _grow(self.group_m2, n_groups, 0.0)
+            n, mean, m2 = _merge_moments(
+                self.group_n[positions],
+                self.group_mean[positions],
+                self.group_m2[positions],
+                *_segment_moments(values, codes, len(positions)),
+            )
+            self.group_n[positions] = n
+            self.group_mean[positions] = mean
+            self.group_m2[positions] = m2
+        self._update_scale()
+
+    def partial_fit(self, data: pd.DataFrame) -> None:
+        """Update mean and variance with a batch of data.
+        Running statistics are merged with Chan's parallel algorithm, so the result matches fitting all batches at once.
+        Transform uses the statistics of all batches seen so far.
+
+        Args:
+            data (pd.DataFrame): batch of data
+        """
+        if len(data) == 0:
+            # empty chunks, e.g. after DropNARow, change no statistics
+            return
+        self._merge_values(self._values(data), self._fit_groups(data))
         self.fit = True
-        if self.return_new:
-            dfdata = {f"{self.prefix}_{k}": v for k, v in scaled.items()}
-            return pd.DataFrame(dfdata, index=data.index)
 
-        for col, v in scaled.items():
-            data[col] = v
-        return data
+    def get_state(self) -> dict[str, np.ndarray]:
+        if not self.fit:
+            return {}
+        state = {"n": self.n, "mean": self.mean, "m2": self.m2}
+        if self.by:
+            state.update(
+                group_n=self.group_n, group_mean=self.group_mean, group_m2=self.group_m2
+            )
+        return {**state, **self._groups_state()}
+
+    def set_state(self, state: dict[str, np.ndarray]) -> None:
+        self.n = np.array(state["n"])
+        self.mean = np.array(state["mean"])
+        self.m2 = np.array(state["m2"])
+        if self.by:
+            self.group_n = np.array(state["group_n"])
+            self.group_mean = np.array(state["group_mean"])
+            self.group_m2 = np.array(state["group_m2"])
+        self._set_groups_state(state)
+        self._update_scale()
+        self.fit = True
 
 
 @DATA_ENGINE_ZOO.regist()
-class RobustScaler(DataEngine):
-    """RobustScaler from scikit-learn."""
+class RobustScaler(_Scaler):
+    """Scale columns with median and IQR, same as scikit-learn RobustScaler. With sketch_error, fit median and IQR with mergeable quantile sketches."""
 
-    def __init__(self, cols: list[str], return_new=False, prefix="robust_scale"):
+    def __init__(
+        self,
+        cols: list[str],
+        return_new=False,
+        prefix="robust_scale",
+        sketch_error: float | None = None,
+        dtype: str | None = None,
+        by: str | list[str] | None = None,
+    ):
         """
         Args:
             cols (list[str]): target columns
             return_new (bool, optional): return new scaled dataframe. If False, modify original dataframe. Defaults to False.
             prefix (str, optional): prefix of new dataframe. Valid when return_new is True. Defaults to "robust_scale".
+            sketch_error (float | None, optional): rank error of quantile sketches, e.g. 0.01. If set, fit with bounded memory KLL sketches that support partial_fit and merge. If None, fit exact quantiles. Defaults to None.
+            dtype (str | None, optional): dtype of scaled values, "float32" or "float64". If None, float dtype of the dtype policy (float64 without policy). Defaults to None.
+            by (str | list[str] | None, optional): group columns. If set, fit and transform each group with its own statistics, and groups unseen in fit with the statistics of all data. Can not be used with sketch_error. Defaults to None.
         """
-        self.cols = cols
-        self.fit = False
-        self.return_new = return_new
-        self.prefix = prefix
+        if by and sketch_error is not None:
+            raise ValueError(
+                "RobustScaler with by fits exactly, sketch_error can not be set"
+            )
+        super().__init__(cols, return_new, prefix, dtype, by)
+        self.sketch_error = sketch_error
+        self.sketches: list[KLLSketch] = []
+        if sketch_error is not None:
+            self.sketches = [KLLSketch.from_error(sketch_error) for _ in cols]
 
-        self.norm_engines = {}
-        for col in cols:
-            self.norm_engines[col] = sk_processing.RobustScaler()
+    def _set_quantiles(
+        self, q1: np.ndarray, median: np.ndarray, q3: np.ndarray
+    ) -> None:
+        self.offset = median
+        self.scale = _handle_zeros(q3 - q1)
 
-    def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
-        scaled = {}
-        if self.fit:
-            for col, engine in self.norm_engines.items():
-                scaled[col] = engine.transform(data[col].to_numpy().reshape(-1, 1))
-            return data
-        for col, engine in self.norm_engines.items():
-            scaled[col] = engine.fit_transform(data[col].to_numpy().reshape(-1, 1))
+    def _update_sketch_stats(self) -> None:
+        quantiles = np.array(
+            [sketch.quantile(np.array([0.25, 0.5, 0.75])) for sketch in self.sketches]
+        )
+        self._set_quantiles(quantiles[:, 0], quantiles[:, 1], quantiles[:, 2])
+
+    def _fit_values(
+        self, values: np.ndarray, groups: tuple[np.ndarray, np.ndarray] | None
+    ) -> None:
+        if self.sketch_error is not None:
+            for i, sketch in enumerate(self.sketches):
+                sketch.update(values[:, i])
+            self._update_sketch_stats()
+            return
+        q1, median, q3 = np.nanpercentile(values, [25, 50, 75], axis=0)
+        if groups is not None:
+            # groups of a fit without partial_fit are in order of self.groups
+            codes, positions = groups
+            group_q1, group_median, group_q3 = segment_quantiles(
+                values, codes, len(positions), [0.25, 0.5, 0.75]
+            )
+            q1 = self._stack_groups(q1, group_q1)
+            median = self._stack_groups(median, group_median)
+            q3 = self._stack_groups(q3, group_q3)
+        self._set_quantiles(q1, median, q3)
+
+    def supports_partial_fit(self) -> bool:
+        return self.sketch_error is not None
+
+    def partial_fit(self, data: pd.DataFrame) -> None:
+        """Update quantile sketches with a batch of data. Valid when sketch_error is set.
+
+        Args:
+            data (pd.DataFrame): batch of data
+        """
+        if self.sketch_error is None:
+            raise ValueError(
+                "RobustScaler fits exactly with the whole data. set sketch_error to fit incrementally"
+            )
+        if len(data) == 0:
+            return
+        self._fit_values(self._values(data), None)
         self.fit = True
-        if self.return_new:
-            dfdata = {f"{self.prefix}_{k}": v for k, v in scaled.items()}
-            return pd.DataFrame(dfdata, index=data.index)
 
-        for col, v in scaled.items():
-            data[col] = v
-        return data
+    def merge(self, other: RobustScaler) -> None:
+        """Merge sketches of other scaler fitted on another shard of data.
+
+        Args:
+            other (RobustScaler): scaler fitted with sketch_error
+        """
+        if self.sketch_error is None or other.sketch_error is None:
+            raise ValueError("only RobustScaler with sketch_error can be merged")
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+        self._update_sketch_stats()
+        self.fit = self.fit or other.fit
+
+    def get_state(self) -> dict[str, np.ndarray]:
+        if not self.fit:
+            return {}
+        state = {"center": self.offset, "scale": self.scale, **self._groups_state()}
+        for i, sketch in enumerate(self.sketches):
+            for name, value in sketch.to_dict().items():
+                state[f"sketch{i}.{name}"] = value
+        return state
+
+    def set_state(self, state: dict[str, np.ndarray]) -> None:
+        self.offset = np.array(state["center"])
+        self.scale = np.array(state["scale"])
+        self._set_groups_state(state)
+        if self.sketch_error is not None:
+            self.sketches = [
+                KLLSketch.from_dict(
+                    {
+                        name.split(".", 1)[1]: value
+                        for name, value in state.items()
+                        if name.startswith(f"sketch{i}.")
+                    }
+                )
+                for i in range(len(self.cols))
+            ]
+        self.fit = True
 
 
 @DATA_ENGINE_ZOO.regist()
-class MinMaxScaler(DataEngine):
-    """MinMaxScaler from scikit-learn."""
+class MinMaxScaler(_Scaler):
+    """Scale columns into [0, 1] with min and max, same as scikit-learn MinMaxScaler. nan values are ignored in fit."""
 
-    def __init__(self, cols: list[str], return_new=False, prefix="min_max_scale"):
+    def __init__(
+        self,
+        cols: list[str],
+        return_new=False,
+        prefix="min_max_scale",
+        dtype: str | None = None,
+        by: str | list[str] | None = None,
+    ):
         """
         Args:
-            cols (list[str]): _description_
+            cols (list[str]): target columns
             return_new (bool, optional): return new scaled dataframe. If False, modify original dataframe. Defaults to False.
             prefix (str, optional): prefix of new dataframe. Valid when return_new is True. Defaults to "min_max_scale".
+            dtype (str | None, optional): dtype of scaled values, "float32" or "float64". If None, float dtype of the dtype policy (float64 without policy). Defaults to None.
+            by (str | list[str] | None, optional): group columns. If set, fit and transform each group with its own statistics, and groups unseen in fit with the statistics of all data. Defaults to None.
         """
-        self.cols = cols
-        self.fit = False
-        self.return_new = return_new
-        self.prefix = prefix
+        super().__init__(cols, return_new, prefix, dtype, by)
+        self.data_min = np.full(len(cols), np.inf)
+        self.data_max = np.full(len(cols), -np.inf)
+        self.group_min = np.zeros((0, len(cols)))
+        self.group_max = np.zeros((0, len(cols)))
 
-        self.norm_engines = {}
-        for col in cols:
-            self.norm_engines[col] = sk_processing.MinMaxScaler()
+    def _update_range(self) -> None:
+        self.offset = self._stack_groups(self.data_min, self.group_min)
+        self.scale = _handle_zeros(
+            self._stack_groups(self.data_max, self.group_max) - self.offset
+        )
 
-    def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
-        scaled = {}
-        if self.fit:
-            for col, engine in self.norm_engines.items():
-                data[col] = engine.transform(data[col].to_numpy().reshape(-1, 1))
-            return data
-        for col, engine in self.norm_engines.items():
-            data[col] = engine.fit_transform(data[col].to_numpy().reshape(-1, 1))
+    def _fit_values(
+        self, values: np.ndarray, groups: tuple[np.ndarray, np.ndarray] | None
+    ) -> None:
+        self.data_min = np.full(len(self.cols), np.inf)
+        self.data_max = np.full(len(self.cols), -np.inf)
+        self.group_min = np.zeros((0, len(self.cols)))
+        self.group_max = np.zeros((0, len(self.cols)))
+        self._merge_values(values, groups)
+
+    def _merge_values(
+        self, values: np.ndarray, groups: tuple[np.ndarray, np.ndarray] | None
+    ) -> None:
+        # fmin/fmax ignore nan without copying the values
+        self.data_min = np.fmin(self.data_min, np.fmin.reduce(values, axis=0))
+        self.data_max = np.fmax(self.data_max, np.fmax.reduce(values, axis=0))
+        if groups is not None and len(values):
+            codes, positions = groups
+            order, starts, _ = sort_segments(codes, len(positions))
+            values = values[order]
+            n_groups = len(self.groups)
+            self.group_min = _grow(self.group_min, n_groups, np.inf)
+            self.group_max = _grow(self.group_max, n_groups, -np.inf)
+            self.group_min[positions] = np.fmin(
+                self.group_min[positions], np.fmin.reduceat(values, starts, axis=0)
+            )
+            self.group_max[positions] = np.fmax(
+                self.group_max[positions], np.fmax.reduceat(values, starts, axis=0)
+            )
+        self._update_range()
+
+    def partial_fit(self, data: pd.DataFrame) -> None:
+        """Update running min and max with a batch of data.
+        Transform uses the range of all batches seen so far.
+
+        Args:
+            data (pd.DataFrame): batch of data
+        """
+        if len(data) == 0:
+            # empty chunks, e.g. after DropNARow, change no statistics
+            return
+        self._merge_values(self._values(data), self._fit_groups(data))
         self.fit = True
 
-        if self.return_new:
-            dfdata = {f"{self.prefix}_{k}": v for k, v in scaled.items()}
-            return pd.DataFrame(dfdata, index=data.index)
+    def get_state(self) -> dict[str, np.ndarray]:
+        if not self.fit:
+            return {}
+        state = {"data_min": self.data_min, "data_max": self.data_max}
+        if self.by:
+            state.update(group_min=self.group_min, group_max=self.group_max)
+        return {**state, **self._groups_state()}
 
-        for col, v in scaled.items():
-            data[col] = v
-        return data
+    def set_state(self, state: dict[str, np.ndarray]) -> None:
+        self.data_min = np.array(state["data_min"])
+        self.data_max = np.array(state["data_max"])
+        if self.by:
+            self.group_min = np.array(state["group_min"])
+            self.group_max = np.array(state["group_max"])
+        self._set_groups_state(state)
+        self._update_range()
+        self.fit = True
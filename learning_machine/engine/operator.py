@@ -1,10 +1,15 @@
-import pandas as pd
+import ast
+from typing import Any, ClassVar, Literal
+
 import numpy as np
-from typing import Literal
+import pandas as pd
 
-from .engine import DataEngine
 from learning_machine.zoo import DATA_ENGINE_ZOO
 
+from .arrow import numeric_values, operand
+from .engine import DataEngine, Kernel
+from .engine_type import DataEngineType
+
 operators = {
     "+": lambda x1, x2: x1 + x2,
     "-": lambda x1, x2: x1 - x2,
@@ -13,11 +18,36 @@ operators = {
     "//": lambda x1, x2: x1 // x2,
     "%": lambda x1, x2: x1 % x2,
 }
+_OPERATOR_UFUNCS = {
+    "+": np.add,
+    "-": np.subtract,
+    "*": np.multiply,
+    "/": np.true_divide,
+    "//": np.floor_divide,
+    "%": np.remainder,
+}
+
+
+def _operate(operator: str, x1: Any, x2: Any, float_dtype: str | None) -> Any:
+    """Apply binary operator. Float results of NumPy operands are written into a float_dtype buffer."""
+    if (
+        float_dtype is not None
+        and isinstance(x1, np.ndarray)
+        and isinstance(x2, np.ndarray)
+        and x1.dtype.kind in "biuf"
+        and x2.dtype.kind in "biuf"
+    ):
+        ufunc = _OPERATOR_UFUNCS[operator]
+        if ufunc.resolve_dtypes((x1.dtype, x2.dtype, None))[-1].kind == "f":
+            return ufunc(x1, x2, out=np.empty(len(x1), dtype=float_dtype))
+    return operators[operator](x1, x2)
 
 
 class BinaryOperator(DataEngine):
     """Binary operate with two columns. return {prefix}_{col1}_{col2} column dataframe"""
 
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.RETURN_NEW_PD]
+
     def __init__(
         self,
         col1: str,
@@ -44,12 +74,33 @@ class BinaryOperator(DataEngine):
         if not self.prefix:
             self.prefix = self.operator
 
+    def output_columns(self) -> list[str]:
+        return [f"{self.prefix}_{self.col1}_{self.col2}"]
+
     def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
-        augend = data[self.col1].to_numpy()
-        addend = data[self.col2].to_numpy()
+        if self.operator == "%":
+            augend = numeric_values(data[self.col1])
+            addend = numeric_values(data[self.col2])
+        else:
+            # arrow columns are computed with pyarrow.compute and stay arrow-backed
+            augend = operand(data[self.col1])
+            addend = operand(data[self.col2])
+
+        result = _operate(self.operator, augend, addend, self.dtype_policy.float)
+        return pd.DataFrame(
+            {f"{self.prefix}_{self.col1}_{self.col2}": result}, index=data.index
+        )
 
-        result = operators[self.operator](augend, addend)
-        return pd.DataFrame({f"{self.prefix}_{self.col1}_{self.col2}": result})
+    def compile_step(self) -> Kernel:
+        name = f"{self.prefix}_{self.col1}_{self.col2}"
+        return lambda columns: {
+            name: _operate(
+                self.operator,
+                columns[self.col1],
+                columns[self.col2],
+                self.dtype_policy.float,
+            )
+        }
 
 
 @DATA_ENGINE_ZOO.regist()
@@ -108,6 +159,8 @@ class Mul(BinaryOperator):
 class Div(DataEngine):
     """Divide two columns. return {prefix}_{col1}_{col2}"""
 
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.RETURN_NEW_PD]
+
     def __init__(self, col1: str, col2: str, prefix: str = "div"):
         """
         Args:
@@ -119,13 +172,213 @@ class Div(DataEngine):
         self.col2 = col2
         self.prefix = prefix
 
+    def output_columns(self) -> list[str]:
+        return [f"{self.prefix}_{self.col1}_{self.col2}"]
+
     def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
-        x1 = data[self.col1].to_numpy()
-        x2 = data[self.col2].to_numpy()
-        x3 = x1 / x2
+        x1 = operand(data[self.col1])
+        x2 = operand(data[self.col2])
+        x3 = _operate("/", x1, x2, self.dtype_policy.float)
         return pd.DataFrame(
             {
                 f"{self.prefix}_{self.col1}_{self.col2}": x3,
             },
             index=data.index,
         )
+
+    def compile_step(self) -> Kernel:
+        name = f"{self.prefix}_{self.col1}_{self.col2}"
+        return lambda columns: {
+            name: _operate(
+                "/", columns[self.col1], columns[self.col2], self.dtype_policy.float
+            )
+        }
+
+
+_BINARY_UFUNCS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+    ast.FloorDiv: np.floor_divide,
+    ast.Mod: np.remainder,
+    ast.Pow: np.power,
+}
+_UNARY_UFUNCS = {ast.USub: np.negative, ast.UAdd: np.positive}
+_FUNCTIONS = {
+    "abs": np.absolute,
+    "sqrt": np.sqrt,
+    "exp": np.exp,
+    "log": np.log,
+    "log1p": np.log1p,
+    "sin": np.sin,
+    "cos": np.cos,
+    "tanh": np.tanh,
+    "minimum": np.minimum,
+    "maximum": np.maximum,
+}
+
+# operand of an instruction: ("col", name), ("const", value) or ("reg", index)
+_Operand = tuple[str, Any]
+
+
+class _Program:
+    """Formula compiled into ufunc instructions over a few chunk-sized registers."""
+
+    def __init__(self, expr: str):
+        self.columns: list[str] = []
+        self.instructions: list[tuple[np.ufunc, list[_Operand], int]] = []
+        self.n_registers = 0
+        self._free: list[int] = []
+
+        tree = ast.parse(expr, mode="eval")
+        self.result = self._compile(tree.body)
+
+    def _register(self) -> int:
+        if self._free:
+            return self._free.pop()
+        self.n_registers += 1
+        return self.n_registers - 1
+
+    def _emit(self, ufunc: np.ufunc, operands: list[_Operand]) -> _Operand:
+        for kind, value in operands:
+            if kind == "reg":
+                self._free.append(value)
+        target = self._register()
+        self.instructions.append((ufunc, operands, target))
+        return ("reg", target)
+
+    def _compile(self, node: ast.AST) -> _Operand:
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_UFUNCS:
+            left = self._compile(node.left)
+            right = self._compile(node.right)
+            return self._emit(_BINARY_UFUNCS[type(node.op)], [left, right])
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_UFUNCS:
+            return self._emit(
+                _UNARY_UFUNCS[type(node.op)], [self._compile(node.operand)]
+            )
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id in _FUNCTIONS
+            and not node.keywords
+        ):
+            ufunc = _FUNCTIONS[node.func.id]
+            if len(node.args) != ufunc.nin:
+                raise ValueError(f"{node.func.id} takes {ufunc.nin} arguments")
+            return self._emit(ufunc, [self._compile(arg) for arg in node.args])
+        if isinstance(node, ast.Name):
+            if node.id not in self.columns:
+                self.columns.append(node.id)
+            return ("col", node.id)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return ("const", node.value)
+        raise ValueError(f"unsupported expression: {ast.unparse(node)}")
+
+    def run(
+        self, columns: dict[str, np.ndarray], out: np.ndarray, chunk_size: int
+    ) -> np.ndarray:
+        n_rows = len(out)
+        registers = np.empty((self.n_registers, min(chunk_size, n_rows)), out.dtype)
+        for start in range(0, n_rows, chunk_size):
+            stop = min(start + chunk_size, n_rows)
+            size = stop - start
+
+            # bounds of this chunk are bound as defaults, not looked up at call time
+            def operand(op: _Operand, start=start, stop=stop, size=size):
+                kind, value = op
+                if kind == "col":
+                    return columns[value][start:stop]
+                if kind == "reg":
+                    return registers[value, :size]
+                return value
+
+            for i, (ufunc, operands, target) in enumerate(self.instructions):
+                # the last instruction writes the result to the output directly
+                last = i == len(self.instructions) - 1
+                dest = out[start:stop] if last else registers[target, :size]
+                ufunc(*(operand(op) for op in operands), out=dest)
+            if not self.instructions:
+                out[start:stop] = operand(self.result)
+        return out
+
+
+@DATA_ENGINE_ZOO.regist()
+class Expr(DataEngine):
+    """Evaluate arithmetic formula of columns, e.g. "(a * b + c) / d". Return {name} column.
+
+    The formula is parsed once. It is evaluated in chunks of rows with a few chunk-sized buffers,
+    so intermediate results stay in cache and no full-length temporary is allocated.
+    Operators: + - * / // % **, functions: abs, sqrt, exp, log, log1p, sin, cos, tanh, minimum, maximum.
+    """
+
+    def __init__(
+        self,
+        expr: str,
+        name: str,
+        return_new: bool = True,
+        dtype: str | None = None,
+        chunk_size: int = 32768,
+    ):
+        """
+        Args:
+            expr (str): formula of columns and numbers
+            name (str): result column name
+            return_new (bool, optional): return new dataframe with the result column. If False, add the result column to the original dataframe. Defaults to True.
+            dtype (str | None, optional): dtype of result and intermediate values. If None, float dtype of the dtype policy (float64 without policy). Defaults to None.
+            chunk_size (int, optional): rows evaluated at once. Defaults to 32768.
+        """
+        self.expr = expr
+        self.name = name
+        self.return_new = return_new
+        self.dtype = dtype
+        self.chunk_size = chunk_size
+        self.program = _Program(expr)
+        self.engine_type = [
+            DataEngineType.RETURN_NEW_PD if return_new else DataEngineType.SIDE_EFFECT
+        ]
+
+    def input_columns(self) -> list[str]:
+        return list(self.program.columns)
+
+    def output_columns(self) -> list[str]:
+        return [self.name]
+
+    def evaluate(
+        self, columns: dict[str, np.ndarray], out: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Evaluate the formula over column arrays.
+
+        Args:
+            columns (dict[str, np.ndarray]): column arrays used by the formula
+            out (np.ndarray | None, optional): preallocated result buffer. If None, allocate with dtype. Defaults to None.
+
+        Returns:
+            np.ndarray: result
+        """
+        if out is None:
+            n_rows = (
+                len(columns[self.program.columns[0]]) if self.program.columns else 0
+            )
+            out = np.empty(n_rows, dtype=self.dtype_policy.float_dtype(self.dtype))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.program.run(columns, out, self.chunk_size)
+
+    def compile_step(self) -> Kernel:
+        def kernel(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+            result = self.evaluate(columns)
+            if self.return_new:
+                return {self.name: result}
+            columns[self.name] = result
+            return columns
+
+        return kernel
+
+    def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
+        columns = {col: numeric_values(data[col]) for col in self.program.columns}
+        out = np.empty(len(data), dtype=self.dtype_policy.float_dtype(self.dtype))
+        result = self.evaluate(columns, out)
+        if self.return_new:
+            return pd.DataFrame({self.name: result}, index=data.index, copy=False)
+        data[self.name] = result
+        return data
@@ -0,0 +1,310 @@
+"""Row-partitioned transform of fitted engines on a process pool, for SequentialEngine.transform_parallel.
+
+Numeric columns travel between processes through shared memory, other columns (strings, extension
+dtypes) are pickled per partition.
+"""
+
+from __future__ import annotations
+
+import gc
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from itertools import pairwise
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from .engine import DataEngine
+
+_ALIGN = 64
+_SHARED_KINDS = "biufcmM"
+
+# engine of the worker process, set by _init_worker
+_worker_engine: DataEngine | None = None
+
+
+@dataclass
+class _Column:
+    """Column in a shared memory block, or pickled values if offset is None."""
+
+    name: Any
+    dtype: str | None = None
+    offset: int | None = None
+    values: Any = None
+
+
+@dataclass
+class _Partition:
+    """Rows [start, stop) of the data, transformed with context rows [lo, hi)."""
+
+    shm_name: str
+    n_rows: int
+    columns: list[_Column]
+    start: int
+    stop: int
+    lo: int
+    hi: int
+
+
+@dataclass
+class _Result:
+    shm_name: str | None
+    n_rows: int
+    columns: list[_Column]
+    positions_offset: int
+
+
+def _is_shared(values: Any) -> bool:
+    return isinstance(values, np.ndarray) and values.dtype.kind in _SHARED_KINDS
+
+
+def _values(series: pd.Series) -> Any:
+    """NumPy array of numpy dtype columns, extension array (e.g. strings, sparse) otherwise."""
+    if isinstance(series.dtype, np.dtype):
+        return series.to_numpy()
+    return series.array
+
+
+def _layout(arrays: list[Any], n_rows: int) -> tuple[list[int | None], int]:
+    """Offsets of arrays with n_rows values in one block, None for arrays kept out of the block."""
+    offsets: list[int | None] = []
+    size = 0
+    for values in arrays:
+        if not _is_shared(values):
+            offsets.append(None)
+            continue
+        size = -(-size // _ALIGN) * _ALIGN
+        offsets.append(size)
+        size += values.dtype.itemsize * n_rows
+    return offsets, size
+
+
+def _view(shm: SharedMemory, column: _Column, n_rows: int) -> np.ndarray:
+    return np.ndarray(
+        n_rows, dtype=np.dtype(column.dtype), buffer=shm.buf, offset=column.offset
+    )
+
+
+def _write(shm: SharedMemory, values: np.ndarray, offset: int) -> None:
+    view = np.ndarray(len(values), dtype=values.dtype, buffer=shm.buf, offset=offset)
+    view[:] = values
+
+
+def _close(shm: SharedMemory) -> None:
+    try:
+        shm.close()
+        return
+    except BufferError:
+        # arrays in reference cycles still refer to the block
+        gc.collect()
+    try:
+        shm.close()
+    except BufferError:
+        # the block is unmapped when the arrays are released
+        pass
+
+
+def _init_worker(engine: DataEngine) -> None:
+    global _worker_engine
+    _worker_engine = engine
+
+
+def _transform_partition(part: _Partition, shm: SharedMemory) -> _Result:
+    arrays = []
+    for column in part.columns:
+        if column.offset is None:
+            arrays.append(column.values)
+            continue
+        values = _view(shm, column, part.n_rows)[part.lo : part.hi]
+        values.flags.writeable = False
+        arrays.append(values)
+    # shared arrays are wrapped without copying. The engines get a shallow copy while the source
+    # is alive, so copy-on-write copies a column before any engine modifies it in place.
+    source = pd.DataFrame(dict(enumerate(arrays)), copy=False)
+    source.columns = [column.name for column in part.columns]
+    source.index = pd.RangeIndex(part.lo, part.hi)
+    out = _worker_engine(source.copy(deep=False))  # type: ignore
+    if not isinstance(out, pd.DataFrame):
+        raise TypeError(
+            f"transform_parallel needs dataframe output, but {type(out).__name__}"
+        )
+    if part.lo != part.start or part.hi != part.stop:
+        # drop the context rows, the index holds row positions in the data
+        positions = out.index.to_numpy()
+        out = out[(positions >= part.start) & (positions < part.stop)]
+    return _write_result(out)
+
+
+def _run_partition(part: _Partition) -> _Result:
+    shm = SharedMemory(part.shm_name)
+    try:
+        return _transform_partition(part, shm)
+    finally:
+        _close(shm)
+
+
+def _write_result(out: pd.DataFrame) -> _Result:
+    n_rows = len(out)
+    positions = out.index.to_numpy(dtype=np.int64)
+    arrays = [_values(out.iloc[:, i]) for i in range(out.shape[1])]
+    offsets, size = _layout([positions, *arrays], n_rows)
+    columns = [
+        _Column(name, None, None, values)
+        if offset is None
+        else _Column(name, values.dtype.str, offset)
+        for name, values, offset in zip(out.columns, arrays, offsets[1:])
+    ]
+    if size == 0:
+        return _Result(None, n_rows, columns, 0)
+
+    shm = SharedMemory(create=True, size=size)
+    try:
+        for values, offset in zip([positions, *arrays], offsets):
+            if offset is not None:
+                _write(shm, values, offset)
+        return _Result(shm.name, n_rows, columns, offsets[0])  # type: ignore
+    finally:
+        _close(shm)
+
+
+def _assemble_columns(
+    results: list[_Result], blocks: dict[str, SharedMemory], index: pd.Index
+) -> pd.DataFrame:
+    def column(result: _Result, column: _Column):
+        if column.offset is None:
+            return column.values
+        if result.shm_name is None:
+            return np.empty(0, dtype=np.dtype(column.dtype))
+        return _view(blocks[result.shm_name], column, result.n_rows)
+
+    positions = np.concatenate(
+        [
+            column(result, _Column(None, "<i8", result.positions_offset))
+            for result in results
+        ]
+    )
+    names = [column.name for column in results[0].columns]
+    arrays = []
+    for i in range(len(names)):
+        parts = [column(result, result.columns[i]) for result in results]
+        if all(isinstance(part, np.ndarray) for part in parts):
+            arrays.append(np.concatenate(parts))
+        else:
+            arrays.append(
+                pd.concat(
+                    [pd.Series(part, copy=False) for part in parts], ignore_index=True
+                ).array
+            )
+    data = pd.DataFrame(dict(enumerate(arrays)), copy=False)
+    data.columns = names
+    data.index = index.take(positions)
+    return data
+
+
+def _release(results: list[_Result]) -> None:
+    for result in results:
+        if result.shm_name is not None:
+            shm = SharedMemory(result.shm_name)
+            shm.close()
+            shm.unlink()
+
+
+def _assemble(results: list[_Result], index: pd.Index) -> pd.DataFrame:
+    blocks = {}
+    try:
+        for result in results:
+            if result.shm_name is not None:
+                blocks[result.shm_name] = SharedMemory(result.shm_name)
+        return _assemble_columns(results, blocks, index)
+    finally:
+        for shm in blocks.values():
+            _close(shm)
+            shm.unlink()
+
+
+def transform_parallel(
+    engine: DataEngine,
+    data: pd.DataFrame,
+    workers: int,
+    partitions: int | None = None,
+    mp_context: Any = None,
+) -> pd.DataFrame:
+    """Transform data with fitted engine, split into row partitions processed on a process pool.
+
+    Partitions of engines depending on row order are extended by engine.row_context() rows on both
+    sides, and the extra rows are dropped from the output. If the context is unknown (None), the
+    data is transformed in this process.
+
+    Args:
+        engine (DataEngine): fitted engine
+        data (pd.DataFrame): data
+        workers (int): number of processes
+        partitions (int | None, optional): number of row partitions. If None, same as workers. Defaults to None.
+        mp_context (Any, optional): multiprocessing context, e.g. multiprocessing.get_context("spawn"). Defaults to None.
+
+    Returns:
+        pd.DataFrame: transformed data, same as engine(data)
+    """
+    if not engine.is_fitted():
+        raise ValueError(
+            "engines are not fitted. fit the engines before transform_parallel"
+        )
+    halo = engine.row_context()
+    n_rows = len(data)
+    partitions = min(partitions or workers, n_rows)
+    if halo is None or workers <= 1 or partitions <= 1:
+        return engine(data)
+
+    arrays = [_values(data.iloc[:, i]) for i in range(data.shape[1])]
+    offsets, size = _layout(arrays, n_rows)
+    shm = SharedMemory(create=True, size=max(size, 1))
+    try:
+        for values, offset in zip(arrays, offsets):
+            if offset is not None:
+                _write(shm, values, offset)
+
+        bounds = np.linspace(0, n_rows, partitions + 1).astype(int)
+        parts = []
+        for start, stop in pairwise(bounds):
+            lo, hi = int(max(start - halo, 0)), int(min(stop + halo, n_rows))
+            columns = [
+                _Column(name, values.dtype.str, offset)
+                if offset is not None
+                else _Column(name, values=values[lo:hi])
+                for name, values, offset in zip(data.columns, arrays, offsets)
+            ]
+            parts.append(
+                _Partition(shm.name, n_rows, columns, int(start), int(stop), lo, hi)
+            )
+
+        with ProcessPoolExecutor(
+            max_workers=min(workers, partitions),
+            mp_context=mp_context or multiprocessing.get_context(),
+            initializer=_init_worker,
+            initargs=(engine,),
+        ) as executor:
+            futures = [executor.submit(_run_partition, part) for part in parts]
+            try:
+                # results keep the order of partitions
+                results = [future.result() for future in futures]
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                wait(futures)
+                _release(
+                    [
+                        future.result()
+                        for future in futures
+                        if future.done()
+                        and not future.cancelled()
+                        and future.exception() is None
+                    ]
+                )
+                raise
+    finally:
+        shm.close()
+        shm.unlink()
+    return _assemble(results, data.index)
@@ -0,0 +1,314 @@
+"""Column-dependency planner for SequentialEngine.
+
+Each stage is described by the columns it reads, the columns it modifies or removes and
+the columns it adds. A stage is only removed, moved or merged when these column sets
+show that the pipeline output does not change.
+"""
+
+from __future__ import annotations
+
+import copy
+from dataclasses import dataclass, field
+
+from .dataframe import ConcatDFs, DropColumns
+from .engine import DataEngine, flatten_engines
+from .engine_type import DataEngineType
+
+
+@dataclass
+class _NewColumns:
+    """Columns added by a stage. Names are known exactly, prefixes cover {prefix}_* names."""
+
+    names: set[str] = field(default_factory=set)
+    prefixes: set[str] = field(default_factory=set)
+
+    def hits(self, cols: set[str]) -> bool:
+        for col in cols:
+            if col in self.names:
+                return True
+            if any(col.startswith(f"{prefix}_") for prefix in self.prefixes):
+                return True
+        return False
+
+
+@dataclass
+class _Stage:
+    engine: DataEngine
+    reads: set[str] | None
+    """read columns. None if the stage may read any column"""
+    writes: set[str] | None
+    """modified or removed columns. None if the stage may change any column"""
+    adds: _NewColumns | None
+    """added columns. None if the names are unknown"""
+    keeps_rows: bool
+
+
+def _new_columns(engines: list[DataEngine]) -> _NewColumns | None:
+    new_columns = _NewColumns()
+    for engine in engines:
+        outputs = engine.output_columns()
+        if outputs is not None:
+            new_columns.names.update(outputs)
+            continue
+        prefix = getattr(engine, "prefix", None)
+        if not isinstance(prefix, str) or not prefix:
+            return None
+        new_columns.prefixes.add(prefix)
+    return new_columns
+
+
+def _describe(engine: DataEngine) -> _Stage:
+    if isinstance(engine, DropColumns):
+        return _Stage(engine, set(), set(engine.drop_cols), _NewColumns(), True)
+
+    reads = engine.input_columns()
+    reads = None if reads is None else set(reads)
+
+    if isinstance(engine, ConcatDFs):
+        # children share the input dataframe, so only pure RETURN_NEW_PD children are safe
+        pure = all(
+            DataEngineType.RETURN_NEW_PD in child.engine_type
+            for child in engine.engines
+        )
+        writes = set() if pure else None
+        return _Stage(engine, reads, writes, _new_columns(engine.engines), True)
+
+    if DataEngineType.SIDE_EFFECT in engine.engine_type:
+        writes = engine.output_columns()
+        if writes is None:
+            return _Stage(engine, reads, None, _NewColumns(), True)
+        # written columns the engine does not read may be new, e.g. Expr with return_new=False
+        adds = _NewColumns(set(writes) - (reads or set()))
+        return _Stage(engine, reads, set(writes), adds, True)
+
+    if DataEngineType.DROP_ROWS in engine.engine_type:
+        return _Stage(engine, reads, set(), _NewColumns(), False)
+
+    # e.g. RETURN_NEW_PD engine in the sequence replaces the whole dataframe
+    return _Stage(engine, reads, None, None, False)
+
+
+def _commutes(a: _Stage, b: _Stage) -> bool:
+    """Whether b can run before a (a runs directly before b in the pipeline)."""
+    if a.reads is None or b.reads is None or a.writes is None or b.writes is None:
+        return False
+    if a.adds is None or b.adds is None:
+        return False
+    # row filters only commute with column drops
+    if not (a.keeps_rows and b.keeps_rows) and not (
+        isinstance(a.engine, DropColumns) or isinstance(b.engine, DropColumns)
+    ):
+        return False
+    if (a.adds.names or a.adds.prefixes) and (b.adds.names or b.adds.prefixes):
+        # swapping two stages that add columns changes the column order
+        return False
+    if a.writes & (b.reads | b.writes) or b.writes & a.reads:
+        return False
+    return not (a.adds.hits(b.reads | b.writes) or b.adds.hits(a.reads | a.writes))
+
+
+def _prune_concat(engine: ConcatDFs, dead: dict[str, DropColumns]) -> ConcatDFs | None:
+    kept = []
+    for child in engine.engines:
+        outputs = child.output_columns()
+        if (
+            DataEngineType.RETURN_NEW_PD in child.engine_type
+            and outputs
+            and all(col in dead for col in outputs)
+        ):
+            for col in outputs:
+                dead.pop(col).drop_cols.remove(col)
+            continue
+        kept.append(child)
+
+    if len(kept) == len(engine.engines):
+        return engine
+    if not kept:
+        return None
+    pruned = copy.copy(engine)
+    pruned.engines = kept
+    return pruned
+
+
+def _eliminate_dead(engines: list[DataEngine]) -> list[DataEngine]:
+    """Remove stages whose outputs are dropped before any stage reads them."""
+    dead: dict[str, DropColumns] = {}
+    planned: list[DataEngine] = []
+    for engine in reversed(engines):
+        if isinstance(engine, DropColumns):
+            engine = copy.copy(engine)
+            engine.drop_cols = list(engine.drop_cols)
+            for col in engine.drop_cols:
+                dead[col] = engine
+            planned.append(engine)
+            continue
+
+        if isinstance(engine, ConcatDFs):
+            pruned = _prune_concat(engine, dead)
+            if pruned is None:
+                continue
+            engine = pruned
+            for col in engine.output_columns() or []:
+                dead.pop(col, None)
+        elif DataEngineType.SIDE_EFFECT in engine.engine_type:
+            writes = engine.output_columns()
+            reads = engine.input_columns() or []
+            # only columns modified in place, a removed stage must not leave a dropped column missing
+            if writes and all(col in dead and col in reads for col in writes):
+                continue
+        elif DataEngineType.DROP_ROWS not in engine.engine_type:
+            dead.clear()
+
+        reads = engine.input_columns()
+        if reads is None:
+            dead.clear()
+        else:
+            for col in reads:
+                dead.pop(col, None)
+        planned.append(engine)
+
+    return [
+        engine
+        for engine in reversed(planned)
+        if not (isinstance(engine, DropColumns) and not engine.drop_cols)
+    ]
+
+
+def _merge_drops(a: _Stage, b: _Stage) -> _Stage:
+    engine = copy.copy(a.engine)
+    engine.drop_cols = list(dict.fromkeys(a.engine.drop_cols + b.engine.drop_cols))
+    engine.copy = a.engine.copy or b.engine.copy
+    return _describe(engine)
+
+
+def _hoist_drops(stages: list[_Stage]) -> list[_Stage]:
+    """Drop columns as early as possible so later stages carry less data."""
+    planned: list[_Stage] = []
+    for stage in stages:
+        planned.append(stage)
+        if not isinstance(stage.engine, DropColumns):
+            continue
+        pos = len(planned) - 1
+        while pos > 0:
+            prev = planned[pos - 1]
+            if isinstance(prev.engine, DropColumns):
+                planned[pos - 1] = _merge_drops(prev, planned.pop(pos))
+                break
+            if not _commutes(prev, planned[pos]):
+                break
+            planned[pos - 1], planned[pos] = planned[pos], prev
+            pos -= 1
+    return planned
+
+
+def _merge_target(planned: list[_Stage], stage: _Stage) -> int | None:
+    if stage.reads is None or stage.writes is None or stage.adds is None:
+        return None
+    for pos in range(len(planned) - 1, -1, -1):
+        prev = planned[pos]
+        if isinstance(prev.engine, ConcatDFs):
+            if prev.writes is None or prev.adds is None or prev.adds.hits(stage.reads):
+                return None
+            return pos
+        if not _commutes(prev, stage):
+            return None
+    return None
+
+
+def _merge_concats(stages: list[_Stage]) -> list[_Stage]:
+    """Merge independent ConcatDFs so their outputs are concatenated at once."""
+    planned: list[_Stage] = []
+    for stage in stages:
+        if isinstance(stage.engine, ConcatDFs):
+            pos = _merge_target(planned, stage)
+            if pos is not None:
+                merged = copy.copy(planned[pos].engine)
+                merged.engines = planned[pos].engine.engines + stage.engine.engines
+                workers = [planned[pos].engine.workers, stage.engine.workers]
+                merged.workers = max((w for w in workers if w), default=None)
+                planned[pos] = _describe(merged)
+                continue
+        planned.append(stage)
+    return planned
+
+
+def plan_engines(engines: list[DataEngine]) -> list[DataEngine]:
+    """Optimize sequentially applied engines with their read/write columns.
+
+    - Stages whose outputs are dropped before being read are removed.
+    - DropColumns is moved forward past stages that do not use the dropped columns.
+    - Adjacent ConcatDFs that do not depend on each other are merged, so the new columns
+      are concatenated with the data once.
+
+    Args:
+        engines (list[DataEngine]): engines applied sequentially
+
+    Returns:
+        list[DataEngine]: planned engines
+    """
+    engines = _eliminate_dead(flatten_engines(engines))
+    stages = [_describe(engine) for engine in engines]
+    stages = _hoist_drops(stages)
+    stages = _merge_concats(stages)
+    return [stage.engine for stage in stages]
+
+
+def _source_reads(
+    engines: list[DataEngine],
+) -> list[tuple[DataEngine, list[str]]] | None:
+    """Columns of the input data read by each of sequentially applied engines, in order.
+    Columns added by earlier stages are not input columns. Columns that may come from stages
+    with unknown outputs are kept, so the input columns are never missed.
+    """
+    reads: list[tuple[DataEngine, list[str]]] = []
+    new_columns = _NewColumns()
+    for engine in flatten_engines(engines):
+        cols = engine.required_columns()
+        if cols is None:
+            return None
+        reads.append((engine, [col for col in cols if not new_columns.hits({col})]))
+
+        adds = _describe(engine).adds
+        if adds is None:
+            if not isinstance(engine, ConcatDFs):
+                # the engine replaces the data, later stages do not see the input
+                break
+            continue
+        new_columns.names.update(adds.names)
+        new_columns.prefixes.update(adds.prefixes)
+    return reads
+
+
+def required_columns(engines: list[DataEngine]) -> list[str] | None:
+    """Columns the input data needs for sequentially applied engines, e.g. to read only these columns from a file.
+
+    Args:
+        engines (list[DataEngine]): engines applied sequentially
+
+    Returns:
+        list[str] | None: column names in the order they are first read. None if an engine reads unknown columns.
+    """
+    reads = _source_reads(engines)
+    if reads is None:
+        return None
+    return list(dict.fromkeys(col for _, cols in reads for col in cols))
+
+
+def input_dtypes(engines: list[DataEngine]) -> dict[str, str]:
+    """dtypes input columns can be read with, declared by the first engine reading each column.
+
+    Args:
+        engines (list[DataEngine]): engines applied sequentially
+
+    Returns:
+        dict[str, str]: {column: dtype}
+    """
+    dtypes: dict[str, str] = {}
+    seen: set[str] = set()
+    for engine, cols in _source_reads(engines) or []:
+        declared = engine.input_dtypes()
+        for col in cols:
+            if col not in seen and col in declared:
+                dtypes[col] = declared[col]
+            seen.add(col)
+    return dtypes
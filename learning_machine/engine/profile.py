@@ -0,0 +1,179 @@
+"""Per-engine profiling of SequentialEngine and ConcatDFs with hooks."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from .engine import DataEngine, EngineHook, HookedEngines
+
+
+@dataclass
+class StageRecord:
+    """Measurement of one engine call."""
+
+    path: str
+    """position of the engine, e.g. "2.0" for the first engine of ConcatDFs at position 2"""
+    engine: str
+    wall_time: float
+    """seconds"""
+    cpu_time: float
+    """CPU seconds of the calling thread"""
+    rows_in: int | None
+    rows_out: int | None
+    columns_in: int | None
+    columns_out: int | None
+    added: list[str]
+    removed: list[str]
+    memory: int | None
+    """bytes of the output, without object contents"""
+    tracemalloc_peak: int | None = None
+    """peak bytes allocated during the call above the start"""
+
+
+def _rows(data: Any) -> int | None:
+    try:
+        return len(data)
+    except TypeError:
+        return None
+
+
+def _columns(data: Any) -> list[str] | None:
+    if isinstance(data, pd.DataFrame):
+        return [str(col) for col in data.columns]
+    return None
+
+
+def _memory(data: Any) -> int | None:
+    if isinstance(data, pd.DataFrame):
+        return int(data.memory_usage(index=True, deep=False).sum())
+    if isinstance(data, np.ndarray):
+        return data.nbytes
+    return None
+
+
+class Profiler(EngineHook):
+    """Hook recording wall time, CPU time, rows, columns and memory of each engine."""
+
+    def __init__(self, trace_memory: bool = False):
+        """
+        Args:
+            trace_memory (bool, optional): record tracemalloc peak of each engine. tracemalloc slows down allocations, and peaks of engines running on threads overlap. Defaults to False.
+        """
+        self.trace_memory = trace_memory
+        self.records: list[StageRecord] = []
+        # [allocated at start, peak of finished nested engines] of running engines
+        self._memory_stack: list[list[int]] = []
+        self._lock = threading.Lock()
+
+    def before(self, engine: DataEngine, data, path: str):
+        if self.trace_memory:
+            with self._lock:
+                current, peak = tracemalloc.get_traced_memory()
+                if self._memory_stack:
+                    outer = self._memory_stack[-1]
+                    outer[1] = max(outer[1], peak)
+                tracemalloc.reset_peak()
+                self._memory_stack.append([current, 0])
+        return time.perf_counter(), time.thread_time()
+
+    def after(self, engine: DataEngine, data, out, path: str, token) -> None:
+        wall_start, cpu_start = token
+        wall_time = time.perf_counter() - wall_start
+        cpu_time = time.thread_time() - cpu_start
+
+        tracemalloc_peak = None
+        if self.trace_memory:
+            with self._lock:
+                _, peak = tracemalloc.get_traced_memory()
+                start, nested_peak = self._memory_stack.pop()
+                peak = max(peak, nested_peak)
+                if self._memory_stack:
+                    outer = self._memory_stack[-1]
+                    outer[1] = max(outer[1], peak)
+                tracemalloc_peak = peak - start
+
+        columns_in = _columns(data)
+        columns_out = _columns(out)
+        added: list[str] = []
+        removed: list[str] = []
+        if columns_in is not None and columns_out is not None:
+            before_cols = set(columns_in)
+            after_cols = set(columns_out)
+            added = [col for col in columns_out if col not in before_cols]
+            removed = [col for col in columns_in if col not in after_cols]
+
+        record = StageRecord(
+            path=path,
+            engine=type(engine).__name__,
+            wall_time=wall_time,
+            cpu_time=cpu_time,
+            rows_in=_rows(data),
+            rows_out=_rows(out),
+            columns_in=None if columns_in is None else len(columns_in),
+            columns_out=None if columns_out is None else len(columns_out),
+            added=added,
+            removed=removed,
+            memory=_memory(out),
+            tracemalloc_peak=tracemalloc_peak,
+        )
+        with self._lock:
+            self.records.append(record)
+
+    def report(self) -> pd.DataFrame:
+        """Records as dataframe, one row per engine call in finishing order.
+
+        Returns:
+            pd.DataFrame: report
+        """
+        columns = list(StageRecord.__dataclass_fields__)
+        return pd.DataFrame([asdict(r) for r in self.records], columns=columns)
+
+    def to_json(self) -> str:
+        """Records as JSON list.
+
+        Returns:
+            str: report
+        """
+        return json.dumps([asdict(r) for r in self.records])
+
+
+@contextmanager
+def profile(engine: HookedEngines, trace_memory: bool = False) -> Iterator[Profiler]:
+    """Profile the engines of SequentialEngine or ConcatDFs, including nested ones, while in the context.
+
+    Example:
+        ```python
+        with profile(engine) as profiler:
+            engine(data)
+        print(profiler.report())
+        ```
+
+    Args:
+        engine (HookedEngines): SequentialEngine or ConcatDFs
+        trace_memory (bool, optional): record tracemalloc peak of each engine. Defaults to False.
+
+    Yields:
+        Iterator[Profiler]: profiler
+    """
+    profiler = Profiler(trace_memory)
+    started = False
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        started = True
+    engine.add_hook(profiler)
+    try:
+        yield profiler
+    finally:
+        engine.remove_hook(profiler)
+        if started:
+            tracemalloc.stop()
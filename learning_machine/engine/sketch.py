@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+
+class KLLSketch:
+    """Mergeable quantile sketch (Karnin, Lang, Liberty 2016).
+
+    Values are kept in compactors of increasing weight. When a compactor is full, it is sorted
+    and every other value is promoted to the next compactor with double weight. Memory is bounded
+    by O(k), and the rank error of quantiles is about 1.7 / k with high probability.
+    """
+
+    _c = 2 / 3
+
+    def __init__(self, k: int = 200, seed: int = 0):
+        """
+        Args:
+            k (int, optional): size of the top compactor. Larger k is more accurate. Defaults to 200.
+            seed (int, optional): seed of compaction offsets. Sketches of the same values with the same seed are same. Defaults to 0.
+        """
+        if k < 2:
+            raise ValueError(f"k must be at least 2, but {k}")
+        self.k = k
+        self.n = 0
+        self.levels: list[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self.seed = seed
+
+    @classmethod
+    def from_error(cls, error: float, seed: int = 0) -> KLLSketch:
+        """Create sketch with rank error bound.
+
+        Args:
+            error (float): rank error, e.g. 0.01 for quantiles within 1% of rank
+            seed (int, optional): seed of compaction offsets. Defaults to 0.
+
+        Returns:
+            KLLSketch: sketch
+        """
+        if not 0 < error < 1:
+            raise ValueError(f"error must be in (0, 1), but {error}")
+        return cls(k=max(math.ceil(1.7 / error), 2), seed=seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(math.ceil(self.k * self._c**depth), 2)
+
+    def _compress(self) -> None:
+        # offsets depend only on the seed and the values seen, so a restored sketch continues the same
+        rng = np.random.default_rng([self.seed, self.n])
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) <= self._capacity(level):
+                level += 1
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0, dtype=np.float64))
+            items = np.sort(items)
+            # odd number of items, keep the largest at this level
+            keep = items[len(items) - len(items) % 2 :]
+            items = items[: len(items) - len(items) % 2]
+            offset = int(rng.integers(2))
+            self.levels[level] = keep
+            self.levels[level + 1] = np.concatenate(
+                [self.levels[level + 1], items[offset::2]]
+            )
+            # capacities of lower levels shrink when a level is added
+            level = 0
+
+    def update(self, values: np.ndarray) -> None:
+        """Add values. nan values are ignored.
+
+        Args:
+            values (np.ndarray): values
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: KLLSketch) -> None:
+        """Merge other sketch into this sketch.
+
+        Args:
+            other (KLLSketch): sketch fitted on other data
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+
+    def quantile(self, q: float | np.ndarray) -> np.ndarray:
+        """Approximate quantiles.
+
+        Args:
+            q (float | np.ndarray): quantiles in [0, 1]
+
+        Returns:
+            np.ndarray: values. nan if the sketch is empty.
+        """
+        q = np.asarray(q, dtype=np.float64)
+        if self.n == 0:
+            return np.full(q.shape, np.nan)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [
+                np.full(len(lv), 2**level, dtype=np.float64)
+                for level, lv in enumerate(self.levels)
+            ]
+        )
+        order = np.argsort(items, kind="stable")
+        items = items[order]
+        cum_weights = np.cumsum(weights[order])
+        ranks = q * cum_weights[-1]
+        idx = np.searchsorted(cum_weights, ranks, side="left")
+        return items[np.minimum(idx, len(items) - 1)]
+
+    def to_dict(self) -> dict[str, np.ndarray]:
+        """Serialize sketch into arrays.
+
+        Returns:
+            dict[str, np.ndarray]: sketch state
+        """
+        return {
+            "k": np.asarray(self.k),
+            "n": np.asarray(self.n),
+            "seed": np.asarray(self.seed),
+            "items": np.concatenate(self.levels),
+            "level_sizes": np.asarray([len(lv) for lv in self.levels], dtype=np.int64),
+        }
+
+    @classmethod
+    def from_dict(
+        cls, state: dict[str, np.ndarray], seed: int | None = None
+    ) -> KLLSketch:
+        """Restore sketch from to_dict.
+
+        Args:
+            state (dict[str, np.ndarray]): sketch state
+            seed (int | None, optional): seed of compaction offsets. If None, the seed of the state (0 for states without seed). Defaults to None.
+
+        Returns:
+            KLLSketch: sketch
+        """
+        if seed is None:
+            seed = int(state["seed"]) if "seed" in state else 0
+        sketch = cls(k=int(state["k"]), seed=seed)
+        sketch.n = int(state["n"])
+        bounds = np.cumsum(state["level_sizes"])[:-1]
+        sketch.levels = [
+            np.array(items, dtype=np.float64)
+            for items in np.split(state["items"], bounds)
+        ]
+        return sketch
@@ -0,0 +1,158 @@
+"""Fitted state of engines as plain arrays.
+
+States are saved as one ``.npy`` file per array, so a loaded state can be memory-mapped and
+shared by several processes.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .engine import DataEngine
+
+
+def pack_values(name: str, values: np.ndarray) -> dict[str, np.ndarray]:
+    """Convert values (e.g. categories) to arrays that can be saved without pickle.
+
+    Object arrays of strings are saved as unicode arrays with a missing value mask.
+
+    Args:
+        name (str): state name
+        values (np.ndarray): values
+
+    Returns:
+        dict[str, np.ndarray]: arrays
+    """
+    values = np.asarray(values)
+    if values.dtype != object:
+        return {name: values}
+
+    na = pd.isna(values)
+    present = values[~na]
+    if all(isinstance(v, str) for v in present):
+        arr = np.where(na, "", values).astype(str)
+    else:
+        arr = np.asarray(present.tolist())
+        if arr.dtype == object:
+            raise ValueError(f"{name} has values that can not be saved: {values}")
+        filled = np.zeros(len(values), dtype=arr.dtype)
+        filled[~na] = arr
+        arr = filled
+    state = {name: arr}
+    if na.any():
+        state[f"{name}.na"] = na
+    return state
+
+
+def unpack_values(state: dict[str, np.ndarray], name: str) -> np.ndarray:
+    """Restore values packed by pack_values.
+
+    Args:
+        state (dict[str, np.ndarray]): arrays
+        name (str): state name
+
+    Returns:
+        np.ndarray: values
+    """
+    values = np.asarray(state[name])
+    na = state.get(f"{name}.na")
+    if values.dtype.kind == "U":
+        values = values.astype(object)
+    if na is not None:
+        values = values.astype(object)
+        values[np.asarray(na)] = np.nan
+    return values
+
+
+def _children(engine: DataEngine) -> list[DataEngine]:
+    engines = getattr(engine, "engines", None)
+    if isinstance(engines, list):
+        return engines
+    return []
+
+
+def collect_states(
+    engines: list[DataEngine], prefix: str = ""
+) -> dict[str, np.ndarray]:
+    """Collect fitted states of engines and nested engines.
+
+    Keys are {path}/{name}, where path is the position of the engine, e.g. "2.0" for the first
+    engine of ConcatDFs at position 2.
+
+    Args:
+        engines (list[DataEngine]): engines
+        prefix (str, optional): path of parent engine. Defaults to "".
+
+    Returns:
+        dict[str, np.ndarray]: states
+    """
+    states = {}
+    for i, engine in enumerate(engines):
+        path = f"{prefix}{i}"
+        for name, value in engine.get_state().items():
+            states[f"{path}/{name}"] = np.asarray(value)
+        states.update(collect_states(_children(engine), f"{path}."))
+    return states
+
+
+def restore_states(
+    engines: list[DataEngine], states: dict[str, np.ndarray], prefix: str = ""
+) -> None:
+    """Restore states collected by collect_states into engines created from the same config.
+
+    Args:
+        engines (list[DataEngine]): engines
+        states (dict[str, np.ndarray]): states
+        prefix (str, optional): path of parent engine. Defaults to "".
+    """
+    grouped: dict[str, dict[str, np.ndarray]] = {}
+    for key, value in states.items():
+        path, name = key.split("/", 1)
+        grouped.setdefault(path, {})[name] = value
+
+    def restore(engines: list[DataEngine], prefix: str) -> None:
+        for i, engine in enumerate(engines):
+            path = f"{prefix}{i}"
+            if path in grouped:
+                engine.set_state(grouped[path])
+            restore(_children(engine), f"{path}.")
+
+    restore(engines, prefix)
+
+
+def save_states(states: dict[str, np.ndarray], dir: Path | str) -> None:
+    """Save states as {dir}/{path}/{name}.npy.
+
+    Args:
+        states (dict[str, np.ndarray]): states
+        dir (Path | str): directory
+    """
+    dir = Path(dir)
+    for key, value in states.items():
+        path, name = key.split("/", 1)
+        file = dir / path / f"{name}.npy"
+        file.parent.mkdir(parents=True, exist_ok=True)
+        np.save(file, value, allow_pickle=False)
+
+
+def load_states(dir: Path | str, mmap: bool = True) -> dict[str, np.ndarray]:
+    """Load states saved by save_states.
+
+    Args:
+        dir (Path | str): directory
+        mmap (bool, optional): memory-map arrays instead of reading them. Defaults to True.
+
+    Returns:
+        dict[str, np.ndarray]: states
+    """
+    dir = Path(dir)
+    states = {}
+    mmap_mode = "r" if mmap else None
+    for file in dir.glob("*/*.npy"):
+        states[f"{file.parent.name}/{file.stem}"] = np.load(
+            file, mmap_mode=mmap_mode, allow_pickle=False
+        )
+    return states
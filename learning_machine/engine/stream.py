@@ -0,0 +1,167 @@
+"""Fitting passes for SequentialEngine.stream."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from .dataframe import ConcatDFs
+from .engine import DataEngine, flatten_engines
+from .engine_type import DataEngineType
+
+
+@dataclass
+class _FitRun:
+    """State of a chunk passing through the engines in a fitting pass."""
+
+    pending: set[int]
+    """ids of engines not fitted yet"""
+    fitted: set[int]
+    """ids of engines fitted with partial_fit in this pass"""
+    fitting: bool = False
+    """whether an engine before the current one is fitting with this chunk"""
+    fitting_writes: set[str] = field(default_factory=set)
+    """columns modified in place by engines fitting with this chunk"""
+
+
+def _leaf_engines(engines: list[DataEngine]) -> Iterator[DataEngine]:
+    for engine in engines:
+        if isinstance(engine, ConcatDFs):
+            yield from engine.engines
+        else:
+            yield engine
+
+
+def _partial_fit_engines(engines: list[DataEngine]) -> list[DataEngine]:
+    """Engines to fit over the chunks. Engines without partial_fit must be fitted already."""
+    found = []
+    for engine in _leaf_engines(engines):
+        if engine.is_fitted():
+            continue
+        if not engine.supports_partial_fit():
+            raise ValueError(
+                f"{type(engine).__name__} is not fitted and does not support partial_fit, "
+                "so it would be fitted with the first chunk only. fit it before streaming, "
+                "enable partial_fit (e.g. set sketch_error of RobustScaler), "
+                "or stream with fit=False to fit it with the first chunk"
+            )
+        found.append(engine)
+    return found
+
+
+def _reiterable(
+    chunks: Iterable | Callable[[], Iterable],
+) -> Callable[[], Iterable]:
+    if callable(chunks):
+        return chunks
+    if iter(chunks) is chunks:
+        raise ValueError(
+            "fitting with partial_fit reads chunks more than once. "
+            "pass a list or a function returning a new iterator of chunks"
+        )
+    return lambda: chunks
+
+
+def _blocked(engine: DataEngine, data: pd.DataFrame, state: _FitRun) -> bool:
+    """Whether the engine needs outputs of engines still fitting in this pass."""
+    if not state.fitting:
+        return False
+    reads = engine.input_columns()
+    if reads is None:
+        return True
+    if any(col not in data.columns for col in reads):
+        # new columns of an engine still fitting
+        return True
+    return bool(state.fitting_writes.intersection(reads))
+
+
+def _fit_step(
+    engine: DataEngine, data: pd.DataFrame, state: _FitRun
+) -> pd.DataFrame | None:
+    if id(engine) in state.pending:
+        engine.partial_fit(data)  # type: ignore
+        state.fitted.add(id(engine))
+        state.fitting = True
+        if DataEngineType.SIDE_EFFECT not in engine.engine_type:
+            # the output replaces the data, nothing to pass to the next engines
+            return None
+        state.fitting_writes.update(engine.output_columns() or [])
+        return data
+
+    if isinstance(engine, ConcatDFs) and any(
+        id(child) in state.pending for child in engine.engines
+    ):
+        datas = []
+        for child in engine.engines:
+            if id(child) in state.pending:
+                child.partial_fit(data)  # type: ignore
+                state.fitted.add(id(child))
+                state.fitting = True
+            else:
+                datas.append(child(data))
+        return pd.concat([data] + datas, axis=1)
+
+    return engine.stream_step(data)
+
+
+def _fit_run(
+    engines: list[DataEngine],
+    start: int,
+    data: pd.DataFrame,
+    pending: set[int],
+    fitted: set[int],
+) -> None:
+    state = _FitRun(pending, fitted)
+    for engine in engines[start:]:
+        if len(data) == 0 or _blocked(engine, data, state):
+            return
+        result = _fit_step(engine, data, state)
+        if result is None:
+            return
+        data = result
+
+
+def _fit_pass(
+    engines: list[DataEngine], chunks: Iterable, pending: set[int]
+) -> set[int]:
+    fitted: set[int] = set()
+    for chunk in chunks:
+        # chunks are read again in the next pass, keep them unmodified
+        _fit_run(engines, 0, chunk.copy(), pending, fitted)
+    for i, engine in enumerate(engines):
+        tail = engine.stream_end()
+        if tail is not None:
+            _fit_run(engines, i + 1, tail, pending, fitted)
+    return fitted
+
+
+def fit_stream(
+    engines: list[DataEngine], chunks: Iterable | Callable[[], Iterable]
+) -> Iterable:
+    """Fit engines supporting partial_fit over the chunks.
+
+    Each pass fits every engine whose inputs do not depend on engines fitting in the same pass,
+    so engines reading raw columns are fitted in a single pass. Engines that are not fitted must
+    support partial_fit, checked before reading any chunk.
+
+    Args:
+        engines (list[DataEngine]): engines applied sequentially
+        chunks (Iterable | Callable[[], Iterable]): chunks, or function returning chunks
+
+    Returns:
+        Iterable: chunks for the transform pass
+    """
+    engines = flatten_engines(engines)
+    pending = {id(engine) for engine in _partial_fit_engines(engines)}
+    if not pending:
+        return chunks() if callable(chunks) else chunks
+
+    get_chunks = _reiterable(chunks)
+    while pending:
+        fitted = _fit_pass(engines, get_chunks(), pending)
+        if not fitted:
+            raise RuntimeError("engines with partial_fit did not receive any data")
+        pending -= fitted
+    return get_chunks()
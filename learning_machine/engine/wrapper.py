@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+from typing import ClassVar
+
+import numpy as np
 import pandas as pd
-from .engine import DataEngine
+from .engine import DataEngine, Kernel
+from .engine_type import DataEngineType
 
 
 def wrap_df2nd(engine: DataEngine, columns: str | list[str], copy=True) -> DF2NDarr:
@@ -9,6 +13,8 @@ def wrap_df2nd(engine: DataEngine, columns: str | list[str], copy=True) -> DF2ND
 
 
 class DF2NDarr(DataEngine):
+    engine_type: ClassVar[list[DataEngineType]] = [DataEngineType.SIDE_EFFECT]
+
     def __init__(self, engine: DataEngine, columns: str | list[str], copy=True):
         self.engine = engine
         self.copy = copy
@@ -20,12 +26,17 @@ class DF2NDarr(DataEngine):
             self._type = "list"
             self.columns = columns
         else:
-            raise ValueError(f"unexpected input type. expect str or list[str] but {type(columns)}")
+            raise ValueError(
+                f"unexpected input type. expect str or list[str] but {type(columns)}"
+            )
 
     def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
         if self.copy:
-            data = data.copy()
+            # columns are replaced, not modified, so a shallow copy keeps the input unchanged
+            data = data.copy(deep=False)
+        return self.call_owned(data)
 
+    def call_owned(self, data: pd.DataFrame) -> pd.DataFrame:
         for col in self.columns:
             col_type = data[col].dtype
             arr = data[col].to_numpy()
@@ -34,3 +45,15 @@ class DF2NDarr(DataEngine):
             data[col] = data[col].astype(col_type)
 
         return data
+
+    def row_context(self) -> int | None:
+        return self.engine.row_context()
+
+    def compile_step(self) -> Kernel:
+        def kernel(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+            for col in self.columns:
+                arr = columns[col]
+                columns[col] = np.asarray(self.engine(arr)).astype(arr.dtype)
+            return columns
+
+        return kernel
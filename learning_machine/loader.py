@@ -0,0 +1,127 @@
+"""Read data files with only the columns the engines use.
+
+The columns come from required_columns of a bundle or an engine, and are pushed down into
+the reader (usecols of csv, columns of parquet and feather), so other columns are never loaded.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING, Any
+
+import pandas as pd
+
+if TYPE_CHECKING:
+    from learning_machine.config import Bundle
+    from learning_machine.engine import DataEngine
+
+
+def _projection(
+    source: Bundle | DataEngine, columns: list[str] | None
+) -> tuple[list[str] | None, dict[str, str]]:
+    """Columns to read and their dtypes. Columns are None to read every column."""
+    required = source.required_columns()
+    if required is None:
+        return None, {}
+    return list(dict.fromkeys([*required, *(columns or [])])), source.input_dtypes()
+
+
+def _file_columns(path: Any, format: str, filesystem: Any = None) -> list[str] | None:
+    """Columns of parquet or feather file (or directory of files) in file order. None if the path can not be opened by pyarrow."""
+    if not isinstance(path, (str, os.PathLike)):
+        return None
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(
+        path, format=format, partitioning="hive", filesystem=filesystem
+    )
+    return dataset.schema.names
+
+
+def _select(path: Any, format: str, wanted: list[str], kwargs: dict) -> list[str]:
+    if "storage_options" in kwargs:
+        # fsspec options are not understood by pyarrow.dataset
+        return wanted
+    names = _file_columns(path, format, kwargs.get("filesystem"))
+    if names is None:
+        return wanted
+    # keep the file order like a full read. Columns missing in the file, e.g. added by engines
+    # with unknown outputs, are skipped like usecols of csv
+    wanted_set = set(wanted)
+    return [name for name in names if name in wanted_set]
+
+
+def read_csv(
+    path: Any,
+    source: Bundle | DataEngine,
+    columns: list[str] | None = None,
+    dtypes: bool = True,
+    **kwargs,
+) -> pd.DataFrame:
+    """Read csv file with the columns required by the engines, see pd.read_csv.
+
+    Args:
+        path (Any): file path or buffer
+        source (Bundle | DataEngine): bundle or engine reading the data
+        columns (list[str] | None, optional): other columns to read, e.g. the target or columns used as features as they are. Defaults to None.
+        dtypes (bool, optional): read columns with the dtypes declared by the engines (DataEngine.input_dtypes). dtype in kwargs takes precedence. Defaults to True.
+        **kwargs: arguments of pd.read_csv, e.g. chunksize to read chunks for SequentialEngine.stream
+
+    Returns:
+        pd.DataFrame: data with the required columns in file order. Every column if the engines read unknown columns.
+    """
+    usecols, input_dtypes = _projection(source, columns)
+    if usecols is not None and "usecols" not in kwargs:
+        wanted = set(usecols)
+        kwargs["usecols"] = lambda col: col in wanted
+    dtype = kwargs.get("dtype")
+    if dtypes and input_dtypes and (dtype is None or isinstance(dtype, dict)):
+        kwargs["dtype"] = {**input_dtypes, **(dtype or {})}
+    return pd.read_csv(path, **kwargs)
+
+
+def read_parquet(
+    path: Any,
+    source: Bundle | DataEngine,
+    columns: list[str] | None = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """Read parquet file with the columns required by the engines, see pd.read_parquet.
+    Parquet stores dtypes, so use dtype_backend="pyarrow" to keep the columns arrow-backed.
+
+    Args:
+        path (Any): file or directory path, or buffer
+        source (Bundle | DataEngine): bundle or engine reading the data
+        columns (list[str] | None, optional): other columns to read, e.g. the target or columns used as features as they are. Defaults to None.
+        **kwargs: arguments of pd.read_parquet
+
+    Returns:
+        pd.DataFrame: data with the required columns in file order. Every column if the engines read unknown columns.
+    """
+    usecols, _ = _projection(source, columns)
+    if usecols is not None:
+        usecols = _select(path, "parquet", usecols, kwargs)
+    return pd.read_parquet(path, columns=usecols, **kwargs)
+
+
+def read_feather(
+    path: Any,
+    source: Bundle | DataEngine,
+    columns: list[str] | None = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """Read feather file with the columns required by the engines, see pd.read_feather.
+
+    Args:
+        path (Any): file path or buffer
+        source (Bundle | DataEngine): bundle or engine reading the data
+        columns (list[str] | None, optional): other columns to read, e.g. the target or columns used as features as they are. Defaults to None.
+        **kwargs: arguments of pd.read_feather
+
+    Returns:
+        pd.DataFrame: data with the required columns in file order. Every column if the engines read unknown columns.
+    """
+    usecols, _ = _projection(source, columns)
+    if usecols is not None:
+        usecols = _select(path, "feather", usecols, kwargs)
+    return pd.read_feather(path, columns=usecols, **kwargs)
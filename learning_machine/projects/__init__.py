@@ -3,15 +3,26 @@
 # Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved
 # ------------------------------------------------------------------------
 from pathlib import Path
+import ast
+import hashlib
 import importlib.abc
 import importlib.util
+import json
+import os
+import sys
 
 __CLONE_PROJECT_ROOT = Path(__file__).resolve().parent.parent / "projects"
+_MANIFEST_VERSION = 1
+_injected_dirs: set[Path] = set()
 
 
 def inject_projects(dir: Path):
     if not dir.is_dir():
         ValueError("inject projects dir need projects directory path")
+    dir = dir.resolve()
+    if dir in _injected_dirs:
+        return
+    _injected_dirs.add(dir)
 
     class ProjectFinder(importlib.abc.MetaPathFinder):
         def find_spec(self, fullname, path, target=None):
@@ -26,8 +37,6 @@ def inject_projects(dir: Path):
                 return
             return importlib.util.spec_from_file_location(fullname, target_file)
 
-    import sys
-
     sys.meta_path.append(ProjectFinder())
 
 
@@ -44,19 +53,176 @@ def preload_projects(dir: Path | str) -> list[str]:
         target_file = project_dir.joinpath("__init__.py")
         if not target_file.is_file():
             continue
-        spec = importlib.util.spec_from_file_location(
-            f"learning_machine.projects.{project_name}", target_file
-        )
+        module_name = f"learning_machine.projects.{project_name}"
+        if module_name in sys.modules:
+            # already imported, e.g. by a lazily registered engine
+            preloaded_projects_name.append(project_name)
+            continue
+        spec = importlib.util.spec_from_file_location(module_name, target_file)
         if spec is None:
             continue
         if spec.loader is None:
             continue
         module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[module_name]
+            raise
         preloaded_projects_name.append(project_name)
     return preloaded_projects_name
 
 
+def _is_engine_registry(node: ast.expr) -> bool:
+    """DATA_ENGINE_ZOO, or attribute ending with it, e.g. zoo.DATA_ENGINE_ZOO"""
+    if isinstance(node, ast.Name):
+        return node.id == "DATA_ENGINE_ZOO"
+    if isinstance(node, ast.Attribute):
+        return node.attr == "DATA_ENGINE_ZOO"
+    return False
+
+
+def scan_engines(source: str) -> list[str]:
+    """Names of engines registered with @DATA_ENGINE_ZOO.regist() in python source, without executing it.
+
+    Args:
+        source (str): python source
+
+    Returns:
+        list[str]: registered names
+    """
+    names = []
+    for node in ast.walk(ast.parse(source)):
+        if not isinstance(node, ast.ClassDef):
+            continue
+        for decorator in node.decorator_list:
+            if not (
+                isinstance(decorator, ast.Call)
+                and isinstance(decorator.func, ast.Attribute)
+                and decorator.func.attr == "regist"
+                and _is_engine_registry(decorator.func.value)
+            ):
+                continue
+            name = node.name
+            args = list(decorator.args) + [
+                keyword.value for keyword in decorator.keywords if keyword.arg == "name"
+            ]
+            if (
+                args
+                and isinstance(args[0], ast.Constant)
+                and isinstance(args[0].value, str)
+            ):
+                name = args[0].value
+            names.append(name)
+    return names
+
+
+def _project_files(dir: Path) -> dict[str, int]:
+    """{relative path: mtime in ns} of python files of projects in dir."""
+    files = {}
+    for project_dir in sorted(dir.iterdir()):
+        if not project_dir.joinpath("__init__.py").is_file():
+            continue
+        for file in project_dir.rglob("*.py"):
+            if "__pycache__" in file.parts:
+                continue
+            files[file.relative_to(dir).as_posix()] = file.stat().st_mtime_ns
+    return files
+
+
+def _manifest_path(dir: Path) -> Path:
+    cache_dir = os.environ.get("LEARNING_MACHINE_CACHE")
+    root = Path(cache_dir) if cache_dir else Path.home() / ".cache" / "learning_machine"
+    key = hashlib.sha1(str(dir).encode()).hexdigest()[:16]
+    return root / "projects" / f"{key}.json"
+
+
+def discover_projects(dir: Path | str, cache: bool = True) -> dict[str, list[str]]:
+    """Find engines of each project in dir by reading the sources, without importing them.
+
+    The result is cached as a manifest in $LEARNING_MACHINE_CACHE (default ~/.cache/learning_machine),
+    and scanned again only if python files of the projects are added, removed or modified.
+
+    Args:
+        dir (Path | str): projects directory, each project is a package {dir}/{project}/__init__.py
+        cache (bool, optional): read and write the manifest cache. Defaults to True.
+
+    Returns:
+        dict[str, list[str]]: {project name: registered engine names}
+    """
+    dir = Path(dir).resolve()
+    files = _project_files(dir)
+    manifest_path = _manifest_path(dir)
+    if cache:
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            if (
+                manifest.get("version") == _MANIFEST_VERSION
+                and manifest.get("files") == files
+            ):
+                return manifest["projects"]
+        except (OSError, ValueError):
+            pass
+
+    projects: dict[str, list[str]] = {}
+    for path in files:
+        project_name = path.split("/", 1)[0]
+        engines = projects.setdefault(project_name, [])
+        try:
+            engines.extend(scan_engines(dir.joinpath(path).read_text()))
+        except (SyntaxError, UnicodeDecodeError):
+            # reported by python when the project is imported
+            continue
+
+    if cache:
+        manifest = {
+            "version": _MANIFEST_VERSION,
+            "dir": str(dir),
+            "files": files,
+            "projects": projects,
+        }
+        try:
+            manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = manifest_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, manifest_path)
+        except OSError:
+            pass
+    return projects
+
+
+def register_projects(dir: Path | str, cache: bool = True) -> list[str]:
+    """Register engines of projects in dir lazily. A project is imported when one of its engines
+    is created, so projects not used by a config are never imported.
+
+    Args:
+        dir (Path | str): projects directory
+        cache (bool, optional): use the manifest cache of discover_projects. Defaults to True.
+
+    Returns:
+        list[str]: project names
+    """
+    from learning_machine.zoo import DATA_ENGINE_ZOO
+
+    dir = Path(dir)
+    if not dir.is_dir():
+        raise ValueError(f"projects directory {dir} does not exist")
+    inject_projects(dir)
+    projects = discover_projects(dir, cache=cache)
+    registered = set(DATA_ENGINE_ZOO.names())
+    for project_name, engines in projects.items():
+        module_name = f"learning_machine.projects.{project_name}"
+        for engine_name in engines:
+            if engine_name in registered:
+                continue
+            DATA_ENGINE_ZOO.regist_lazy(engine_name, module_name)
+            registered.add(engine_name)
+    return list(projects)
+
+
 def prelaod_builtin_projects() -> list[str]:
     projects = []
     if __CLONE_PROJECT_ROOT.is_dir():
@@ -1,3 +1,4 @@
+import importlib
 from typing import Any, Generic, TypeVar
 
 T = TypeVar("T")
@@ -6,8 +7,14 @@ T = TypeVar("T")
 class Registry(Generic[T]):
     def __init__(self):
         self._registry: dict[str, Any] = {}
+        # name -> module registering it, imported on the first get
+        self._lazy: dict[str, str] = {}
 
     def get(self, name: str) -> T:
+        if name not in self._registry and name in self._lazy:
+            importlib.import_module(self._lazy[name])
+            if name not in self._registry:
+                raise KeyError(f"{name} is not registed by {self._lazy[name]}")
         return self._registry[name]
 
     def regist(self, name: str | None = None):
@@ -17,10 +24,37 @@ class Registry(Generic[T]):
                 cls_name = wrapped_cls.__name__
             if self._registry.get(cls_name) is not None:
                 raise ValueError(f"duplicated model name. {name} is already registed")
+            lazy_module = self._lazy.get(cls_name)
+            module = wrapped_cls.__module__
+            if lazy_module is not None and not (
+                module == lazy_module or module.startswith(f"{lazy_module}.")
+            ):
+                raise ValueError(
+                    f"duplicated model name. {cls_name} is already registed by {lazy_module}"
+                )
             self._registry[cls_name] = wrapped_cls
             return wrapped_cls
 
         return wrapper
 
+    def regist_lazy(self, name: str, module: str) -> None:
+        """Register name without importing module. The module is imported on the first get of name,
+        and must register name with regist, itself or by importing its submodules.
+
+        Args:
+            name (str): registered name
+            module (str): absolute module path, e.g. "learning_machine.engine.norm"
+        """
+        if name in self._registry or self._lazy.get(name, module) != module:
+            raise ValueError(f"duplicated model name. {name} is already registed")
+        self._lazy[name] = module
+
+    def names(self) -> list[str]:
+        """Registered names, including lazy ones, without importing modules."""
+        return list(dict.fromkeys([*self._registry, *self._lazy]))
+
     def get_registry(self):
+        for name in self._lazy:
+            if name not in self._registry:
+                self.get(name)
         return self._registry
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def make_data(rows: int = 400, seed: int = 0) -> pd.DataFrame:
+    """Mixed data with missing values: numbers, nan runs, strings and datetimes."""
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({f"num_{i}": rng.normal(i, 1 + i, rows) for i in range(4)})
+    data.loc[rng.random(rows) < 0.1, "num_0"] = np.nan
+    nan_runs = rng.normal(size=rows)
+    starts = rng.choice(rows, rows // 20, replace=False)
+    for start, length in zip(starts, rng.geometric(0.4, len(starts))):
+        nan_runs[start : start + length] = np.nan
+    data["nan_runs"] = nan_runs
+    data["count"] = rng.poisson(3, rows)
+    data["cat"] = rng.choice(["a", "b", "c", "d"], rows)
+    data["store"] = rng.choice(["s1", "s2", "s3"], rows)
+    data["date"] = pd.Timestamp("2020-01-01") + pd.to_timedelta(
+        rng.integers(0, 3 * 365 * 24, rows), unit="h"
+    )
+    data.loc[rng.random(rows) < 0.05, "date"] = pd.NaT
+    data["date_str"] = data["date"].dt.strftime("%Y-%m-%d %H:%M:%S")
+    return data
+
+
+@pytest.fixture
+def data() -> pd.DataFrame:
+    return make_data()
@@ -0,0 +1,14 @@
+import numpy as np
+import pandas as pd
+
+from learning_machine.engine import LabelEncoder
+
+
+def test_label_encoder_fitted_on_empty_data():
+    encoder = LabelEncoder("cat", unknown_value=-1)
+    encoder(pd.DataFrame({"cat": pd.Series([], dtype=object)}))
+
+    out = encoder(pd.DataFrame({"cat": ["a", "b"]}))
+    np.testing.assert_array_equal(out["label_cat"], [-1, -1])
+    compiled = encoder.compile_step()({"cat": np.array(["a"], dtype=object)})
+    np.testing.assert_array_equal(compiled["label_cat"], [-1])
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from learning_machine.engine import (
+    Add,
+    ConcatDFs,
+    DatetimeDayOfMonthSinCos,
+    DatetimeDayOfWeek,
+    DropColumns,
+    FillNaWithValue,
+    LabelEncoder,
+    OneHotEncoder,
+    SequentialEngine,
+    StandardScaler,
+    StringToDatetime,
+)
+from learning_machine.engine.date import _DatetimeEngine
+
+
+def assert_same_columns(columns: dict[str, np.ndarray], expected: pd.DataFrame):
+    assert sorted(columns) == sorted(expected.columns)
+    for name in expected.columns:
+        np.testing.assert_allclose(
+            columns[name].astype(np.float64),
+            expected[name].to_numpy(np.float64),
+            err_msg=name,
+        )
+
+
+def compiled_columns(engine: SequentialEngine, data: pd.DataFrame):
+    columns = {name: data[name].to_numpy() for name in data.columns}
+    return engine.compile().transform_columns(columns)
+
+
+@pytest.mark.parametrize(
+    "engine",
+    [cls("date") for cls in _DatetimeEngine.__subclasses__()]
+    + [DatetimeDayOfMonthSinCos("date", norm=False)],
+    ids=lambda engine: type(engine).__name__,
+)
+def test_datetime_engines_compile(data, engine):
+    pipeline = SequentialEngine([engine])
+    expected = pipeline(data.copy())
+    assert_same_columns(compiled_columns(pipeline, data), expected)
+
+
+def test_compiled_same_output(data):
+    pipeline = SequentialEngine(
+        [
+            FillNaWithValue(["num_0"], 0.0),
+            StandardScaler(["num_0", "num_1"]),
+            ConcatDFs(
+                [
+                    Add("num_0", "num_2"),
+                    LabelEncoder("cat"),
+                    OneHotEncoder(["store"]),
+                    DatetimeDayOfMonthSinCos("date"),
+                ]
+            ),
+            DropColumns(["cat", "store", "date", "date_str"]),
+        ]
+    )
+    expected = pipeline(data.copy())
+    assert_same_columns(compiled_columns(pipeline, data), expected)
+
+
+@pytest.mark.parametrize(
+    "convert",
+    [lambda ts: ts, lambda ts: None if ts is pd.NaT else ts.to_pydatetime()],
+    ids=["Timestamp", "datetime"],
+)
+def test_compiled_records_of_datetimes(data, convert):
+    pipeline = SequentialEngine(
+        [
+            ConcatDFs([DatetimeDayOfMonthSinCos("date"), DatetimeDayOfWeek("date")]),
+            DropColumns(["date"]),
+        ]
+    )
+    data = data[["num_0", "date"]].iloc[:20]
+    expected = pipeline(data.copy()).to_numpy(np.float64)
+
+    records = [
+        {"num_0": num, "date": convert(ts)}
+        for num, ts in zip(data["num_0"], data["date"])
+    ]
+    compiled = pipeline.compile()
+    np.testing.assert_allclose(compiled(records), expected)
+    np.testing.assert_allclose(compiled(records[0]), expected[0])
+
+
+def test_compiled_parses_unseen_strings_without_pandas(data, monkeypatch):
+    pipeline = SequentialEngine([StringToDatetime("date_str")])
+    pipeline(data[["date_str"]].iloc[:50].copy())
+    compiled = pipeline.compile()
+
+    expected = pd.to_datetime(data["date_str"].iloc[50:]).to_numpy()
+
+    def to_datetime(*args, **kwargs):
+        raise AssertionError("compiled records are parsed with pandas")
+
+    monkeypatch.setattr(pd, "to_datetime", to_datetime)
+    columns = {"date_str": data["date_str"].iloc[50:].to_numpy(dtype=object)}
+    parsed = compiled.transform_columns(columns)["date_str"]
+    np.testing.assert_array_equal(parsed.astype("M8[ns]"), expected)
+
+
+@pytest.mark.parametrize(
+    "by", [["store"], ["store", "cat"]], ids=["store", "store cat"]
+)
+def test_compiled_scaler_by_looks_up_groups_without_pandas(data, by, monkeypatch):
+    data = data[["num_0", "num_1", "store", "cat"]].astype({"store": object})
+    data.loc[data.index[::7], "store"] = None
+    pipeline = SequentialEngine([StandardScaler(["num_0", "num_1"], by=by)])
+    pipeline(data.iloc[:300].copy())
+    # unseen groups of the rest of the rows are scaled with statistics of all data
+    data.loc[data.index[350:], "store"] = "unseen"
+    expected = pipeline(data.iloc[300:].copy())
+    compiled = pipeline.compile()
+
+    def get_indexer(*args, **kwargs):
+        raise AssertionError("compiled records are looked up with pandas")
+
+    monkeypatch.setattr(pd.Index, "get_indexer", get_indexer)
+    columns = {name: data[name].iloc[300:].to_numpy() for name in data.columns}
+    out = compiled.transform_columns(columns)
+    for col in ["num_0", "num_1"]:
+        np.testing.assert_allclose(out[col], expected[col], err_msg=col)
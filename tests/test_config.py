@@ -0,0 +1,53 @@
+import sys
+import uuid
+
+import pytest
+
+from learning_machine import create_from_config
+
+ENGINE = """
+from learning_machine.engine import DataEngine
+from learning_machine.zoo import DATA_ENGINE_ZOO
+
+
+class {name}(DataEngine):
+    def __init__(self, fail: bool = False):
+        if fail:
+            raise KeyError("missing option")
+
+    def __call__(self, data):
+        return data
+"""
+
+
+def make_project(root, source: str) -> str:
+    name = f"project_{uuid.uuid4().hex}"
+    root.joinpath(name).mkdir()
+    root.joinpath(name, "__init__.py").write_text(source)
+    return name
+
+
+def test_preload_engines_discovery_can_not_read(tmp_path):
+    engine = f"Engine{uuid.uuid4().hex}"
+    source = ENGINE.format(name=engine) + f"\nDATA_ENGINE_ZOO.regist()({engine})\n"
+    make_project(tmp_path, source)
+
+    bundle = create_from_config(
+        {"projects": [str(tmp_path)], "data_engine": [{engine: {}}]}
+    )
+    assert type(bundle.data_engines[0]).__name__ == engine
+
+
+def test_key_error_of_engine_is_not_hidden(tmp_path):
+    engine = f"Engine{uuid.uuid4().hex}"
+    source = ENGINE.format(name=engine).replace(
+        f"class {engine}", f"@DATA_ENGINE_ZOO.regist()\nclass {engine}"
+    )
+    make_project(tmp_path, source)
+    unused = make_project(tmp_path, "raise ImportError('not used by the config')")
+
+    with pytest.raises(KeyError, match="missing option"):
+        create_from_config(
+            {"projects": [str(tmp_path)], "data_engine": [{engine: {"fail": True}}]}
+        )
+    assert f"learning_machine.projects.{unused}" not in sys.modules
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from learning_machine.engine import DatetimeFeatures, OneHotEncoder, SequentialEngine
+
+POLICY = {"float": "float32", "int": "smallest"}
+
+
+def features():
+    return DatetimeFeatures(
+        "date", ["day_of_year", "day_of_week_sin_cos", "month_of_year", "is_weekend"]
+    )
+
+
+@pytest.mark.parametrize("drop_nat", [False, True], ids=["NaT", "no NaT"])
+def test_datetime_features_follow_dtype_policy(data, drop_nat):
+    if drop_nat:
+        data = data.dropna(subset=["date"])
+    data = data[["date"]]
+    expected = SequentialEngine([features()])(data.copy())
+    pipeline = SequentialEngine([features()], dtype_policy=POLICY)
+    out = pipeline(data.copy())
+
+    raw = ["day_of_year_date", "month_of_year_date", "is_weekend_date"]
+    for col in expected.columns:
+        if col in raw and drop_nat:
+            assert out[col].dtype.kind in "iu", col
+            assert out[col].dtype.itemsize <= 2, col
+        else:
+            assert out[col].dtype == np.float32, col
+        np.testing.assert_allclose(
+            out[col].to_numpy(np.float64), expected[col], rtol=1e-6, err_msg=col
+        )
+
+    columns = pipeline.compile().transform_columns({"date": data["date"].to_numpy()})
+    for col in expected.columns:
+        assert columns[col].dtype == out[col].dtype, col
+
+
+def test_one_hot_encoder_follows_dtype_policy(data):
+    pipeline = SequentialEngine([OneHotEncoder(["store"])], dtype_policy=POLICY)
+    out = pipeline(data[["store"]].copy())
+    columns = pipeline.compile().transform_columns(
+        {"store": data["store"].to_numpy(dtype=object)}
+    )
+    for col in out.columns:
+        assert out[col].dtype == np.float32, col
+        assert columns[col].dtype == np.float32, col
+        np.testing.assert_array_equal(columns[col], out[col])
@@ -0,0 +1,52 @@
+import ast
+import importlib
+import inspect
+import subprocess
+import sys
+
+import learning_machine.engine as engine_package
+from learning_machine.zoo import DATA_ENGINE_ZOO
+
+
+def type_checking_imports() -> dict[str, str]:
+    tree = ast.parse(inspect.getsource(engine_package))
+    imports = {}
+    for node in tree.body:
+        if isinstance(node, ast.If) and ast.unparse(node.test) == "TYPE_CHECKING":
+            for statement in node.body:
+                assert isinstance(statement, ast.ImportFrom)
+                for alias in statement.names:
+                    imports[alias.name] = statement.module
+    return imports
+
+
+def test_type_checking_imports_match_lazy_exports():
+    assert type_checking_imports() == engine_package._LAZY_EXPORTS
+
+
+def test_all_lists_lazy_exports():
+    assert set(engine_package._LAZY_EXPORTS) <= set(engine_package.__all__)
+    for name in engine_package.__all__:
+        assert getattr(engine_package, name) is not None
+
+
+def test_lazy_engines_match_registered_engines():
+    for module_name, names in engine_package._LAZY_ENGINES.items():
+        module = importlib.import_module(f"learning_machine.engine.{module_name}")
+        registered = {
+            name
+            for name, cls in DATA_ENGINE_ZOO.get_registry().items()
+            if cls.__module__ == module.__name__
+        }
+        assert registered == set(names), module_name
+
+
+def test_import_registers_engines_without_importing_modules():
+    code = (
+        "import sys, learning_machine.engine as e; "
+        "print(*(m for m in e._LAZY_ENGINES if f'learning_machine.engine.{m}' in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert out.stdout.split() == []
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from learning_machine.engine import MinMaxScaler, RobustScaler, StandardScaler
+
+
+@pytest.mark.parametrize("scaler", [StandardScaler, MinMaxScaler])
+@pytest.mark.parametrize("by", [None, "store"])
+def test_partial_fit_same_as_fit(data, scaler, by):
+    cols = ["num_0", "num_1", "nan_runs"]
+    fitted = scaler(cols, by=by)
+    expected = fitted(data.copy())
+
+    batched = scaler(cols, by=by)
+    for i in range(0, len(data), 70):
+        batched.partial_fit(data.iloc[i : i + 70])
+    pd.testing.assert_frame_equal(batched(data.copy()), expected)
+
+
+@pytest.mark.parametrize(
+    "scaler",
+    [
+        lambda: StandardScaler(["num_0", "num_1"]),
+        lambda: StandardScaler(["num_0", "num_1"], by="store"),
+        lambda: MinMaxScaler(["num_0", "num_1"]),
+    ],
+    ids=["StandardScaler", "StandardScaler by", "MinMaxScaler"],
+)
+def test_partial_fit_skips_empty_batches(data, scaler):
+    expected = scaler()
+    expected.partial_fit(data)
+
+    batched = scaler()
+    batched.partial_fit(data.iloc[:0])
+    assert not batched.is_fitted()
+    batched.partial_fit(data)
+    batched.partial_fit(data.iloc[:0])
+    pd.testing.assert_frame_equal(batched(data.copy()), expected(data.copy()))
+
+
+def test_sketch_fit_is_reproducible(data):
+    def fit():
+        scaler = RobustScaler(["num_0", "num_1"], sketch_error=0.05)
+        for i in range(0, len(data), 70):
+            scaler.partial_fit(data.iloc[i : i + 70])
+        scaler.partial_fit(data.iloc[:0])
+        return scaler
+
+    first, second = fit(), fit()
+    np.testing.assert_array_equal(first.offset, second.offset)
+    np.testing.assert_array_equal(first.scale, second.scale)
+
+    restored = RobustScaler(["num_0", "num_1"], sketch_error=0.05)
+    restored.set_state(first.get_state())
+    first.partial_fit(data)
+    restored.partial_fit(data)
+    np.testing.assert_array_equal(first.offset, restored.offset)
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from learning_machine.engine import (
+    Add,
+    ConcatDFs,
+    DatetimeDayOfWeek,
+    DropNARow,
+    FillSinkHole,
+    LabelEncoder,
+    SequentialEngine,
+    StandardScaler,
+)
+
+
+def pipelines():
+    return {
+        "row context": lambda: [
+            FillSinkHole("nan_runs", 2, 0.0),
+            StandardScaler(["num_0", "nan_runs"], by="store"),
+            ConcatDFs(
+                [Add("num_0", "num_1"), LabelEncoder("cat"), DatetimeDayOfWeek("date")]
+            ),
+        ],
+        "rows dropped before row context": lambda: [
+            DropNARow(["num_0"]),
+            FillSinkHole("nan_runs", 2, 0.0),
+        ],
+    }
+
+
+@pytest.mark.parametrize("name", list(pipelines()))
+def test_transform_parallel_same_output(data, name):
+    engine = SequentialEngine(pipelines()[name]())
+    engine(data.copy())
+    expected = engine(data.copy())
+    parallel = engine.transform_parallel(data.copy(), workers=2, partitions=3)
+    pd.testing.assert_frame_equal(parallel, expected)
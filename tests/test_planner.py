@@ -0,0 +1,87 @@
+import pandas as pd
+import pytest
+
+from learning_machine.engine import (
+    Add,
+    ConcatDFs,
+    DropColumns,
+    DropNARow,
+    Expr,
+    FillNaWithValue,
+    Mul,
+    SequentialEngine,
+    StandardScaler,
+    Sub,
+)
+
+
+def pipelines():
+    return {
+        "dead concat child": [
+            ConcatDFs([Add("num_0", "num_1"), Mul("num_1", "num_2")]),
+            DropColumns(["add_num_0_num_1"]),
+            StandardScaler(["num_2", "mul_num_1_num_2"]),
+        ],
+        "dead side effect": [
+            FillNaWithValue(["num_0"], 0.0),
+            StandardScaler(["num_3"]),
+            DropColumns(["num_0", "cat"]),
+        ],
+        "hoisted drop": [
+            FillNaWithValue(["num_0"], 0.0),
+            ConcatDFs([Sub("num_0", "num_2")]),
+            StandardScaler(["num_1"]),
+            DropColumns(["num_3", "date_str"]),
+        ],
+        "merged concats": [
+            ConcatDFs([Add("num_0", "num_1")]),
+            StandardScaler(["num_3"]),
+            ConcatDFs([Mul("num_1", "num_2")]),
+            ConcatDFs([Sub("add_num_0_num_1", "num_3")]),
+        ],
+        "side effect adding a column": [
+            ConcatDFs([Add("num_0", "num_1")]),
+            Expr("num_1 * 2", "x", return_new=False),
+            ConcatDFs([Mul("num_1", "num_2")]),
+        ],
+        "dropped side effect column": [
+            Expr("num_1 * 2", "x", return_new=False),
+            DropColumns(["x"]),
+        ],
+        "row filter": [
+            DropNARow(["num_0"]),
+            ConcatDFs([Add("num_1", "num_2")]),
+            DropColumns(["num_1"]),
+        ],
+    }
+
+
+@pytest.mark.parametrize("name", list(pipelines()))
+def test_optimize_same_output(data: pd.DataFrame, name: str):
+    eager = SequentialEngine(pipelines()[name])
+    expected = eager(data.copy())
+    optimized = SequentialEngine(pipelines()[name]).optimize()
+    pd.testing.assert_frame_equal(optimized(data.copy()), expected)
+
+
+def test_optimize_removes_dead_stages():
+    engines = pipelines()["dead concat child"]
+    planned = SequentialEngine(engines).optimize().engines
+    concat = next(engine for engine in planned if isinstance(engine, ConcatDFs))
+    assert [type(child) for child in concat.engines] == [Mul]
+    assert not any(isinstance(engine, DropColumns) for engine in planned)
+
+
+def test_optimize_merges_independent_concats():
+    planned = SequentialEngine(pipelines()["merged concats"]).optimize().engines
+    concats = [engine for engine in planned if isinstance(engine, ConcatDFs)]
+    # the last concat reads a column added by the first one, so it is not merged
+    assert [len(concat.engines) for concat in concats] == [2, 1]
+
+
+def test_optimize_shares_fitted_engines(data: pd.DataFrame):
+    engine = SequentialEngine(pipelines()["hoisted drop"])
+    expected = engine(data.copy())
+    optimized = engine.optimize()
+    assert optimized.is_fitted()
+    pd.testing.assert_frame_equal(optimized(data.copy()), expected)
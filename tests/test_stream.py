@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+
+from learning_machine.engine import (
+    Add,
+    ConcatDFs,
+    Downcast,
+    FillSinkHole,
+    LabelEncoder,
+    MinMaxScaler,
+    OneHotEncoder,
+    RobustScaler,
+    SequentialEngine,
+    StandardScaler,
+)
+
+
+def pipelines():
+    return {
+        "encoders": lambda: [
+            ConcatDFs(
+                [
+                    LabelEncoder("cat"),
+                    LabelEncoder("store", min_frequency=0.3),
+                    OneHotEncoder(["cat", "store"]),
+                ]
+            ),
+        ],
+        "scalers": lambda: [
+            FillSinkHole("nan_runs", 2, 0.0),
+            StandardScaler(["num_0", "nan_runs"]),
+            MinMaxScaler(["num_1"], by="store"),
+        ],
+        "scaler of new column": lambda: [
+            ConcatDFs([Add("num_0", "num_1")]),
+            StandardScaler(["add_num_0_num_1"]),
+        ],
+    }
+
+
+def chunked(data: pd.DataFrame, size: int = 100) -> list[pd.DataFrame]:
+    return [data.iloc[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("name", list(pipelines()))
+def test_stream_same_output(data, name):
+    # classes c and d are first seen in the second chunk
+    data.loc[data.index[:100], "cat"] = (
+        data["cat"].iloc[:100].map({"a": "a"}).fillna("b")
+    )
+    make = pipelines()[name]
+    eager = SequentialEngine(make())(data.copy())
+    streamed = pd.concat(SequentialEngine(make()).stream(chunked(data)))
+    pd.testing.assert_frame_equal(streamed, eager)
+
+
+@pytest.mark.parametrize(
+    "engine", [Downcast(), RobustScaler(["num_0"])], ids=["Downcast", "RobustScaler"]
+)
+def test_stream_refuses_fitting_with_first_chunk(engine):
+    def chunks():
+        raise AssertionError("chunks are read before checking the engines")
+
+    with pytest.raises(ValueError, match=type(engine).__name__):
+        list(SequentialEngine([engine]).stream(chunks))
+
+
+def test_stream_fits_sketches(data):
+    streamed = SequentialEngine([RobustScaler(["num_0"], sketch_error=0.01)])
+    pd.concat(streamed.stream(chunked(data)))
+    assert streamed.is_fitted()